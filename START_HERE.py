@@ -1,7 +1,13 @@
 
+import argparse
+import json
 import os
+import signal
 import sys
 
+from defaults import DEFAULT_DATA_FILE
+from lexicon import LEXICON_FILE
+
 
 def print_banner():
     """Show welcome message"""
@@ -17,7 +23,7 @@ def print_banner():
     print()
 
 
-def check_requirements():
+def check_requirements(data_file=DEFAULT_DATA_FILE):
     """Make sure everything is ready"""
     print("Checking requirements...")
     
@@ -29,7 +35,6 @@ def check_requirements():
     print("✓ Python version OK")
     
     # Check if data file exists
-    data_file = '/mnt/user-data/uploads/Conversational_Transcript_Dataset.json'
     if not os.path.exists(data_file):
         print(f" Data file not found: {data_file}")
         return False
@@ -63,7 +68,7 @@ def show_menu():
     print()
 
 
-def run_web_dashboard():
+def run_web_dashboard(data_file=DEFAULT_DATA_FILE):
     """Launch the interactive dashboard"""
     print()
     print("=" * 70)
@@ -73,16 +78,14 @@ def run_web_dashboard():
     
     try:
         import interactive_analyzer
-        interactive_analyzer.main()
+        interactive_analyzer.main(data_file)
     except KeyboardInterrupt:
         print("\n\n✓ Dashboard closed")
     except Exception as e:
         print(f"\n Error: {e}")
-        print("\nTrying alternative method...")
-        os.system('python3 interactive_analyzer.py')
 
 
-def run_simple_analyzer():
+def run_simple_analyzer(data_file=DEFAULT_DATA_FILE):
     """Run the simple command line version"""
     print()
     print("=" * 70)
@@ -92,11 +95,9 @@ def run_simple_analyzer():
     
     try:
         import simple_analyzer
-        simple_analyzer.main()
+        simple_analyzer.main(['--data', data_file])
     except Exception as e:
         print(f"\n Error: {e}")
-        print("\nTrying alternative method...")
-        os.system('python3 simple_analyzer.py')
 
 
 def show_info():
@@ -140,12 +141,12 @@ def show_info():
     input("Press Enter to continue...")
 
 
-def main():
-    """Main program"""
+def interactive_menu(data_file=DEFAULT_DATA_FILE):
+    """Menu-driven mode for people at a terminal"""
     print_banner()
     
     # Check if everything is ready
-    if not check_requirements():
+    if not check_requirements(data_file):
         print("\n  Please fix the issues above and try again.")
         return
     
@@ -155,11 +156,11 @@ def main():
         choice = input("Enter your choice (1-4): ").strip()
         
         if choice == '1':
-            run_web_dashboard()
+            run_web_dashboard(data_file)
             break
         
         elif choice == '2':
-            run_simple_analyzer()
+            run_simple_analyzer(data_file)
             print("\n Analysis complete!")
             print("\n Next: Open 'dashboard.html' in your browser to see visual results!")
             break
@@ -176,11 +177,562 @@ def main():
             input("Press Enter to continue...")
 
 
+def write_output(result, rows, args):
+    """Write a command result as JSON, or its rows as CSV or Parquet"""
+    if args.format == 'parquet':
+        from columnar import write_rows
+        if not args.output:
+            raise SystemExit('--format parquet needs -o FILE')
+        write_rows(rows, args.output)
+        return
+    
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            import csv
+            if rows:
+                writer = csv.DictWriter(out, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            json.dump(result, out, indent=2)
+            out.write('\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def load_analyzer(args, outcome=None, store=False):
+    """Load the core analyzer (no web server involved)
+    
+    With a snapshot or Parquet/Arrow file and an `outcome`, only that
+    outcome's transcripts are read.
+    Commands that pass `store` also accept a SQLite store from `ingest`, which
+    is queried on disk instead of loaded.
+    """
+    from columnar import is_columnar, load_columnar
+    from conversation_analyzer import ConversationAnalyzer
+    from snapshot import is_snapshot, load_outcome_transcripts
+    from sqlite_store import SQLiteAnalyzer, is_sqlite_store
+    
+    from lexicon import load_lexicon
+    
+    if is_sqlite_store(args.data):
+        if not store:
+            raise SystemExit(f"'{args.command}' needs a JSON dataset or snapshot; SQLite stores "
+                             "answer stats, analyze, search, transcript and text")
+        return SQLiteAnalyzer(args.data)
+    
+    lexicon = load_lexicon(args.lexicon)
+    if outcome is not None and is_snapshot(args.data):
+        transcripts = load_outcome_transcripts(args.data, outcome)
+        return ConversationAnalyzer.from_transcripts(transcripts, dedup=args.dedup, lexicon=lexicon)
+    if outcome is not None and is_columnar(args.data):
+        transcripts = load_columnar(args.data, intent=outcome)
+        return ConversationAnalyzer.from_transcripts(transcripts, dedup=args.dedup, lexicon=lexicon)
+    return ConversationAnalyzer(args.data, dedup=args.dedup, lexicon=lexicon)
+
+
+def cmd_load(args):
+    """Load the dataset and summarize it, optionally writing a snapshot"""
+    analyzer = load_analyzer(args)
+    
+    if args.snapshot:
+        from snapshot import write_snapshot
+        write_snapshot(analyzer.conversations, args.snapshot)
+    if args.parquet:
+        from columnar import write_transcripts
+        write_transcripts(analyzer.conversations, args.parquet)
+    
+    result = {
+        'file': args.data,
+        'transcripts': len(analyzer.conversations),
+        'outcomes': len(analyzer.by_outcome),
+        'domains': len({c['domain'] for c in analyzer.conversations}),
+        'turns': sum(len(c['conversation']) for c in analyzer.conversations),
+        'duplicates_removed': len(analyzer.duplicates)
+    }
+    write_output(result, [result], args)
+    return 0
+
+
+def cmd_stats(args):
+    """Overall statistics and top outcomes"""
+    from collections import Counter
+    from columnar import is_columnar, read_outcome_counts
+    from simple_analyzer import outcome_stats
+    from snapshot import is_snapshot, read_snapshot_header
+    
+    if is_snapshot(args.data):
+        # Answered from the snapshot header, no transcript is loaded
+        header = read_snapshot_header(args.data)
+        counts = Counter({outcome: entry[2] for outcome, entry in header['outcomes'].items()})
+    elif is_columnar(args.data):
+        # Only the intent column is read, turn text is never decoded
+        counts = read_outcome_counts(args.data)
+    else:
+        # Both of these bring in the full analyzer, so only now
+        from conversation_analyzer import load_transcripts
+        from sqlite_store import SQLiteAnalyzer, is_sqlite_store
+        if is_sqlite_store(args.data):
+            counts = SQLiteAnalyzer(args.data).outcome_counts
+        else:
+            counts = Counter(c['intent'] for c in load_transcripts(args.data))
+    
+    stats = outcome_stats(counts)
+    write_output(stats, stats['top_outcomes'], args)
+    return 0
+
+
+def cmd_analyze(args):
+    """Signal analysis of one outcome"""
+    analyzer = load_analyzer(args, outcome=args.outcome, store=True)
+    
+    result = analyzer.analyze(args.outcome, speaker=args.speaker, full=args.full)
+    
+    if result is None:
+        print(f"Unknown outcome: {args.outcome}", file=sys.stderr)
+        return 1
+    
+    rows = [
+        {'outcome': result['outcome'], 'category': category,
+         'count': data['count'], 'percent': data['percent']}
+        for category, data in result['signals'].items()
+    ]
+    write_output(result, rows, args)
+    return 0
+
+
+def cmd_lift(args):
+    """Signal rates against the corpus baseline, ranked"""
+    rows = load_analyzer(args).signal_lift(args.outcome, alpha=args.alpha, speaker=args.speaker)
+    
+    if rows is None:
+        print(f"Unknown outcome: {args.outcome}", file=sys.stderr)
+        return 1
+    
+    write_output(rows, rows, args)
+    return 0
+
+
+def cmd_signals(args):
+    """Signal aggregates per outcome, category and speaker role"""
+    analyzer = load_analyzer(args, outcome=args.outcome)
+    outcomes = [args.outcome] if args.outcome else list(analyzer.signal_index.histograms)
+    
+    rows = []
+    for outcome in outcomes:
+        result = analyzer.signal_breakdown(outcome)
+        if result is None:
+            print(f"Unknown outcome: {outcome}", file=sys.stderr)
+            return 1
+        
+        # 'all' counts a conversation when any turn matches; roles count only their own turns
+        for category, data in result['rates'].items():
+            rows.append({'outcome': outcome, 'speaker': 'all', 'category': category,
+                         'conversations': data['conversations'], 'percent': data['percent'],
+                         'turns': None})
+        for role, rates in result['by_speaker'].items():
+            for category, data in rates.items():
+                rows.append({'outcome': outcome, 'speaker': role, 'category': category, **data})
+    
+    write_output(rows, rows, args)
+    return 0
+
+
+def cmd_structure(args):
+    """Distribution of a conversation feature: one outcome's histogram, or every outcome's percentiles"""
+    analyzer = load_analyzer(args, outcome=args.outcome)
+    
+    if args.feature not in analyzer.structure_features():
+        print(f"Unknown feature: {args.feature} (choose from "
+              f"{', '.join(analyzer.structure_features())})", file=sys.stderr)
+        return 1
+    
+    if args.outcome:
+        result = analyzer.structure_stats(args.outcome, args.feature, args.bins)
+        if result is None:
+            print(f"Unknown outcome: {args.outcome}", file=sys.stderr)
+            return 1
+        rows = [{'outcome': args.outcome, 'feature': args.feature, **bar}
+                for bar in result['histogram']]
+        write_output(result, rows, args)
+        return 0
+    
+    result = [analyzer.structure_stats(outcome, args.feature, args.bins)
+              for outcome in analyzer.outcome_counts]
+    rows = [
+        {
+            'outcome': stats['outcome'], 'feature': stats['feature'],
+            'conversations': stats['conversations'], 'measured': stats['measured'],
+            'mean': stats['mean'], 'min': stats['min'], 'max': stats['max'], **stats['percentiles']
+        }
+        for stats in result
+    ]
+    write_output(result, rows, args)
+    return 0
+
+
+def cmd_phrases(args):
+    """Phrases that set one outcome apart from the rest"""
+    analyzer = load_analyzer(args)
+    options = {}
+    if args.counters:
+        options['counters'] = args.counters
+    if args.epsilon:
+        options['epsilon'] = args.epsilon
+    if options:
+        analyzer.phrase_miner(**options)
+    
+    result = analyzer.discriminative_phrases(args.outcome, args.limit, args.min_count)
+    if result is None:
+        print(f"Unknown outcome: {args.outcome}", file=sys.stderr)
+        return 1
+    
+    write_output(result, result['phrases'], args)
+    return 0
+
+
+def cmd_transcript(args):
+    """One transcript by id"""
+    from conversation_analyzer import transcript_page
+    from snapshot import find_transcript, is_snapshot
+    
+    if is_snapshot(args.data) and not args.dedup:
+        # Reads the id index and one outcome's frame, not the whole dataset
+        conv = find_transcript(args.data, args.transcript_id)
+        result = transcript_page(conv, args.offset, args.limit) if conv else None
+    else:
+        result = load_analyzer(args, store=True).get_transcript(args.transcript_id, args.offset,
+                                                               args.limit)
+    
+    if result is None:
+        print(f"Unknown transcript: {args.transcript_id}", file=sys.stderr)
+        return 1
+    
+    rows = [dict(turn, transcript_id=result['transcript_id']) for turn in result['turns']]
+    write_output(result, rows, args)
+    return 0
+
+
+def cmd_search(args):
+    """Find outcomes by name"""
+    results = load_analyzer(args, store=True).search_outcomes(args.query)
+    write_output(results, results, args)
+    return 0
+
+
+def cmd_ingest(args):
+    """Stream the dataset into a SQLite store for corpora larger than memory"""
+    from conversation_analyzer import iter_transcripts
+    from lexicon import load_lexicon
+    from sqlite_store import ingest
+    
+    try:
+        summary = ingest(iter_transcripts(args.data), args.database,
+                         lexicon=load_lexicon(args.lexicon), batch_size=args.batch_size)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    write_output(summary, [summary], args)
+    return 0
+
+
+def cmd_text(args):
+    """Full-text search over every turn of a SQLite store"""
+    from sqlite_store import SQLiteAnalyzer, is_sqlite_store
+    
+    if not is_sqlite_store(args.data):
+        print("text search needs a SQLite store; create one with 'ingest'", file=sys.stderr)
+        return 1
+    
+    try:
+        results = SQLiteAnalyzer(args.data).search_text(args.match, args.limit, args.outcome)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    write_output(results, results, args)
+    return 0
+
+
+def non_negative(value):
+    """Parse a count or position that can't be below zero"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected a whole number, got {value!r}') from None
+    if number < 0:
+        raise argparse.ArgumentTypeError('must not be negative')
+    return number
+
+
+def shard_spec(value):
+    """Parse --shard I/N into (I, N)"""
+    try:
+        shard, shards = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected INDEX/COUNT, e.g. 0/4') from None
+    if not 0 <= shard < shards:
+        raise argparse.ArgumentTypeError('INDEX must be from 0 to COUNT - 1')
+    return shard, shards
+
+
+def cmd_serve(args):
+    """Run the web dashboard"""
+    import interactive_analyzer
+    from sqlite_store import is_sqlite_store
+    
+    shard_urls = args.shard_urls.split(',') if args.shard_urls else None
+    if args.dedup is not None and (args.shard or args.shards or shard_urls):
+        # Near-duplicates in different slices would never be compared
+        raise SystemExit('--dedup cannot be combined with sharding')
+    if args.workers:
+        if not hasattr(os, 'fork'):
+            raise SystemExit('--workers needs a platform with fork()')
+        if args.shards or shard_urls:
+            # The coordinator's fan-out threads would not survive the fork
+            raise SystemExit('--workers cannot be combined with --shards or --shard-urls')
+    
+    if os.path.isfile(args.data) and is_sqlite_store(args.data) \
+            and (args.dedup is not None or args.shard or args.shards or shard_urls):
+        raise SystemExit('a SQLite store is served whole: drop --dedup and the sharding options')
+    
+    processes = []
+    if args.shards:
+        from sharding import spawn_shards
+        processes, shard_urls = spawn_shards(args.data, args.shards, args.port, args.lexicon)
+        # Exit normally on SIGTERM too, so the shard processes are stopped below
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        interactive_analyzer.main(args.data, port=args.port, host=args.host,
+                                  open_browser=not args.no_browser, dedup=args.dedup,
+                                  lexicon_file=args.lexicon, shard=args.shard,
+                                  shard_urls=shard_urls, workers=args.workers)
+    finally:
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+def cmd_export(args):
+    """Write one report per outcome"""
+    from conversation_analyzer import load_transcripts
+    from lexicon import load_lexicon
+    from simple_analyzer import export_reports, group_by_outcome
+    
+    # Each worker analyzes its outcomes itself, so no analyzer is built here
+    by_outcome = group_by_outcome(load_transcripts(args.data))
+    summary = export_reports(by_outcome, load_lexicon(args.lexicon), args.output_dir,
+                             fmt=args.report_format, workers=args.workers)
+    write_output(summary, [summary], args)
+    return 0
+
+
+def cmd_bench(args):
+    """Time the analyzers on synthetic corpora (or on --data when given)"""
+    from benchmarks import run_benchmarks
+    
+    sizes = [int(size) for size in args.sizes.split(',')]
+    rows = run_benchmarks(args.suite, sizes=sizes, repeat=args.repeat,
+                          workers=args.workers, data_file=args.bench_data)
+    write_output(rows, rows, args)
+    return 0
+
+
+def cmd_verify(args):
+    """Check the optimized analyzers against the reference semantics, timing both"""
+    from differential import ENGINES, run_differential
+    from lexicon import load_lexicon
+    
+    engines = args.engines.split(',') if args.engines else None
+    unknown = set(engines or []) - set(ENGINES)
+    if unknown:
+        raise SystemExit(f"unknown engine {', '.join(sorted(unknown))}; "
+                         f"choose from {', '.join(ENGINES)}")
+    
+    report = run_differential(corpora=args.corpora, size=args.size, seed=args.seed,
+                              data_file=args.dataset, lexicon=load_lexicon(args.lexicon),
+                              engines=engines)
+    for divergence in report['divergences']:
+        print(f"✗ {divergence['engine']}, corpus {divergence['corpus']}: {divergence['check']}\n"
+              f"    {divergence['difference']}", file=sys.stderr)
+    if report['divergent']:
+        print(f"✗ {report['divergent']} of {report['checks']} checks diverge", file=sys.stderr)
+    else:
+        print(f"✓ {report['checks']} checks on {report['corpora']} corpora match the reference",
+              file=sys.stderr)
+    
+    write_output(report, report['timings'], args)
+    return 1 if report['divergent'] else 0
+
+
+def build_parser():
+    """Command line interface for batch jobs"""
+    parser = argparse.ArgumentParser(
+        description='Conversation analyzer. Run without a command for the interactive menu.'
+    )
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE,
+                        help='transcript dataset (default: $CONVERSATION_DATA or %(default)s)')
+    parser.add_argument('--lexicon', default=LEXICON_FILE,
+                        help='signal keyword file (default: $SIGNAL_LEXICON or %(default)s)')
+    parser.add_argument('--dedup', type=float, metavar='SIMILARITY',
+                        help='skip transcripts that nearly duplicate an earlier one, '
+                             'e.g. 0.9 for 90%% word overlap')
+    
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--format', choices=['json', 'csv', 'parquet'], default='json',
+                        help='output format (default: json; parquet needs -o and pyarrow)')
+    output.add_argument('-o', '--output', help='write to this file instead of stdout')
+    
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    
+    sub = commands.add_parser('load', parents=[output], help='load the dataset and summarize it')
+    sub.add_argument('--snapshot', metavar='FILE',
+                     help='also write a snapshot; pass it as --data for fast startup')
+    sub.add_argument('--parquet', metavar='FILE',
+                     help='also write the transcripts to Parquet (needs pyarrow)')
+    sub.set_defaults(handler=cmd_load)
+    
+    sub = commands.add_parser('stats', parents=[output], help='overall statistics')
+    sub.set_defaults(handler=cmd_stats)
+    
+    sub = commands.add_parser('analyze', parents=[output], help='analyze one outcome')
+    sub.add_argument('outcome', help='exact outcome (intent) name')
+    sub.add_argument('--full', action='store_true',
+                     help='scan every conversation instead of the first 30')
+    sub.add_argument('--speaker', type=str.lower,
+                     help="only count this speaker's turns (e.g. customer, agent)")
+    sub.set_defaults(handler=cmd_analyze)
+    
+    sub = commands.add_parser('lift', parents=[output],
+                              help='signal lift and significance against the whole dataset')
+    sub.add_argument('outcome', nargs='?', help='exact outcome name (default: every outcome)')
+    sub.add_argument('--alpha', type=float, default=0.05,
+                     help='false discovery rate for "significant" (default: 0.05)')
+    sub.add_argument('--speaker', type=str.lower,
+                     help="only count this speaker's turns (e.g. customer, agent)")
+    sub.set_defaults(handler=cmd_lift)
+    
+    sub = commands.add_parser('signals', parents=[output],
+                              help='signal counts per outcome, category and speaker')
+    sub.add_argument('outcome', nargs='?', help='exact outcome name (default: every outcome)')
+    sub.set_defaults(handler=cmd_signals)
+    
+    sub = commands.add_parser('structure', parents=[output],
+                              help='turn counts, lengths and first-signal turns per outcome')
+    sub.add_argument('outcome', nargs='?',
+                     help="exact outcome name for its histogram (default: every outcome's percentiles)")
+    sub.add_argument('--feature', default='turns',
+                     help="turns, chars, turns:ROLE, chars:ROLE or first:CATEGORY, the turn where "
+                          "a signal first appears (default: %(default)s)")
+    sub.add_argument('--bins', type=int, default=20, help='histogram bars (default: %(default)s)')
+    sub.set_defaults(handler=cmd_structure)
+    
+    sub = commands.add_parser('phrases', parents=[output],
+                              help='phrases that set one outcome apart (approximate, bounded memory)')
+    sub.add_argument('outcome', help='exact outcome (intent) name')
+    sub.add_argument('--limit', type=int, default=20)
+    sub.add_argument('--min-count', type=int, default=5,
+                     help='minimum conversations containing the phrase (default: 5)')
+    sub.add_argument('--counters', type=int,
+                     help='phrases tracked per outcome; more is slower but more exact')
+    sub.add_argument('--epsilon', type=float,
+                     help='corpus count error as a fraction of all phrases counted')
+    sub.set_defaults(handler=cmd_phrases)
+    
+    sub = commands.add_parser('transcript', parents=[output], help='show one transcript by id')
+    sub.add_argument('transcript_id')
+    sub.add_argument('--offset', type=non_negative, default=0, help='first turn to show')
+    sub.add_argument('--limit', type=non_negative, help='number of turns to show (default: all)')
+    sub.set_defaults(handler=cmd_transcript)
+    
+    sub = commands.add_parser('search', parents=[output], help='find outcomes by name')
+    sub.add_argument('query')
+    sub.set_defaults(handler=cmd_search)
+    
+    sub = commands.add_parser('ingest', parents=[output],
+                              help='write the dataset into a SQLite store (for data larger than memory)')
+    sub.add_argument('database', help='SQLite file to create; pass it as --data afterwards')
+    sub.add_argument('--batch-size', type=int, default=1000,
+                     help='transcripts per transaction (default: %(default)s)')
+    sub.set_defaults(handler=cmd_ingest)
+    
+    sub = commands.add_parser('text', parents=[output],
+                              help='full-text search of turns in a SQLite store')
+    sub.add_argument('match', help='words, "exact phrases", AND / OR / NOT, NEAR(a b)')
+    sub.add_argument('--outcome', help='only this outcome')
+    sub.add_argument('--limit', type=int, default=20)
+    sub.set_defaults(handler=cmd_text)
+    
+    sub = commands.add_parser('serve', help='run the web dashboard')
+    sub.add_argument('--port', type=int, default=8000)
+    sub.add_argument('--host', default='localhost')
+    sub.add_argument('--no-browser', action='store_true', help="don't open a browser")
+    sub.add_argument('--workers', type=int, metavar='N',
+                     help='serve from N pre-forked processes sharing one loaded copy of the data')
+    sharding = sub.add_mutually_exclusive_group()
+    sharding.add_argument('--shards', type=int, metavar='N',
+                          help='split the data across N local shard processes (ports PORT+1..PORT+N) '
+                               'and serve their merged results')
+    sharding.add_argument('--shard', type=shard_spec, metavar='I/N',
+                          help='serve only slice I (from 0) of N, for a coordinator')
+    sharding.add_argument('--shard-urls', metavar='URL,...',
+                          help='coordinate shard servers started with --shard, listed in slice order')
+    sub.set_defaults(handler=cmd_serve)
+    
+    sub = commands.add_parser('export', parents=[output], help='write a report per outcome')
+    sub.add_argument('output_dir', help='directory for the reports')
+    sub.add_argument('--report-format', choices=['json', 'html'], default='json')
+    sub.add_argument('--workers', type=int, default=None,
+                     help='worker processes (default: CPU count)')
+    sub.set_defaults(handler=cmd_export)
+    
+    sub = commands.add_parser('bench', parents=[output], help='run benchmarks')
+    sub.add_argument('--suite', default='core')
+    sub.add_argument('--sizes', default='1000,10000',
+                     help='comma-separated synthetic corpus sizes (default: %(default)s)')
+    sub.add_argument('--repeat', type=int, default=3)
+    sub.add_argument('--workers', type=int, default=None)
+    sub.add_argument('--bench-data', metavar='FILE',
+                     help='benchmark this dataset instead of synthetic ones')
+    sub.set_defaults(handler=cmd_bench)
+    
+    sub = commands.add_parser('verify', parents=[output],
+                              help='check the optimized analyzers against a reference on random corpora')
+    sub.add_argument('--corpora', type=int, default=20, help='random corpora (default: %(default)s)')
+    sub.add_argument('--size', type=int, default=200,
+                     help='at most this many transcripts per corpus (default: %(default)s)')
+    sub.add_argument('--seed', type=int, default=0)
+    sub.add_argument('--engines', metavar='NAME,...',
+                     help='core, core_reloaded, sqlite, simple, simple_reloaded (default: all)')
+    sub.add_argument('--dataset', metavar='FILE',
+                     help='check this dataset with the given lexicon instead of random corpora')
+    sub.set_defaults(handler=cmd_verify)
+    
+    return parser
+
+
+def main(argv=None):
+    """Main program"""
+    args = build_parser().parse_args(argv)
+    
+    if args.command is None:
+        interactive_menu(args.data)
+        return 0
+    
+    return args.handler(args)
+
+
 if __name__ == '__main__':
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\n Goodbye!\n")
+    except BrokenPipeError:
+        # Output was piped into something like `head` that exited early
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except Exception as e:
-        print(f"\n Unexpected error: {e}")
-        print("\n Tip: Try running 'python3 interactive_analyzer.py' directly")
+        print(f"\n Unexpected error: {e}", file=sys.stderr)
+        print("\n Tip: Try running 'python3 interactive_analyzer.py' directly", file=sys.stderr)
+        sys.exit(1)
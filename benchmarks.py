@@ -0,0 +1,525 @@
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from conversation_analyzer import ConversationAnalyzer, load_transcripts
+
+
+# Building blocks for synthetic transcripts
+SYNTHETIC_INTENTS = [
+    'Escalation - Threat of Legal Action',
+    'Escalation - Repeated Service Failures',
+    'Refund Request - Delayed',
+    'Fraud Alert Investigation',
+    'Billing Dispute',
+    'Claim Status Inquiry',
+    'Account Access Issues',
+    'Delivery Investigation',
+    'Multiple Issues - Complex Case',
+    'Cancellation Request',
+]
+
+SYNTHETIC_DOMAINS = ['Banking', 'Insurance', 'E-commerce', 'Telecom', 'Healthcare']
+
+SYNTHETIC_PHRASES = [
+    "Thank you for calling, how can I help you today?",
+    "Let me pull up your account.",
+    "Could you confirm your date of birth please?",
+    "I understand, let me look into that for you.",
+    "Is there anything else I can help with?",
+    "I made a payment last week but it has not shown up.",
+    "There is an issue with my latest statement.",
+    "I am really frustrated with how this has been handled.",
+    "This is the third time I have called about this.",
+    "I already told the last agent all of this.",
+    "I have been waiting for weeks for an answer.",
+    "If this is not fixed I will talk to my lawyer.",
+    "I want to speak to a supervisor right now.",
+    "I can escalate this to my manager if you like.",
+    "Please hold while I check that.",
+    "Okay, that sounds good.",
+]
+
+
+def make_synthetic_corpus(size, seed=0, intents=50):
+    """Generate `size` transcripts shaped like the real dataset
+
+    Intent frequencies follow a Zipf-like curve so a few outcomes are large,
+    like production data.
+    """
+    rng = random.Random(seed)
+    
+    names = list(SYNTHETIC_INTENTS)
+    while len(names) < intents:
+        names.append(f"{rng.choice(SYNTHETIC_INTENTS)} #{len(names)}")
+    weights = [1 / (rank + 1) for rank in range(len(names))]
+    
+    transcripts = []
+    for i in range(size):
+        conversation = []
+        for turn in range(rng.randint(4, 24)):
+            conversation.append({
+                'speaker': 'Agent' if turn % 2 == 0 else 'Customer',
+                'text': ' '.join(rng.sample(SYNTHETIC_PHRASES, rng.randint(1, 3)))
+            })
+        transcripts.append({
+            'transcript_id': f'SYN-{seed}-{i:08d}',
+            'intent': rng.choices(names, weights)[0],
+            'domain': rng.choice(SYNTHETIC_DOMAINS),
+            'reason_for_call': 'Synthetic benchmark transcript',
+            'conversation': conversation
+        })
+    
+    return transcripts
+
+
+def write_synthetic_dataset(path, size, seed=0):
+    """Write a synthetic corpus in the dataset file format"""
+    with open(path, 'w') as f:
+        json.dump({'transcripts': make_synthetic_corpus(size, seed)}, f)
+    return path
+
+
+def time_call(fn, repeat):
+    """Run fn `repeat` times; return (best, mean) wall time in ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), sum(timings) / len(timings)
+
+
+def bench_core(data_file, size, repeat, workers):
+    """Load, stats, analyze and search on the core analyzer"""
+    results = {}
+    
+    results['load'] = time_call(lambda: ConversationAnalyzer(data_file), repeat)
+    
+    analyzer = ConversationAnalyzer(data_file)
+    top = analyzer.get_all_outcomes()[0]['name']
+    
+    results['outcomes'] = time_call(analyzer.get_all_outcomes, repeat)
+    results['analyze'] = time_call(lambda: analyzer.analyze(top), repeat)
+    results['analyze_full'] = time_call(lambda: list(analyzer.analyze_stream(top)), repeat)
+    results['search'] = time_call(lambda: analyzer.search_outcomes('escalation'), repeat)
+    
+    return results
+
+
+def time_to_first_output(command, cwd=None):
+    """Start `command` in a fresh interpreter; ms until its first line of output"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    proc.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1000
+    proc.stdout.read()
+    proc.wait()
+    return elapsed
+
+
+def bench_startup(data_file, size, repeat, workers):
+    """Cold-start latency of one-shot CLI commands, from JSON and from a snapshot"""
+    from collections import Counter
+    from snapshot import write_snapshot
+    
+    here = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(here, 'START_HERE.py')
+    transcripts = load_transcripts(data_file)
+    top = Counter(c['intent'] for c in transcripts).most_common(1)[0][0]
+    
+    results = {}
+    # Never next to the user's dataset: that directory may be shared or read-only
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_file = os.path.join(tmp, os.path.basename(data_file) + '.snapshot')
+        write_snapshot(transcripts, snapshot_file)
+    
+        commands = {
+            'import_cli': [sys.executable, '-c', 'import START_HERE; print()'],
+            'stats_json': [sys.executable, cli, '--data', data_file, 'stats'],
+            'stats_snapshot': [sys.executable, cli, '--data', snapshot_file, 'stats'],
+            'analyze_json': [sys.executable, cli, '--data', data_file, 'analyze', top],
+            'analyze_snapshot': [sys.executable, cli, '--data', snapshot_file, 'analyze', top],
+        }
+    
+        for operation, command in commands.items():
+            timings = []
+            for _ in range(repeat):
+                timings.append(time_to_first_output(command, cwd=here))
+            results[operation] = (min(timings), sum(timings) / len(timings))
+    
+    return results
+
+
+# Requests per timed batch in the HTTP suite
+HTTP_BATCH = 200
+
+
+def read_responses(stream, count):
+    """Read `count` Content-Length framed responses; returns their statuses"""
+    statuses = []
+    for _ in range(count):
+        statuses.append(int(stream.readline().split()[1]))
+        length = 0
+        while True:
+            line = stream.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        stream.read(length)
+    return statuses
+
+
+def bench_http(data_file, size, repeat, workers):
+    """Per-request latency of small API calls: new connection vs keep-alive vs pipelined"""
+    import http.client
+    import socket
+    import threading
+    import interactive_analyzer
+    
+    interactive_analyzer.ANALYZER = ConversationAnalyzer(data_file)
+    top = interactive_analyzer.ANALYZER.get_all_outcomes()[0]['name']
+    server = interactive_analyzer.ThreadingServer(('127.0.0.1', 0),
+                                                  interactive_analyzer.DashboardHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    paths = ['/api/outcomes', '/api/search?q=escalation',
+             '/api/signals?outcome=' + top.replace(' ', '%20')]
+    
+    def new_connections():
+        for i in range(HTTP_BATCH):
+            conn = http.client.HTTPConnection(host, port)
+            conn.request('GET', paths[i % len(paths)])
+            conn.getresponse().read()
+            conn.close()
+    
+    def keep_alive():
+        conn = http.client.HTTPConnection(host, port)
+        for i in range(HTTP_BATCH):
+            conn.request('GET', paths[i % len(paths)])
+            conn.getresponse().read()
+        conn.close()
+    
+    def pipelined():
+        with socket.create_connection((host, port)) as sock:
+            requests = b''.join(
+                f'GET {paths[i % len(paths)]} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode()
+                for i in range(HTTP_BATCH)
+            )
+            sock.sendall(requests)
+            read_responses(sock.makefile('rb'), HTTP_BATCH)
+    
+    results = {}
+    try:
+        for operation, fn in [('new_connection', new_connections), ('keep_alive', keep_alive),
+                              ('pipelined', pipelined)]:
+            best, mean = time_call(fn, repeat)
+            results[f'{operation}_per_request'] = (best / HTTP_BATCH, mean / HTTP_BATCH)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+# Shard processes in the sharding suite when --workers is not given
+BENCH_SHARDS = 4
+
+
+def free_port_block(count):
+    """First port of `count` consecutive free local ports"""
+    import socket
+    rng = random.Random()
+    while True:
+        base = rng.randrange(20000, 60000)
+        try:
+            for port in range(base, base + count):
+                with socket.socket() as sock:
+                    sock.bind(('127.0.0.1', port))
+            return base
+        except OSError:
+            pass
+
+
+def shard_checks(single):
+    """(name, fn(analyzer)) calls whose answers must be the same sharded or not"""
+    outcomes = [outcome['name'] for outcome in single.get_all_outcomes()]
+    categories = list(single.lexicon['categories'])
+    
+    checks = [('outcomes', lambda analyzer: analyzer.get_all_outcomes())]
+    for query in ['escalation', 'e', 'no such outcome']:
+        checks.append((f'search {query!r}', lambda analyzer, q=query: analyzer.search_outcomes(q)))
+    for outcome in outcomes[:10] + ['no such outcome']:
+        for options in [{}, {'full': True}, {'shuffle': 7}, {'full': True, 'speaker': 'customer'},
+                        {'speaker': 'agent', 'shuffle': 3}, {'full': True, 'shuffle': 5}]:
+            checks.append((f'analyze {outcome!r} {options}',
+                           lambda analyzer, o=outcome, kw=options: analyzer.analyze(o, **kw)))
+        for category in categories:
+            checks.append((f'examples {outcome!r} {category!r}',
+                           lambda analyzer, o=outcome, c=category: analyzer.examples(o, c, k=5, seed=1)))
+    return checks
+
+
+def different_answers(single, sharded):
+    """Names of the shard_checks where the sharded answer is not the single analyzer's"""
+    return [name for name, check in shard_checks(single) if check(single) != check(sharded)]
+
+
+def bench_shards(data_file, size, repeat, workers):
+    """Scatter-gather over local shard processes against one analyzer
+    
+    Every merged answer is first compared with the single-node one; any
+    difference raises instead of reporting timings.
+    """
+    from lexicon import LEXICON_FILE
+    from sharding import ShardedAnalyzer, spawn_shards
+    
+    shards = workers or BENCH_SHARDS
+    single = ConversationAnalyzer(data_file)
+    # spawn_shards uses the ports after the one given, which is left for a coordinator
+    processes, urls = spawn_shards(data_file, shards, free_port_block(shards + 1), LEXICON_FILE)
+    try:
+        sharded = ShardedAnalyzer.connect(urls)
+        different = different_answers(single, sharded)
+        if different:
+            raise RuntimeError(f'{len(different)} sharded answers differ from the single '
+                               f"analyzer, e.g. {'; '.join(different[:3])}")
+        
+        # A reshuffle is never cached, on the single analyzer or on the shards
+        # (which get the seed too), so every full analysis really scans
+        top = single.get_all_outcomes()[0]['name']
+        results = {}
+        for name, analyzer in [('single', single), (f'{shards}_shards', sharded)]:
+            results[f'analyze_{name}'] = time_call(lambda: analyzer.analyze(top), repeat)
+            results[f'analyze_full_{name}'] = time_call(
+                lambda: analyzer.analyze(top, shuffle=1, full=True), repeat)
+            results[f'search_{name}'] = time_call(lambda: analyzer.search_outcomes('escalation'),
+                                                  repeat)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def measure_load_memory(data_file):
+    """Memory a fully built analyzer of `data_file` takes, measured in this process
+    
+    Meant to run in a fresh interpreter: RSS growth comes from a first load,
+    Python allocations (tracemalloc) and the per-structure breakdown from a
+    second one with the phrase and similarity indexes built as well.
+    """
+    import gc
+    import tracemalloc
+    from footprint import process_rss
+    
+    rss_before = process_rss()
+    analyzer = ConversationAnalyzer(data_file)
+    analyzer.phrase_miner()
+    analyzer.similarity_index()
+    rss_growth = process_rss() - rss_before
+    del analyzer
+    gc.collect()
+    
+    tracemalloc.start()
+    analyzer = ConversationAnalyzer(data_file)
+    analyzer.phrase_miner()
+    analyzer.similarity_index()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'rss_growth_mb': rss_growth / 2**20,
+        'traced_mb': current / 2**20,
+        'traced_peak_mb': peak / 2**20,
+        'usage': analyzer.memory_usage()
+    }
+
+
+def bench_memory(data_file, size, repeat, workers):
+    """Memory of a loaded analyzer in total and per structure (fresh process per size)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = ('import json, sys, benchmarks; '
+            'print(json.dumps(benchmarks.measure_load_memory(sys.argv[1])))')
+    output = subprocess.run([sys.executable, '-c', code, data_file], cwd=here, check=True,
+                            capture_output=True, text=True).stdout
+    measured = json.loads(output.splitlines()[-1])
+    
+    results = {
+        'rss_growth': measured['rss_growth_mb'],
+        'python_allocated': measured['traced_mb'],
+        'python_allocated_peak': measured['traced_peak_mb'],
+        'counted_total': measured['usage']['total_mb']
+    }
+    for structure in measured['usage']['structures']:
+        results[f"structure_{structure['structure']}"] = structure['mb']
+    return results
+
+
+# Concurrent keep-alive clients per worker, and full analyses each one requests
+PREFORK_CLIENTS_PER_WORKER = 2
+PREFORK_REQUESTS = 5
+
+
+def process_memory(pid):
+    """(private, proportional share, resident) MB of a process (Linux /proc only)"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0]) / 1024
+    return fields['Private_Clean'] + fields['Private_Dirty'], fields['Pss'], fields['Rss']
+
+
+def child_pids(pid):
+    """Processes whose parent is `pid`"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The parent pid is the second field after the parenthesized command name
+        if int(stat.rpartition(')')[2].split()[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def request_paths(address, paths):
+    """GET every path over one keep-alive connection (a client process of bench_prefork)"""
+    import http.client
+    conn = http.client.HTTPConnection(*address, timeout=120)
+    for path in paths:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f'{path} answered {response.status}')
+    conn.close()
+
+
+def bench_prefork(data_file, size, repeat, workers):
+    """Full-analysis throughput and memory of pre-forked dashboard workers
+    
+    Runs `serve --workers N` for N = 1, 2, 4 ... up to `workers` (default:
+    CPU count, at least 2) under PREFORK_CLIENTS_PER_WORKER clients per
+    worker. Memory rows are per-worker private MB (what a worker does not
+    share with the others), the loading parent's RSS, and the proportional
+    total of all processes. Linux only.
+    """
+    import multiprocessing
+    import urllib.request
+    from urllib.parse import quote
+    
+    here = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(here, 'START_HERE.py')
+    top = ConversationAnalyzer(data_file).get_all_outcomes()[0]['name']
+    most = workers or max(2, os.cpu_count() or 1)
+    counts = sorted({n for n in (1, 2, 4, 8, 16, 32, 64) if n < most} | {most})
+    
+    results = {}
+    for count in counts:
+        port = free_port_block(1)
+        server = subprocess.Popen(
+            [sys.executable, cli, '--data', data_file, 'serve', '--port', str(port),
+             '--no-browser', '--workers', str(count)],
+            cwd=here, stdout=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=300):
+                        break
+                except OSError:
+                    if server.poll() is not None:
+                        raise RuntimeError(f'server with {count} workers exited')
+                    time.sleep(0.2)
+            
+            clients = count * PREFORK_CLIENTS_PER_WORKER
+            total = clients * PREFORK_REQUESTS
+            
+            def run():
+                # A different seed per request, so nothing is answered from cache
+                shuffles = iter(range(random.randrange(1 << 30), 1 << 31))
+                batches = [
+                    [f'/api/analyze?outcome={quote(top)}&full=1&shuffle={next(shuffles)}'
+                     for _ in range(PREFORK_REQUESTS)]
+                    for _ in range(clients)
+                ]
+                with multiprocessing.get_context('fork').Pool(clients) as pool:
+                    pool.starmap(request_paths, [(('127.0.0.1', port), batch) for batch in batches])
+            
+            best, mean = time_call(run, repeat)
+            results[f'per_request_{count}_workers'] = (best / total, mean / total)
+            
+            pids = child_pids(server.pid)
+            # Only the workers: `serve` runs in the process started above
+            private = [process_memory(pid)[0] for pid in pids]
+            results[f'worker_private_mb_{count}_workers'] = sum(private) / len(private)
+            results[f'parent_rss_mb_{count}_workers'] = process_memory(server.pid)[2]
+            results[f'total_pss_mb_{count}_workers'] = sum(
+                process_memory(pid)[1] for pid in [server.pid] + pids
+            )
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+# Benchmark suites by name
+SUITES = {
+    'core': bench_core,
+    'startup': bench_startup,
+    'http': bench_http,
+    'shards': bench_shards,
+    'prefork': bench_prefork,
+    'memory': bench_memory,
+}
+
+
+def run_benchmarks(suite='core', sizes=(1000, 10000), repeat=3, workers=None, data_file=None):
+    """Run a suite on synthetic corpora (or on `data_file`) and return result rows
+    
+    Suites map each operation to (best, mean) milliseconds, or to a single
+    number of megabytes for memory figures.
+    """
+    bench = SUITES[suite]
+    rows = []
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if data_file:
+            datasets = [(data_file, len(load_transcripts(data_file)))]
+        else:
+            datasets = [
+                (write_synthetic_dataset(os.path.join(tmp, f'synthetic_{size}.json'), size), size)
+                for size in sizes
+            ]
+        
+        for path, size in datasets:
+            for operation, measured in bench(path, size, repeat, workers).items():
+                row = {
+                    'suite': suite,
+                    'size': size,
+                    'operation': operation,
+                    'best_ms': None,
+                    'mean_ms': None,
+                    'memory_mb': None
+                }
+                if isinstance(measured, tuple):
+                    row['best_ms'] = round(measured[0], 3)
+                    row['mean_ms'] = round(measured[1], 3)
+                else:
+                    row['memory_mb'] = round(measured, 3)
+                rows.append(row)
+    
+    return rows
@@ -0,0 +1,385 @@
+
+import re
+from array import array
+
+
+# Roaring layout: ordinals are split by their high 16 bits into chunks of
+# 65536. A chunk with few members is a sorted array of its low 16 bits; past
+# ARRAY_LIMIT members it becomes a 65536-bit bitmap (held in a Python int,
+# so AND/OR/ANDNOT on it run in C).
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+LOW_MASK = CHUNK_SIZE - 1
+ARRAY_LIMIT = 4096
+
+
+def _popcount(bits):
+    return bin(bits).count('1')
+
+
+def _to_bits(values):
+    data = bytearray(CHUNK_SIZE // 8)
+    for value in values:
+        data[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(data, 'little')
+
+
+def _bit_values(bits):
+    """Set bit positions of an int, ascending"""
+    data = bits.to_bytes(CHUNK_SIZE // 8, 'little')
+    values = []
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index * 8
+            for bit in range(8):
+                if byte >> bit & 1:
+                    values.append(base + bit)
+    return values
+
+
+class _Container:
+    """One 65536-ordinal chunk: sorted array('H') or int bitmap"""
+
+    __slots__ = ('values', 'bits', 'cardinality')
+    
+    def __init__(self, values=None, bits=None):
+        if bits is not None:
+            self.cardinality = _popcount(bits)
+            if self.cardinality <= ARRAY_LIMIT:
+                self.values, self.bits = array('H', _bit_values(bits)), None
+            else:
+                self.values, self.bits = None, bits
+        else:
+            self.cardinality = len(values)
+            if self.cardinality > ARRAY_LIMIT:
+                self.values, self.bits = None, _to_bits(values)
+            else:
+                self.values, self.bits = values, None
+    
+    def as_bits(self):
+        return self.bits if self.bits is not None else _to_bits(self.values)
+    
+    def as_values(self):
+        return self.values if self.values is not None else _bit_values(self.bits)
+    
+    def __and__(self, other):
+        if self.bits is not None and other.bits is not None:
+            return _Container(bits=self.bits & other.bits)
+        if self.bits is None and other.bits is None:
+            small, large = sorted((self.values, other.values), key=len)
+            present = set(large)
+            return _Container(values=array('H', [v for v in small if v in present]))
+        values, bits = (self.values, other.bits) if self.bits is None else (other.values, self.bits)
+        return _Container(values=array('H', [v for v in values if bits >> v & 1]))
+    
+    def __or__(self, other):
+        if self.bits is None and other.bits is None:
+            return _Container(values=array('H', sorted(set(self.values).union(other.values))))
+        return _Container(bits=self.as_bits() | other.as_bits())
+    
+    def __sub__(self, other):
+        if self.bits is None:
+            if other.bits is None:
+                removed = set(other.values)
+                return _Container(values=array('H', [v for v in self.values if v not in removed]))
+            return _Container(values=array('H', [v for v in self.values if not other.bits >> v & 1]))
+        return _Container(bits=self.bits & ~other.as_bits())
+
+
+class RoaringBitmap:
+    """Compressed set of conversation ordinals"""
+
+    def __init__(self, containers=None):
+        # {high 16 bits: _Container}, never holding empty containers
+        self.containers = containers or {}
+    
+    @classmethod
+    def from_sorted(cls, ordinals):
+        """Build from ascending ordinals"""
+        chunks = {}
+        for ordinal in ordinals:
+            high = ordinal >> CHUNK_BITS
+            chunk = chunks.get(high)
+            if chunk is None:
+                chunk = chunks[high] = array('H')
+            chunk.append(ordinal & LOW_MASK)
+        return cls({high: _Container(values=values) for high, values in chunks.items()})
+    
+    @classmethod
+    def full(cls, size):
+        """Every ordinal in range(size)"""
+        containers = {}
+        for high in range((size + LOW_MASK) >> CHUNK_BITS):
+            width = min(CHUNK_SIZE, size - (high << CHUNK_BITS))
+            containers[high] = _Container(bits=(1 << width) - 1)
+        return cls(containers)
+    
+    def __len__(self):
+        return sum(c.cardinality for c in self.containers.values())
+    
+    def __contains__(self, ordinal):
+        container = self.containers.get(ordinal >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = ordinal & LOW_MASK
+        if container.bits is not None:
+            return bool(container.bits >> low & 1)
+        return low in container.values
+    
+    def __iter__(self):
+        for high in sorted(self.containers):
+            base = high << CHUNK_BITS
+            for low in self.containers[high].as_values():
+                yield base + low
+    
+    def _combine(self, other, op, keep_left, keep_right):
+        containers = {}
+        for high in set(self.containers) | set(other.containers):
+            left = self.containers.get(high)
+            right = other.containers.get(high)
+            if left is not None and right is not None:
+                result = op(left, right)
+            elif left is not None and keep_left:
+                result = left
+            elif right is not None and keep_right:
+                result = right
+            else:
+                continue
+            if result.cardinality:
+                containers[high] = result
+        return RoaringBitmap(containers)
+    
+    def __and__(self, other):
+        return self._combine(other, _Container.__and__, False, False)
+    
+    def __or__(self, other):
+        return self._combine(other, _Container.__or__, True, True)
+    
+    def __sub__(self, other):
+        return self._combine(other, _Container.__sub__, True, False)
+    
+    def page(self, offset=0, limit=50):
+        """Ordinals [offset, offset + limit) in ascending order"""
+        if offset < 0 or limit < 0:
+            raise ValueError('offset and limit must not be negative')
+        result = []
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            # Whole chunks before the page are skipped by cardinality alone
+            if offset >= container.cardinality:
+                offset -= container.cardinality
+                continue
+            base = high << CHUNK_BITS
+            values = container.as_values()
+            for low in values[offset:offset + limit - len(result)]:
+                result.append(base + low)
+            offset = 0
+            if len(result) >= limit:
+                break
+        return result
+    
+    def size_in_bytes(self):
+        """Approximate payload size of the containers"""
+        return sum(
+            c.values.itemsize * len(c.values) if c.values is not None else CHUNK_SIZE // 8
+            for c in self.containers.values()
+        )
+
+
+class QuerySyntaxError(ValueError):
+    """A filter expression could not be parsed"""
+
+
+# Parentheses and NOTs one expression may nest; each level is a few stack
+# frames of the parser, so this stays well inside Python's recursion limit
+MAX_QUERY_DEPTH = 50
+
+_SPACE = re.compile(r'\s*')
+# Operators are upper case so values like "Billing and Payments" stay intact
+_OPERATOR = re.compile(r'(AND|OR|NOT)\b')
+_HAS = re.compile(r'has\s*\(', re.IGNORECASE)
+_FIELD = re.compile(r'(\w+)\s*=\s*')
+_BARE_VALUE = re.compile(r'.+?(?=\s+(?:AND|OR)\b|\s*\)|\s*$)')
+
+
+def _post(ordinals, key, ordinal):
+    postings = ordinals.get(key)
+    if postings is None:
+        postings = ordinals[key] = array('I')
+    postings.append(ordinal)
+
+
+def _signal_postings(signal_index, categories):
+    """Bitmaps of ('signal', category) and ('speaker', role, category) keys"""
+    ordinals = {}
+    selected = [(signal_index.bits[category], category) for category in categories]
+    
+    for ordinal, mask in enumerate(signal_index.masks):
+        if mask:
+            for bit, category in selected:
+                if mask & bit:
+                    _post(ordinals, ('signal', category), ordinal)
+    
+    for role, masks in signal_index.speaker_masks.items():
+        for ordinal, mask in enumerate(masks):
+            if mask:
+                for bit, category in selected:
+                    if mask & bit:
+                        _post(ordinals, ('speaker', role, category), ordinal)
+    
+    return {key: RoaringBitmap.from_sorted(values) for key, values in ordinals.items()}
+
+
+class BitmapIndex:
+    """Posting bitmaps for intent, domain and signal membership
+
+    Keys are ('intent', name), ('domain', name), ('signal', category) and
+    ('speaker', role, category), where the last means a turn by `role`
+    matched `category`. Boolean filters over them are answered by `query`.
+    """
+
+    FIELDS = ('intent', 'domain')
+    
+    def __init__(self, transcripts, signal_index):
+        self.size = len(transcripts)
+        self.universe = RoaringBitmap.full(self.size)
+        
+        ordinals = {}
+        for ordinal, conv in enumerate(transcripts):
+            _post(ordinals, ('intent', conv['intent']), ordinal)
+            _post(ordinals, ('domain', conv['domain']), ordinal)
+        
+        self.postings = {key: RoaringBitmap.from_sorted(values) for key, values in ordinals.items()}
+        self.postings.update(_signal_postings(signal_index, signal_index.categories))
+    
+    def updated(self, signal_index, changed):
+        """Index for an updated SignalIndex, rebuilding only `changed` categories"""
+        index = BitmapIndex.__new__(BitmapIndex)
+        index.size = self.size
+        index.universe = self.universe
+        
+        current = set(signal_index.categories) - set(changed)
+        index.postings = {
+            key: bitmap for key, bitmap in self.postings.items()
+            if key[0] not in ('signal', 'speaker') or key[-1] in current
+        }
+        index.postings.update(_signal_postings(signal_index, changed))
+        return index
+    
+    def get(self, *key):
+        return self.postings.get(key, RoaringBitmap())
+    
+    def query(self, expression):
+        """Evaluate e.g. `intent=X AND domain=Y AND NOT has(Legal Threat, customer)`
+
+        Operators (AND, OR, NOT) are upper case. Values with spaces may be bare
+        or quoted; quote values containing ')'.
+        """
+        parser = _QueryParser(expression, self)
+        result = parser.parse_or()
+        parser.skip_space()
+        if parser.pos != len(expression):
+            raise QuerySyntaxError(f'unexpected input at position {parser.pos}: {expression[parser.pos:]!r}')
+        return result
+
+
+class _QueryParser:
+    """Recursive-descent parser that evaluates while it parses"""
+
+    def __init__(self, text, index):
+        self.text = text
+        self.pos = 0
+        self.index = index
+        self.depth = 0
+    
+    def descend(self):
+        self.depth += 1
+        if self.depth > MAX_QUERY_DEPTH:
+            raise QuerySyntaxError(f'expression nested more than {MAX_QUERY_DEPTH} deep '
+                                   f'at position {self.pos}')
+    
+    def skip_space(self):
+        self.pos = _SPACE.match(self.text, self.pos).end()
+    
+    def operator(self, name):
+        self.skip_space()
+        match = _OPERATOR.match(self.text, self.pos)
+        if match and match.group(1) == name:
+            self.pos = match.end()
+            return True
+        return False
+    
+    def parse_or(self):
+        result = self.parse_and()
+        while self.operator('OR'):
+            result = result | self.parse_and()
+        return result
+    
+    def parse_and(self):
+        result = self.parse_not()
+        while self.operator('AND'):
+            result = result & self.parse_not()
+        return result
+    
+    def parse_not(self):
+        if self.operator('NOT'):
+            self.descend()
+            result = self.index.universe - self.parse_not()
+            self.depth -= 1
+            return result
+        return self.parse_atom()
+    
+    def parse_atom(self):
+        self.skip_space()
+        text = self.text
+        
+        if text.startswith('(', self.pos):
+            self.pos += 1
+            self.descend()
+            result = self.parse_or()
+            self.skip_space()
+            if not text.startswith(')', self.pos):
+                raise QuerySyntaxError(f'missing ) at position {self.pos}')
+            self.pos += 1
+            self.depth -= 1
+            return result
+        
+        match = _HAS.match(text, self.pos)
+        if match:
+            end = text.find(')', match.end())
+            if end == -1:
+                raise QuerySyntaxError('missing ) after has(')
+            args = [arg.strip().strip('"\'') for arg in text[match.end():end].split(',')]
+            self.pos = end + 1
+            if len(args) == 1:
+                return self.index.get('signal', args[0])
+            if len(args) == 2:
+                return self.index.get('speaker', args[1].lower(), args[0])
+            raise QuerySyntaxError('has() takes a category and an optional speaker')
+        
+        match = _FIELD.match(text, self.pos)
+        if match:
+            field = match.group(1).lower()
+            if field not in BitmapIndex.FIELDS:
+                raise QuerySyntaxError(f'unknown field {field!r}; use one of {", ".join(BitmapIndex.FIELDS)}')
+            self.pos = match.end()
+            return self.index.get(field, self.parse_value())
+        
+        raise QuerySyntaxError(f'expected a condition at position {self.pos}')
+    
+    def parse_value(self):
+        text = self.text
+        if self.pos < len(text) and text[self.pos] in '"\'':
+            quote = text[self.pos]
+            end = text.find(quote, self.pos + 1)
+            if end == -1:
+                raise QuerySyntaxError('unterminated quoted value')
+            value = text[self.pos + 1:end]
+            self.pos = end + 1
+            return value
+        
+        match = _BARE_VALUE.match(text, self.pos)
+        if not match:
+            raise QuerySyntaxError(f'expected a value at position {self.pos}')
+        self.pos = match.end()
+        return match.group(0).strip()
@@ -0,0 +1,163 @@
+
+from collections import Counter
+
+
+# File signatures: Parquet files start with PAR1, Arrow IPC (Feather v2) files with ARROW1
+PARQUET_MAGIC = b'PAR1'
+ARROW_MAGIC = b'ARROW1'
+
+# Rows decoded at a time when streaming a columnar file
+COLUMNAR_BATCH_SIZE = 1000
+
+# Transcript columns; conversation is list<struct<speaker, text>>. domain and
+# reason_for_call may be missing from files made elsewhere
+TRANSCRIPT_COLUMNS = ['transcript_id', 'intent', 'domain', 'reason_for_call', 'conversation']
+OPTIONAL_COLUMNS = ['domain', 'reason_for_call']
+
+
+def _pyarrow():
+    """Import pyarrow on first use, so nothing else pays for it"""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Parquet and Arrow files need pyarrow: pip install pyarrow') from None
+    return pyarrow
+
+
+def _magic(path):
+    with open(path, 'rb') as f:
+        return f.read(len(ARROW_MAGIC))
+
+
+def is_columnar(path):
+    """True if `path` is a Parquet or Arrow IPC file (checked without pyarrow)"""
+    magic = _magic(path)
+    return magic[:len(PARQUET_MAGIC)] == PARQUET_MAGIC or magic == ARROW_MAGIC
+
+
+def _is_parquet(path):
+    return _magic(path)[:len(PARQUET_MAGIC)] == PARQUET_MAGIC
+
+
+def _columns(path, wanted):
+    """The `wanted` columns the file actually has (required ones must be there)"""
+    pa = _pyarrow()
+    if _is_parquet(path):
+        schema = pa.parquet.read_schema(path)
+    else:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+    present = [name for name in wanted if name in schema.names]
+    missing = set(wanted) - set(present) - set(OPTIONAL_COLUMNS)
+    if missing:
+        raise ValueError(f"{path} has no column {', '.join(sorted(missing))}")
+    return present
+
+
+def _read_table(path, columns, intent=None):
+    """Only `columns` are decoded; with `intent`, only that outcome's rows are kept"""
+    pa = _pyarrow()
+    if _is_parquet(path):
+        # Row groups whose intent statistics exclude the outcome are skipped
+        filters = [('intent', '=', intent)] if intent is not None else None
+        return pa.parquet.read_table(path, columns=columns, filters=filters)
+    
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all().select(columns)
+    if intent is not None:
+        table = table.filter(pa.compute.equal(table['intent'], intent))
+    return table
+
+
+def _rows(table):
+    rows = table.to_pylist()
+    for name in OPTIONAL_COLUMNS:
+        if name not in table.column_names:
+            for row in rows:
+                row[name] = None
+    return rows
+
+
+def read_outcome_counts(path):
+    """Conversations per outcome, reading nothing but the intent column"""
+    return Counter(_read_table(path, ['intent']).column('intent').to_pylist())
+
+
+def read_row_count(path):
+    """Number of transcripts, from file metadata only"""
+    pa = _pyarrow()
+    if _is_parquet(path):
+        return pa.parquet.ParquetFile(path).metadata.num_rows
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def load_columnar(path, intent=None):
+    """Transcripts from a Parquet/Arrow file, optionally of one outcome only"""
+    return _rows(_read_table(path, _columns(path, TRANSCRIPT_COLUMNS), intent))
+
+
+def iter_columnar(path, batch_size=COLUMNAR_BATCH_SIZE):
+    """(ordinal, transcript) pairs, decoding one batch of rows at a time"""
+    pa = _pyarrow()
+    columns = _columns(path, TRANSCRIPT_COLUMNS)
+    ordinal = 0
+    
+    if _is_parquet(path):
+        batches = pa.parquet.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns)
+        for batch in batches:
+            for conv in _rows(batch):
+                yield ordinal, conv
+                ordinal += 1
+        return
+    
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i).select(columns)
+            for start in range(0, batch.num_rows, batch_size):
+                for conv in _rows(batch.slice(start, batch_size)):
+                    yield ordinal, conv
+                    ordinal += 1
+
+
+def transcript_schema():
+    """Arrow schema of the transcript layout written by write_transcripts"""
+    pa = _pyarrow()
+    turn = pa.struct([('speaker', pa.string()), ('text', pa.string())])
+    return pa.schema([
+        ('transcript_id', pa.string()),
+        ('intent', pa.string()),
+        ('domain', pa.string()),
+        ('reason_for_call', pa.string()),
+        ('conversation', pa.list_(turn))
+    ])
+
+
+def write_transcripts(transcripts, path):
+    """Write transcripts to Parquet, one column per field, dictionary-encoded"""
+    pa = _pyarrow()
+    rows = [
+        {
+            'transcript_id': conv['transcript_id'],
+            'intent': conv['intent'],
+            'domain': conv.get('domain'),
+            'reason_for_call': conv.get('reason_for_call'),
+            'conversation': [
+                {'speaker': turn['speaker'], 'text': turn['text']} for turn in conv['conversation']
+            ]
+        }
+        for conv in transcripts
+    ]
+    table = pa.Table.from_pylist(rows, schema=transcript_schema())
+    pa.parquet.write_table(table, path, compression='zstd')
+
+
+def write_rows(rows, path):
+    """Write flat result rows (the same rows CSV output gets) to Parquet"""
+    pa = _pyarrow()
+    pa.parquet.write_table(pa.Table.from_pylist(rows), path, compression='zstd')
@@ -0,0 +1,697 @@
+
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from bitmap_index import BitmapIndex
+from columnar import is_columnar, iter_columnar, load_columnar
+from corpus_index import CorpusIndex, SignalIndex
+from defaults import DEFAULT_DATA_FILE
+from footprint import process_rss, structure_sizes
+from lexicon import changed_categories, load_lexicon, validate_lexicon
+from phrase_miner import PhraseMiner
+from significance import lift_table
+from similarity import MinHashIndex, deduplicate
+from snapshot import is_snapshot, iter_snapshot, load_snapshot
+from structure_index import DEFAULT_PERCENTILES, HISTOGRAM_BINS, StructureIndex, distribution
+
+
+# Conversations a quick (not full) analysis scans, from the start of the outcome
+QUICK_ANALYSIS_SIZE = 30
+
+# Conversations scanned between two progress events of a streamed analysis
+STREAM_CHUNK_SIZE = 250
+
+# Characters read at a time when streaming a dataset file
+READ_CHUNK_SIZE = 1 << 20
+
+# Start of the transcript array in a dataset file
+TRANSCRIPTS_ARRAY = re.compile(r'"transcripts"\s*:\s*\[')
+
+
+def load_transcripts(data_file):
+    """Load the transcript list from a dataset file, snapshot or Parquet/Arrow file"""
+    if is_snapshot(data_file):
+        return load_snapshot(data_file)
+    if is_columnar(data_file):
+        return load_columnar(data_file)
+    
+    with open(data_file, 'r') as f:
+        data = json.load(f)
+    return data['transcripts']
+
+
+def top_outcomes(outcome_counts, limit=15):
+    """Most common outcomes with counts and share of all conversations"""
+    total = sum(outcome_counts.values())
+    return [
+        {
+            'name': outcome,
+            'count': count,
+            'percent': round(count / total * 100, 1)
+        }
+        for outcome, count in outcome_counts.most_common(limit)
+    ]
+
+
+def search_counts(outcome_counts, query, limit=10):
+    """Outcomes whose name contains `query`, most common first"""
+    query = query.lower()
+    matches = [
+        {'name': outcome, 'count': count}
+        for outcome, count in outcome_counts.items()
+        if query in outcome.lower()
+    ]
+    return sorted(matches, key=lambda x: -x['count'])[:limit]
+
+
+def iter_transcripts(data_file, chunk_size=READ_CHUNK_SIZE):
+    """(ordinal, transcript) pairs without holding the whole dataset in memory
+    
+    JSON datasets are decoded one transcript at a time from a sliding buffer;
+    snapshots are read one outcome frame at a time, Parquet/Arrow files one
+    record batch at a time.
+    """
+    if is_snapshot(data_file):
+        yield from iter_snapshot(data_file)
+        return
+    if is_columnar(data_file):
+        yield from iter_columnar(data_file)
+        return
+    
+    decoder = json.JSONDecoder()
+    with open(data_file, 'r') as f:
+        buffer = ''
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            match = TRANSCRIPTS_ARRAY.search(buffer)
+            if match:
+                break
+            if not chunk:
+                raise ValueError(f'no "transcripts" array in {data_file}')
+            # Keep a tail in case the key straddles two chunks
+            buffer = buffer[-64:]
+        
+        pos = match.end()
+        ordinal = 0
+        eof = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError('need more data', buffer, pos)
+                conv, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # An object cut off at the end of the buffer: read on
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield ordinal, conv
+            ordinal += 1
+
+
+def transcript_page(conv, offset=0, limit=None):
+    """A transcript with turns [offset, offset + limit) (all turns if no limit)
+    
+    Raises ValueError for a negative offset or limit.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError('offset and limit must not be negative')
+    turns = conv['conversation']
+    end = len(turns) if limit is None else offset + limit
+    return {
+        'transcript_id': conv['transcript_id'],
+        'intent': conv['intent'],
+        'domain': conv['domain'],
+        'reason_for_call': conv.get('reason_for_call'),
+        'turn_count': len(turns),
+        'offset': offset,
+        'turns': turns[offset:end]
+    }
+
+
+class ConversationAnalyzer:
+    """Simple analyzer with all the smarts"""
+    
+    def __init__(self, data_file, dedup=None, lexicon=None, progress=None):
+        self._organize(load_transcripts(data_file), dedup, lexicon, progress)
+    
+    @classmethod
+    def from_transcripts(cls, transcripts, dedup=None, lexicon=None, progress=None):
+        """Build an analyzer from already-loaded transcripts"""
+        analyzer = cls.__new__(cls)
+        analyzer._organize(transcripts, dedup, lexicon, progress)
+        return analyzer
+    
+    def _organize(self, transcripts, dedup=None, lexicon=None, progress=None):
+        """Tokenize every turn once, drop near-duplicates if asked, group by outcome
+        
+        With `dedup` (a Jaccard similarity such as 0.9), a transcript that
+        near-duplicates an earlier one is left out before anything is counted.
+        `lexicon` defaults to the shared lexicon file. `progress`, if given,
+        is called with the name of each loading stage as it starts.
+        """
+        if progress is None:
+            progress = lambda stage: None
+        
+        self.lexicon = validate_lexicon(lexicon) if lexicon is not None else load_lexicon()
+        progress('tokenizing')
+        self.index = CorpusIndex(transcripts)
+        self.duplicates = {}
+        self._minhash = None
+        self._signatures = None
+        
+        if dedup is not None:
+            progress('deduplicating')
+            kept, dropped, minhash = deduplicate(self.index, dedup)
+            self.duplicates = {
+                transcripts[ordinal]['transcript_id']: transcripts[original]['transcript_id']
+                for ordinal, original in dropped.items()
+            }
+            self.index.keep(kept)
+            transcripts = [transcripts[ordinal] for ordinal in kept]
+            self._signatures = minhash.signatures
+        
+        self.conversations = transcripts
+        self.by_outcome = defaultdict(list)
+        self.ordinals_by_outcome = defaultdict(list)
+        self.ordinal_by_id = {}
+        
+        for ordinal, conv in enumerate(self.conversations):
+            self.by_outcome[conv['intent']].append(conv)
+            self.ordinals_by_outcome[conv['intent']].append(ordinal)
+            self.ordinal_by_id[conv['transcript_id']] = ordinal
+        self.outcome_counts = Counter({outcome: len(convs) for outcome, convs in self.by_outcome.items()})
+        
+        progress('indexing')
+        self.matcher = self.index.compile(self.lexicon['categories'])
+        self.signal_index = SignalIndex(self.index, self.matcher, self.ordinals_by_outcome,
+                                        self.conversations)
+        self.bitmaps = BitmapIndex(self.conversations, self.signal_index)
+        self.structure = StructureIndex(self.conversations)
+        self._phrases = None
+        # {(outcome, speaker): (signal index it was computed with, full analysis)}
+        self._analyses = {}
+        self._lazy_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+    
+    def reload_lexicon(self, lexicon=None):
+        """Switch to an edited lexicon, re-indexing only the categories that changed
+        
+        The new indexes are built aside and swapped in, so requests being
+        served keep a consistent view. Returns what changed.
+        """
+        lexicon = validate_lexicon(lexicon) if lexicon is not None else load_lexicon()
+        
+        with self._reload_lock:
+            changed = changed_categories(self.lexicon, lexicon)
+            removed = set(self.lexicon['categories']) - set(lexicon['categories'])
+            
+            matcher = self.index.compile(lexicon['categories'])
+            signal_index = self.signal_index.updated(matcher, changed)
+            bitmaps = self.bitmaps.updated(signal_index, changed)
+            
+            self.matcher, self.signal_index, self.bitmaps = matcher, signal_index, bitmaps
+            self.lexicon = lexicon
+            self._analyses = {}
+        
+        return {
+            'version': lexicon['version'],
+            'changed': sorted(changed),
+            'removed': sorted(removed)
+        }
+    
+    def get_all_outcomes(self):
+        """Get list of all outcomes"""
+        return top_outcomes(self.outcome_counts)
+    
+    def warm(self, limit=5):
+        """Precompute full analyses and lift of the `limit` most common outcomes"""
+        warmed = []
+        for outcome in self.get_all_outcomes()[:limit]:
+            for _ in self.analyze_stream(outcome['name']):
+                pass
+            self.signal_lift(outcome['name'])
+            warmed.append(outcome['name'])
+        return warmed
+    
+    def analyze(self, outcome_name, shuffle=None, speaker=None, full=False, deadline=None,
+                cancel=None):
+        """Analyze a specific outcome
+        
+        Examples are a uniform sample of matching turns across the whole
+        outcome; pass a `shuffle` seed to draw a different sample. With
+        `speaker` ('customer', 'agent'), only that role's turns count. `full`
+        scans every conversation instead of the first QUICK_ANALYSIS_SIZE, as
+        `analyze_stream` does, and returns its last result.
+        """
+        if full:
+            result = None
+            for _, result in self.analyze_stream(outcome_name, shuffle=shuffle, speaker=speaker,
+                                                 deadline=deadline, cancel=cancel):
+                pass
+            return result
+        
+        ordinals = self.ordinals_by_outcome.get(outcome_name, [])
+        if not ordinals:
+            return None
+        
+        signals = defaultdict(int)
+        
+        sample = ordinals[:QUICK_ANALYSIS_SIZE]
+        self._scan(sample, signals, speaker)
+        
+        return self._build_result(outcome_name, len(ordinals), len(sample), signals, shuffle, speaker)
+    
+    def analyze_stream(self, outcome_name, chunk_size=STREAM_CHUNK_SIZE, cancel=None, shuffle=None,
+                       speaker=None, deadline=None):
+        """Analyze every conversation of an outcome, yielding progress as chunks finish
+        
+        Yields ('progress', partial_result) after each chunk and ('result', result)
+        once the whole population is scanned. Stops early when `cancel` (anything
+        with `is_set()`) is set. Past `deadline` (a time.monotonic() value) the
+        scan stops and the result so far is yielded with 'partial': True.
+        Finished analyses with the default examples are cached until the
+        lexicon changes, so repeats yield the result straight away.
+        """
+        ordinals = self.ordinals_by_outcome.get(outcome_name, [])
+        if not ordinals:
+            yield 'result', None
+            return
+        
+        signal_index = self.signal_index
+        key = (outcome_name, speaker)
+        cacheable = shuffle is None and (speaker is None or speaker in signal_index.speaker_histograms)
+        cached = self._analyses.get(key) if cacheable else None
+        if cached is not None and cached[0] is signal_index:
+            yield 'result', cached[1]
+            return
+        
+        signals = defaultdict(int)
+        
+        for start in range(0, len(ordinals), chunk_size):
+            if cancel is not None and cancel.is_set():
+                return
+            
+            self._scan(ordinals[start:start + chunk_size], signals, speaker)
+            scanned = min(start + chunk_size, len(ordinals))
+            
+            if scanned < len(ordinals) and deadline is not None and time.monotonic() >= deadline:
+                partial = self._build_result(outcome_name, len(ordinals), scanned, signals, shuffle,
+                                             speaker)
+                partial['scanned'] = scanned
+                partial['partial'] = True
+                yield 'result', partial
+                return
+            
+            if scanned < len(ordinals):
+                partial = self._build_result(outcome_name, len(ordinals), scanned, signals, shuffle,
+                                             speaker)
+                partial['scanned'] = scanned
+                yield 'progress', partial
+        
+        result = self._build_result(outcome_name, len(ordinals), len(ordinals), signals, shuffle,
+                                    speaker)
+        result['scanned'] = len(ordinals)
+        result['partial'] = False
+        if cacheable:
+            self._analyses[key] = (signal_index, result)
+        yield 'result', result
+    
+    def _scan(self, ordinals, signals, speaker=None):
+        """Count turns with keyword hits, optionally only one speaker's"""
+        matcher = self.matcher
+        for ordinal in ordinals:
+            turns = self.conversations[ordinal]['conversation']
+            for t, tokens in enumerate(self.index.turns(ordinal)):
+                if speaker is not None and turns[t]['speaker'].lower() != speaker:
+                    continue
+                for category in matcher.categories:
+                    if matcher.matches(category, tokens):
+                        signals[category] += 1
+    
+    def _build_result(self, outcome_name, total_cases, scanned, signals, shuffle=None, speaker=None):
+        """Shape signal counts into the API result"""
+        return {
+            'outcome': outcome_name,
+            'speaker': speaker,
+            'total_cases': total_cases,
+            'signals': {
+                cat: {
+                    'count': count,
+                    'percent': round(count / scanned * 100, 1)
+                }
+                for cat, count in signals.items()
+            },
+            'examples': {
+                cat: self.examples(outcome_name, cat, seed=shuffle, speaker=speaker) for cat in signals
+            }
+        }
+    
+    def examples(self, outcome_name, category, k=3, seed=None, speaker=None):
+        """Up to k matching turns, sampled uniformly from the whole outcome
+        
+        Drawn from reservoirs filled at load time, so reshuffling with a
+        different `seed` never rescans. At most EXAMPLE_RESERVOIR_SIZE turns.
+        """
+        return [
+            self._example(ordinal, t)
+            for ordinal, t in self.signal_index.examples(outcome_name, category, k, seed, speaker)
+        ]
+    
+    def _example(self, ordinal, t):
+        conv = self.conversations[ordinal]
+        turn = conv['conversation'][t]
+        return {
+            'transcript_id': conv['transcript_id'],
+            'speaker': turn['speaker'],
+            'text': turn['text']
+        }
+    
+    def partial_analysis(self, outcome_name, limit=None, speaker=None, deadline=None, cancel=None,
+                         shuffle=None):
+        """Mergeable analysis of the data held here, for a sharding coordinator
+        
+        Signal counts over the first `limit` conversations of the outcome
+        (every one when None, through the cached full analysis), plus each
+        category's whole example reservoir with its sampling priorities.
+        Signals are [category, count] pairs in first-hit order. None if the
+        outcome has no conversations here or the scan was cancelled. A
+        `shuffle` seed skips the cache, as it does for `analyze`.
+        """
+        ordinals = self.ordinals_by_outcome.get(outcome_name, [])
+        if not ordinals:
+            return None
+        
+        if limit is None:
+            result = self.analyze(outcome_name, shuffle=shuffle, speaker=speaker, full=True,
+                                  deadline=deadline, cancel=cancel)
+            if result is None:
+                return None
+            signals = {category: data['count'] for category, data in result['signals'].items()}
+            scanned, partial = result['scanned'], result['partial']
+        else:
+            signals = defaultdict(int)
+            sample = ordinals[:limit]
+            self._scan(sample, signals, speaker)
+            scanned, partial = len(sample), False
+        
+        reservoirs = {}
+        for category in self.signal_index.categories:
+            reservoir = self.signal_index.reservoirs.get((outcome_name, category, speaker))
+            if reservoir is not None:
+                reservoirs[category] = [
+                    [priority, self._example(ordinal, t)]
+                    for priority, (ordinal, t) in reservoir.entries()
+                ]
+        
+        return {
+            'outcome': outcome_name,
+            'speaker': speaker,
+            'total_cases': len(ordinals),
+            'scanned': scanned,
+            'partial': partial,
+            'signals': list(signals.items()),
+            'reservoirs': reservoirs
+        }
+    
+    def signal_breakdown(self, outcome_name=None, require=(), exclude=(), speaker=None):
+        """Conversation-level signal rates, co-occurrence and an optional filter
+        
+        Unlike `analyze`, each conversation counts once per category however
+        many of its turns match. `require`/`exclude` select conversations with
+        all of the first categories and none of the second. Corpus-wide when
+        `outcome_name` is None. With `speaker`, only that role's turns count;
+        `by_speaker` always has the rates split per role. Raises KeyError for
+        an unknown category.
+        """
+        index = self.signal_index
+        if outcome_name is not None and outcome_name not in index.histograms:
+            return None
+        
+        def pick(tallies):
+            histograms, corpus = tallies
+            return corpus if outcome_name is None else histograms[outcome_name]
+        
+        histogram = pick(index.tallies(speaker))
+        total = sum(histogram.values())
+        
+        def rate(n):
+            return round(n / total * 100, 1) if total else 0.0
+        
+        result = {
+            'outcome': outcome_name,
+            'speaker': speaker,
+            'conversations': total,
+            'rates': {},
+            'by_speaker': {},
+            'categories': index.categories,
+            'cooccurrence': index.cooccurrence(histogram)
+        }
+        for category in index.categories:
+            n = index.count(histogram, require=index.bits[category])
+            result['rates'][category] = {'conversations': n, 'percent': rate(n)}
+        
+        # Per-role rates and matching turn counts, from the same index pass
+        outcomes = index.histograms if outcome_name is None else [outcome_name]
+        for role in sorted(index.speaker_histograms):
+            role_histogram = pick(index.tallies(role))
+            turns = Counter()
+            for outcome in outcomes:
+                turns.update(index.turn_hits.get((outcome, role), {}))
+            rates = result['by_speaker'][role] = {}
+            for category in index.categories:
+                n = index.count(role_histogram, require=index.bits[category])
+                rates[category] = {'conversations': n, 'percent': rate(n), 'turns': turns[category]}
+        
+        if require or exclude:
+            n = index.count(histogram, index.mask_of(require), index.mask_of(exclude))
+            result['filter'] = {
+                'require': list(require),
+                'exclude': list(exclude),
+                'conversations': n,
+                'percent': rate(n)
+            }
+        
+        return result
+    
+    def signal_lift(self, outcome_name=None, alpha=0.05, speaker=None):
+        """Ranked "why this happens" table: category rates against the corpus
+        
+        Rows for one outcome (or every outcome × category when None), the
+        significant over-represented signals first, by lift. A row is
+        significant when its false-discovery-adjusted q-value is below `alpha`.
+        With `speaker`, only that role's turns count.
+        """
+        if outcome_name is not None and outcome_name not in self.signal_index.histograms:
+            return None
+        
+        rows = []
+        for row in lift_table(self.signal_index, speaker):
+            if outcome_name is not None and row['outcome'] != outcome_name:
+                continue
+            lift = row['lift']
+            rows.append({
+                'outcome': row['outcome'],
+                'category': row['category'],
+                'conversations': row['conversations'],
+                'hits': row['hits'],
+                'percent': round(row['rate'] * 100, 1),
+                'ci_low': round(row['rate_low'] * 100, 1),
+                'ci_high': round(row['rate_high'] * 100, 1),
+                'baseline_percent': round(row['baseline'] * 100, 1),
+                'lift': round(lift, 2) if lift is not None else None,
+                'p_value': float(f"{row['p_value']:.3g}"),
+                'q_value': float(f"{row['q_value']:.3g}"),
+                'significant': row['q_value'] < alpha
+            })
+        
+        rows.sort(key=lambda r: (
+            not (r['significant'] and (r['lift'] or 0) > 1), -(r['lift'] or 0), r['outcome']
+        ))
+        return rows
+    
+    def structure_features(self):
+        """Names of the conversation features structure_stats can describe"""
+        return self.structure.features(self.signal_index)
+    
+    def structure_stats(self, outcome_name=None, feature='turns', bins=HISTOGRAM_BINS,
+                        percentiles=DEFAULT_PERCENTILES):
+        """Distribution of one conversation feature: mean, percentiles and a histogram
+        
+        `turns` and `chars` measure whole conversations, `turns:ROLE` and
+        `chars:ROLE` one speaker role's part. `first:CATEGORY` is the turn
+        (from 0) where the category first matches, and conversations where it
+        never matches are left out. Corpus-wide when `outcome_name` is None.
+        Raises KeyError for an unknown feature.
+        """
+        if outcome_name is not None and outcome_name not in self.ordinals_by_outcome:
+            return None
+        
+        ordinals = None if outcome_name is None else self.ordinals_by_outcome[outcome_name]
+        values = self.structure.values(feature, self.signal_index, ordinals, key=outcome_name)
+        return {
+            'outcome': outcome_name,
+            'feature': feature,
+            'conversations': len(self.conversations) if ordinals is None else len(ordinals),
+            'measured': len(values),
+            **distribution(values, bins, percentiles)
+        }
+    
+    def phrase_miner(self, deadline=None, **options):
+        """Per-outcome phrase summaries, mined on first use
+        
+        Mining touches every n-gram of the corpus, so it is deferred until a
+        phrase query needs it (the server mines in the background once ready).
+        Options (counters, epsilon, ...) force a rebuild. Raises TimeoutError
+        if waiting for another build or mining runs past `deadline`.
+        """
+        if self._phrases is not None and not options:
+            return self._phrases
+        timeout = -1 if deadline is None else max(deadline - time.monotonic(), 0)
+        if not self._lazy_lock.acquire(timeout=timeout):
+            raise TimeoutError('phrases are still being counted')
+        try:
+            if self._phrases is None or options:
+                self._phrases = PhraseMiner.from_index(self.index, self.conversations,
+                                                       deadline=deadline, **options)
+            return self._phrases
+        finally:
+            self._lazy_lock.release()
+    
+    def discriminative_phrases(self, outcome_name, limit=20, min_count=5, deadline=None):
+        """Phrases far more common in this outcome than in the rest of the data
+        
+        Raises TimeoutError if the phrases can't be mined by `deadline`.
+        """
+        if outcome_name not in self.by_outcome:
+            return None
+        
+        miner = self.phrase_miner(deadline)
+        return {
+            'outcome': outcome_name,
+            'conversations': miner.conversations[outcome_name],
+            'phrases': miner.discriminative(outcome_name, limit, min_count),
+            'error_bounds': miner.error_bounds(outcome_name),
+            'memory_bytes': miner.memory_estimate()
+        }
+    
+    def similarity_index(self):
+        """MinHash/LSH index of every conversation, built on first use
+        
+        Reuses the signatures of a dedup pass when there was one.
+        """
+        with self._lazy_lock:
+            if self._minhash is None:
+                if self._signatures is not None:
+                    self._minhash = MinHashIndex.from_signatures(self._signatures)
+                else:
+                    self._minhash = MinHashIndex.from_index(self.index)
+            return self._minhash
+    
+    def similar_conversations(self, transcript_id, limit=10, threshold=0.5):
+        """Conversations whose wording overlaps most with one transcript"""
+        ordinal = self.ordinal_by_id.get(transcript_id)
+        if ordinal is None:
+            return None
+        
+        conv = self.conversations[ordinal]
+        similar = []
+        for match, score in self.similarity_index().similar(ordinal, limit, threshold):
+            other = self.conversations[match]
+            similar.append({
+                'transcript_id': other['transcript_id'],
+                'intent': other['intent'],
+                'domain': other['domain'],
+                'similarity': round(score, 3)
+            })
+        
+        return {
+            'transcript_id': transcript_id,
+            'intent': conv['intent'],
+            'similar': similar
+        }
+    
+    def memory_usage(self, deadline=None):
+        """Memory held by each structure, for capacity planning
+        
+        Deep sizes with every object counted once: the transcripts first,
+        then what each index and cache adds on top of what came before. Walks
+        every object, so it takes a couple of seconds per 10,000 transcripts.
+        Past `deadline` the walk stops and what was measured is returned with
+        'partial': True.
+        """
+        sizes = structure_sizes([
+            ('conversations', self.conversations),
+            ('by_outcome', self.by_outcome),
+            ('ordinals_by_outcome', self.ordinals_by_outcome),
+            ('ordinal_by_id', self.ordinal_by_id),
+            ('outcome_counts', self.outcome_counts),
+            ('duplicates', self.duplicates),
+            ('lexicon', self.lexicon),
+            ('token_index', self.index),
+            ('signal_index', self.signal_index),
+            ('bitmap_index', self.bitmaps),
+            ('structure_index', self.structure),
+            ('analysis_cache', self._analyses),
+            ('phrase_miner', self._phrases),
+            ('similarity_index', (self._minhash, self._signatures))
+        ], deadline)
+        
+        transcripts = len(self.conversations)
+        total = sum(size for _, size, _ in sizes)
+        return {
+            'transcripts': transcripts,
+            'rss_mb': round(process_rss() / 2**20, 1),
+            'total_mb': round(total / 2**20, 1),
+            'bytes_per_transcript': round(total / transcripts) if transcripts else 0,
+            'structures': [
+                {
+                    'structure': name,
+                    'mb': round(size / 2**20, 2),
+                    'bytes_per_transcript': round(size / transcripts) if transcripts else 0,
+                    'objects': objects
+                }
+                for name, size, objects in sizes
+            ],
+            'partial': deadline is not None and time.monotonic() >= deadline
+        }
+    
+    def get_transcript(self, transcript_id, offset=0, limit=None):
+        """One transcript by id, optionally a page of its turns (constant-time lookup)"""
+        ordinal = self.ordinal_by_id.get(transcript_id)
+        if ordinal is None:
+            return None
+        return transcript_page(self.conversations[ordinal], offset, limit)
+    
+    def query(self, expression, offset=0, limit=50):
+        """Conversations matching a boolean filter, with a page of their ids
+        
+        Raises bitmap_index.QuerySyntaxError for malformed expressions.
+        """
+        matches = self.bitmaps.query(expression)
+        return {
+            'query': expression,
+            'count': len(matches),
+            'offset': offset,
+            'limit': limit,
+            'ids': [
+                self.conversations[ordinal]['transcript_id']
+                for ordinal in matches.page(offset, limit)
+            ]
+        }
+    
+    def search_outcomes(self, query):
+        """Search for outcomes matching query"""
+        return search_counts(self.outcome_counts, query)
@@ -0,0 +1,358 @@
+
+import string
+import zlib
+from array import array
+from collections import Counter
+
+from sketches import Reservoir, mix64
+
+
+# Token ids are stored as the code points of a str: CPython keeps that as a
+# compact 1/2/4-byte integer array, and `in` on it is a fast C sequence search
+# that can only match on whole-token boundaries.
+MAX_VOCABULARY = 0x110000
+
+# Punctuation becomes a word break and typographic apostrophes become "'".
+# Done with str.translate + split, which is several times faster than a regex.
+# Whitespace other than ' ' becomes ' ' too, so an apostrophe after a newline
+# or tab is dropped like one after a space.
+WORD_BREAKS = str.maketrans(dict(
+    [(ch, ' ') for ch in string.punctuation if ch != "'"]
+    + [(ch, ' ') for ch in '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\u1680\u2028\u2029\u202f\u205f\u3000']
+    + [(chr(code), ' ') for code in range(0x2000, 0x200b)]
+    + [(ch, ' ') for ch in '\u00a0\u00ab\u00bb\u2013\u2014\u2022\u2026\u201c\u201d\u201e']
+    + [('\u2018', "'"), ('\u2019', "'")]
+))
+
+# Placed between turns so a whole conversation is tokenized in one pass. NUL
+# never appears in transcripts, is not whitespace to str.split, and being ASCII
+# keeps str.translate on its fast path for plain-ASCII text. Always id 0.
+TURN_BREAK = '\x00'
+
+
+# Matching turns kept per (outcome, category) to draw evidence examples from
+EXAMPLE_RESERVOIR_SIZE = 20
+
+
+def tokenize(text):
+    """Case-fold and split text into words (apostrophes kept inside words)"""
+    text = ' ' + text.casefold().translate(WORD_BREAKS) + ' '
+    return text.replace(" '", ' ').replace("' ", ' ').split()
+
+
+class Vocabulary:
+    """Interned words: every distinct word gets one small integer id"""
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+        self._codes = {}
+        self.intern(TURN_BREAK)
+    
+    def __len__(self):
+        return len(self.words)
+    
+    def intern(self, word):
+        """Id of `word`, adding it if new"""
+        word_id = self.ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            if word_id >= MAX_VOCABULARY:
+                raise OverflowError('vocabulary is full')
+            self.ids[word] = word_id
+            self._codes[word] = chr(word_id)
+            self.words.append(word)
+        return word_id
+    
+    def _encode_words(self, words, add):
+        codes = self._codes
+        try:
+            return ''.join(map(codes.__getitem__, words))
+        except KeyError:
+            if add:
+                return ''.join([codes.get(word) or chr(self.intern(word)) for word in words])
+            return ''.join([codes[word] for word in words if word in codes])
+    
+    def encode(self, text, add=True):
+        """Token-id sequence for `text`; unknown words are skipped unless `add`"""
+        return self._encode_words(tokenize(text), add)
+    
+    def encode_turns(self, texts, add=True):
+        """Token-id sequence of each text, tokenized in a single pass"""
+        if not texts:
+            return []
+        words = tokenize(f' {TURN_BREAK} '.join(texts))
+        return self._encode_words(words, add).split(chr(self.ids[TURN_BREAK]))
+    
+    def decode(self, tokens):
+        """Words of a token-id sequence"""
+        return [self.words[ord(code)] for code in tokens]
+
+
+class KeywordMatcher:
+    """Keyword lists compiled to token-id sequences, matched on whole words"""
+
+    def __init__(self, vocab, keywords):
+        self.categories = list(keywords)
+        self.phrases = {}
+        self.sequences = {}
+        
+        for category, words in keywords.items():
+            phrases = [(word, vocab.encode(word)) for word in words]
+            self.phrases[category] = [(word, ids) for word, ids in phrases if ids]
+            self.sequences[category] = tuple(ids for _, ids in self.phrases[category])
+    
+    def matches(self, category, tokens):
+        """True if any keyword of `category` occurs in `tokens`"""
+        for ids in self.sequences[category]:
+            if ids in tokens:
+                return True
+        return False
+    
+    def matched_words(self, category, tokens):
+        """Every keyword of `category` that occurs in `tokens`"""
+        return [word for word, ids in self.phrases[category] if ids in tokens]
+
+
+class CorpusIndex:
+    """Load-time pipeline stage: every turn case-folded and tokenized once
+
+    `turn_tokens[i][t]` is the token-id sequence of turn t of conversation i.
+    """
+
+    def __init__(self, transcripts, vocab=None):
+        self.vocab = vocab or Vocabulary()
+        self.turn_tokens = []
+        
+        for conv in transcripts:
+            self.add(conv)
+    
+    def __len__(self):
+        return len(self.turn_tokens)
+    
+    def add(self, conv):
+        """Tokenize one transcript; returns its ordinal"""
+        texts = [turn['text'] for turn in conv['conversation']]
+        self.turn_tokens.append(tuple(self.vocab.encode_turns(texts)))
+        return len(self.turn_tokens) - 1
+    
+    def turns(self, ordinal):
+        """Token-id sequence of every turn of a conversation"""
+        return self.turn_tokens[ordinal]
+    
+    def keep(self, ordinals):
+        """Keep only these conversations, renumbered in the given order"""
+        self.turn_tokens = [self.turn_tokens[ordinal] for ordinal in ordinals]
+    
+    def compile(self, keywords):
+        """Compile {category: [keyword, ...]} against this vocabulary"""
+        return KeywordMatcher(self.vocab, keywords)
+
+
+class SignalIndex:
+    """Per-conversation bitset of the signal categories it contains
+    
+    Bit i of `masks[ordinal]` is set when any turn matches category i, and of
+    `speaker_masks[role][ordinal]` when a turn by that speaker does. The same
+    pass counts matching turns per (outcome, role) and fills seeded
+    reservoirs of matching turns per (outcome, category) and per (outcome,
+    category, role), giving unbiased evidence examples in O(1) memory per
+    bucket. It also records the turn where each category first matches, in
+    `first_hits[category][ordinal]` (-1 if never). Masks are also tallied
+    per outcome, overall and per role, so rates, "A and B but not C" filters
+    and co-occurrence work on at most 2**categories distinct masks instead
+    of on conversations.
+    """
+    
+    def __init__(self, corpus_index, matcher, ordinals_by_outcome, transcripts,
+                 reservoir_size=EXAMPLE_RESERVOIR_SIZE, seed=0):
+        self._setup(corpus_index, matcher, ordinals_by_outcome, transcripts, reservoir_size, seed)
+        self.masks = array('Q', bytes(8 * len(corpus_index)))
+        # {speaker role: masks of the categories that role's turns matched}
+        self.speaker_masks = {}
+        # {(outcome, category, role or None): Reservoir of (ordinal, turn index)}
+        self.reservoirs = {}
+        # {(outcome, role): Counter of matching turns per category}
+        self.turn_hits = {}
+        # {category: index of the first matching turn per conversation, -1 if none}
+        self.first_hits = {}
+        
+        self._scan(self.categories)
+        self._tally()
+    
+    def _setup(self, corpus_index, matcher, ordinals_by_outcome, transcripts, reservoir_size, seed):
+        if len(matcher.categories) > 64:
+            raise ValueError('at most 64 signal categories are supported')
+        
+        self.corpus_index = corpus_index
+        self.matcher = matcher
+        self.ordinals_by_outcome = ordinals_by_outcome
+        self.transcripts = transcripts
+        self.reservoir_size = reservoir_size
+        self.seed = seed
+        self.categories = list(matcher.categories)
+        self.bits = {category: 1 << i for i, category in enumerate(self.categories)}
+    
+    def _scan(self, categories):
+        """Match `categories` against every turn, setting their bits"""
+        if not categories:
+            return
+        
+        matcher = self.matcher
+        size = len(self.corpus_index)
+        seed = self.seed
+        for category in categories:
+            self.first_hits[category] = array('i', [-1]) * size
+        # Sampling priorities hash the transcript id and category name, not
+        # ordinals or bit positions, so they don't depend on file order, on
+        # how data is partitioned, or on which other categories exist
+        bits = [
+            (category, self.bits[category], zlib.crc32(category.encode('utf-8')),
+             self.first_hits[category])
+            for category in categories
+        ]
+        for ordinal, turns in enumerate(self.corpus_index.turn_tokens):
+            conv = self.transcripts[ordinal]
+            speakers = conv['conversation']
+            intent = conv['intent']
+            key = zlib.crc32(conv['transcript_id'].encode('utf-8'))
+            found = {}
+            for t, tokens in enumerate(turns):
+                turn_mask = 0
+                role = None
+                for category, bit, salt, first in bits:
+                    if matcher.matches(category, tokens):
+                        if first[ordinal] < 0:
+                            first[ordinal] = t
+                        if role is None:
+                            role = speakers[t]['speaker'].lower()
+                            hits = self._turn_hits(intent, role)
+                        turn_mask |= bit
+                        hits[category] += 1
+                        priority = mix64(hash((seed, key, t, salt)))
+                        self._reservoir(intent, category, None).offer(priority, (ordinal, t))
+                        self._reservoir(intent, category, role).offer(priority, (ordinal, t))
+                if turn_mask:
+                    found[role] = found.get(role, 0) | turn_mask
+            
+            mask = 0
+            for role, role_mask in found.items():
+                mask |= role_mask
+                if role not in self.speaker_masks:
+                    self.speaker_masks[role] = array('Q', bytes(8 * size))
+                self.speaker_masks[role][ordinal] |= role_mask
+            self.masks[ordinal] |= mask
+    
+    def _tally(self):
+        self.histograms = {}
+        self.corpus = Counter()
+        for outcome, ordinals in self.ordinals_by_outcome.items():
+            histogram = Counter(map(self.masks.__getitem__, ordinals))
+            self.histograms[outcome] = histogram
+            self.corpus.update(histogram)
+        
+        # The same per speaker role: conversations where that role's turns matched
+        self.speaker_histograms = {}
+        self.speaker_corpus = {}
+        for role, masks in self.speaker_masks.items():
+            histograms = self.speaker_histograms[role] = {}
+            corpus = self.speaker_corpus[role] = Counter()
+            for outcome, ordinals in self.ordinals_by_outcome.items():
+                histograms[outcome] = Counter(map(masks.__getitem__, ordinals))
+                corpus.update(histograms[outcome])
+    
+    def tallies(self, speaker=None):
+        """(histograms by outcome, corpus histogram), overall or for one speaker role"""
+        if speaker is None:
+            return self.histograms, self.corpus
+        if speaker in self.speaker_histograms:
+            return self.speaker_histograms[speaker], self.speaker_corpus[speaker]
+        # A role that never matched: every conversation has an empty mask
+        empty = {outcome: Counter({0: sum(h.values())}) for outcome, h in self.histograms.items()}
+        return empty, Counter({0: sum(self.corpus.values())})
+    
+    def updated(self, matcher, changed):
+        """Index for a new keyword set, rescanning only the `changed` categories
+        
+        Categories missing from `matcher` are dropped; the others keep their
+        results and only get renumbered. Returns a new SignalIndex, so readers
+        of this one are unaffected.
+        """
+        index = SignalIndex.__new__(SignalIndex)
+        index._setup(self.corpus_index, matcher, self.ordinals_by_outcome, self.transcripts,
+                     self.reservoir_size, self.seed)
+        
+        kept = [c for c in index.categories if c in self.bits and c not in changed]
+        moves = [(self.bits[c], index.bits[c]) for c in kept]
+        
+        def remap(masks):
+            # Remapped once per distinct mask, then applied in C
+            table = {}
+            for mask in set(masks):
+                table[mask] = sum(new for old, new in moves if mask & old)
+            return array('Q', map(table.__getitem__, masks))
+        
+        index.masks = remap(self.masks)
+        index.speaker_masks = {role: remap(masks) for role, masks in self.speaker_masks.items()}
+        index.reservoirs = {
+            key: reservoir for key, reservoir in self.reservoirs.items() if key[1] in kept
+        }
+        index.turn_hits = {
+            key: Counter({c: n for c, n in hits.items() if c in kept})
+            for key, hits in self.turn_hits.items()
+        }
+        index.first_hits = {c: self.first_hits[c] for c in kept}
+        
+        index._scan([c for c in index.categories if c not in kept])
+        index._tally()
+        return index
+    
+    def _reservoir(self, outcome, category, role):
+        reservoir = self.reservoirs.get((outcome, category, role))
+        if reservoir is None:
+            reservoir = self.reservoirs[(outcome, category, role)] = Reservoir(self.reservoir_size)
+        return reservoir
+    
+    def _turn_hits(self, outcome, role):
+        hits = self.turn_hits.get((outcome, role))
+        if hits is None:
+            hits = self.turn_hits[(outcome, role)] = Counter()
+        return hits
+    
+    def examples(self, outcome, category, k=3, seed=None, speaker=None):
+        """(ordinal, turn index) of k matching turns sampled uniformly
+        
+        Without `seed` the same representative sample is returned every time;
+        a seed reshuffles among the reservoir's turns without rescanning.
+        With `speaker`, only turns by that role.
+        """
+        reservoir = self.reservoirs.get((outcome, category, speaker))
+        if reservoir is None:
+            return []
+        return reservoir.sample(k, seed)
+    
+    def mask_of(self, categories):
+        """Bitmask for a list of category names (KeyError if unknown)"""
+        mask = 0
+        for category in categories:
+            mask |= self.bits[category]
+        return mask
+    
+    def count(self, histogram, require=0, exclude=0):
+        """Conversations having every `require` bit and no `exclude` bit"""
+        return sum(
+            n for mask, n in histogram.items()
+            if mask & require == require and not mask & exclude
+        )
+    
+    def cooccurrence(self, histogram):
+        """matrix[i][j]: conversations containing both category i and j"""
+        size = len(self.categories)
+        matrix = [[0] * size for _ in range(size)]
+        for mask, n in histogram.items():
+            present = [i for i in range(size) if mask >> i & 1]
+            for i in present:
+                row = matrix[i]
+                for j in present:
+                    row[j] += n
+        return matrix
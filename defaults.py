@@ -0,0 +1,9 @@
+
+import os
+
+
+# Dataset location, overridable for batch jobs. Kept apart from
+# conversation_analyzer so the command line can start without importing it.
+DEFAULT_DATA_FILE = os.environ.get(
+    'CONVERSATION_DATA', '/mnt/user-data/uploads/Conversational_Transcript_Dataset.json'
+)
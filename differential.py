@@ -0,0 +1,578 @@
+
+import os
+import random
+import re
+import tempfile
+import time
+import zlib
+from collections import Counter, defaultdict
+
+from conversation_analyzer import QUICK_ANALYSIS_SIZE, ConversationAnalyzer, search_counts, top_outcomes
+from corpus_index import EXAMPLE_RESERVOIR_SIZE
+from lexicon import load_lexicon
+from simple_analyzer import SimpleConversationAnalyzer
+from sqlite_store import SQLiteAnalyzer, ingest
+from structure_index import DEFAULT_PERCENTILES, HISTOGRAM_BINS, distribution
+
+
+# Conversations SimpleConversationAnalyzer.analyze_outcome looks at, from the start
+SIMPLE_ANALYSIS_SIZE = 20
+
+# Seed of the example sampling priorities (SignalIndex's default)
+EXAMPLE_SEED = 0
+
+# A word, for the reference: a run of anything but whitespace, ASCII
+# punctuation other than the apostrophe, and typographic dashes, quotes,
+# bullets and ellipses. Written out by hand rather than shared with the
+# tokenizer it checks.
+REFERENCE_WORD = re.compile(r"[^\s!\"#$%&()*+,\-./:;<=>?@\[\\\]^_`{|}~«»–—•…“”„]+")
+
+# Divergences kept in a report; the rest are only counted
+MAX_REPORTED_DIVERGENCES = 20
+
+# Building blocks for random corpora: words that are keywords only in part,
+# case and Unicode that casefold unusually, and separators the tokenizer
+# must split on (or not)
+FILLER_WORDS = [
+    'the', 'a', 'my', 'account', 'payment', 'card', 'please', 'thanks', 'hello', 'okay',
+    'order', 'refund', 'time', 'told', 'before', 'up', 'higher', 'long', 'still', 'third',
+]
+NEAR_MISS_WORDS = [
+    'issue', 'tissue', 'made', 'madness', 'pursue', 'legally', 'managers', 'supervisory',
+    'againe', 'weekday', 'waited', 'upsetting', 'timeline', 'months-long', 'sue-ing',
+]
+UNICODE_WORDS = ['Straße', 'STRASSE', 'İstanbul', 'ﬁle', 'ǅungla', 'café', 'naïve', 'Ωmega']
+SEPARATORS = [' ', ' ', ' ', '  ', '\n', '\t', ', ', '. ', '! ', '? ', '; ', ' - ', ' — ',
+              ' ', '/', '…', ' (', ') ', '"', '“', '”']
+DECORATIONS = [
+    lambda w: w, lambda w: w, lambda w: w, str.upper, str.title, lambda w: w.capitalize(),
+    lambda w: f"'{w}'", lambda w: f'‘{w}’', lambda w: f'{w}’s', lambda w: f"{w}'",
+    lambda w: f'{w}!', lambda w: f'({w})', lambda w: f'{w}-', lambda w: f'"{w}"',
+]
+SPEAKERS = ['Agent', 'Customer', 'agent', 'CUSTOMER', 'Supervisor']
+INTENTS = [
+    'Billing Dispute', 'billing dispute', 'Escalation - Threat of Legal Action',
+    'Escalation - Repeated Service Failures', 'Refund Request', 'Refund', 'Straße Complaint',
+    'Account Access Issues', 'Claim Status Inquiry', 'Café Order',
+]
+
+
+def reference_words(text):
+    """Case-folded words of `text`, typographic apostrophes as "'" and one dropped from each end"""
+    words = []
+    for word in REFERENCE_WORD.findall(text.casefold().replace('‘', "'").replace('’', "'")):
+        if word.startswith("'"):
+            word = word[1:]
+        if word.endswith("'"):
+            word = word[:-1]
+        if word:
+            words.append(word)
+    return words
+
+
+def reference_priority(value):
+    """splitmix64's finalizer, written out from its definition (SignalIndex's sampling priority)"""
+    value = (value + 0x9E3779B97F4A7C15) % 2 ** 64
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 % 2 ** 64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB % 2 ** 64
+    return value ^ (value >> 31)
+
+
+class ReferenceAnalyzer:
+    """The analyzers' semantics, computed the obvious way on every call
+    
+    No vocabulary, token ids, indexes, reservoirs or caches: each call
+    re-tokenizes the turns it looks at and compares word lists. This is the
+    specification the optimized analyzers are checked against.
+    """
+    
+    def __init__(self, transcripts, lexicon):
+        self.conversations = transcripts
+        self.keywords = {
+            category: [(word, reference_words(word)) for word in words]
+            for category, words in lexicon['categories'].items()
+        }
+    
+    def _outcome(self, outcome_name):
+        """(ordinal, transcript) of every conversation with this outcome"""
+        return [(i, c) for i, c in enumerate(self.conversations) if c['intent'] == outcome_name]
+    
+    def _matched_words(self, text, category):
+        """Keywords of `category` whose words appear, in order and adjacent, in `text`"""
+        words = reference_words(text)
+        matched = []
+        for keyword, keyword_words in self.keywords.get(category, []):
+            n = len(keyword_words)
+            if n and any(words[i:i + n] == keyword_words for i in range(len(words) - n + 1)):
+                matched.append(keyword)
+        return matched
+    
+    def get_all_outcomes(self):
+        """Get list of all outcomes"""
+        return top_outcomes(Counter(c['intent'] for c in self.conversations))
+    
+    def search_outcomes(self, query):
+        """Search for outcomes matching query"""
+        return search_counts(Counter(c['intent'] for c in self.conversations), query)
+    
+    def analyze(self, outcome_name, shuffle=None, speaker=None, full=False):
+        """Count turns matching each category in the first QUICK_ANALYSIS_SIZE (or all) conversations"""
+        convs = self._outcome(outcome_name)
+        if not convs:
+            return None
+        
+        scanned = convs if full else convs[:QUICK_ANALYSIS_SIZE]
+        signals = defaultdict(int)
+        for _, conv in scanned:
+            for turn in conv['conversation']:
+                if speaker is not None and turn['speaker'].lower() != speaker:
+                    continue
+                for category in self.keywords:
+                    if self._matched_words(turn['text'], category):
+                        signals[category] += 1
+        
+        result = {
+            'outcome': outcome_name,
+            'speaker': speaker,
+            'total_cases': len(convs),
+            'signals': {
+                cat: {
+                    'count': count,
+                    'percent': round(count / len(scanned) * 100, 1)
+                }
+                for cat, count in signals.items()
+            },
+            'examples': {
+                cat: self.examples(outcome_name, cat, seed=shuffle, speaker=speaker) for cat in signals
+            }
+        }
+        if full:
+            result['scanned'] = len(scanned)
+            result['partial'] = False
+        return result
+    
+    def analyze_stream(self, outcome_name, chunk_size=None, cancel=None, shuffle=None, speaker=None,
+                       deadline=None):
+        """The full analysis as a single 'result' event"""
+        yield 'result', self.analyze(outcome_name, shuffle=shuffle, speaker=speaker, full=True)
+    
+    def _sample(self, outcome_name, category, speaker=None):
+        """(ordinal, turn index) of the EXAMPLE_RESERVOIR_SIZE matching turns with the lowest priority"""
+        salt = zlib.crc32(category.encode('utf-8'))
+        ranked = []
+        for ordinal, conv in self._outcome(outcome_name):
+            key = zlib.crc32(conv['transcript_id'].encode('utf-8'))
+            for t, turn in enumerate(conv['conversation']):
+                if speaker is not None and turn['speaker'].lower() != speaker:
+                    continue
+                if self._matched_words(turn['text'], category):
+                    ranked.append((reference_priority(hash((EXAMPLE_SEED, key, t, salt))), (ordinal, t)))
+        return [item for _, item in sorted(ranked)[:EXAMPLE_RESERVOIR_SIZE]]
+    
+    def _pick(self, items, k, seed):
+        """The first k items, or k drawn with a seeded shuffle"""
+        k = max(k, 0)
+        if seed is None:
+            return items[:k]
+        return random.Random(seed).sample(items, min(k, len(items)))
+    
+    def examples(self, outcome_name, category, k=3, seed=None, speaker=None):
+        """Up to k of the sampled matching turns, or a seeded reshuffle of them"""
+        examples = []
+        for ordinal, t in self._pick(self._sample(outcome_name, category, speaker), k, seed):
+            conv = self.conversations[ordinal]
+            examples.append({
+                'transcript_id': conv['transcript_id'],
+                'speaker': conv['conversation'][t]['speaker'],
+                'text': conv['conversation'][t]['text']
+            })
+        return examples
+    
+    def structure_stats(self, outcome_name=None, feature='turns', bins=HISTOGRAM_BINS,
+                        percentiles=DEFAULT_PERCENTILES):
+        """Distribution of a conversation feature, measured on the transcripts themselves"""
+        if outcome_name is None:
+            convs = self.conversations
+        else:
+            convs = [conv for _, conv in self._outcome(outcome_name)]
+            if not convs:
+                return None
+        
+        roles = {turn['speaker'].lower() for conv in self.conversations for turn in conv['conversation']}
+        kind, _, name = feature.partition(':')
+        if not (kind in ('turns', 'chars') and (not name or name in roles)
+                or kind == 'first' and name in self.keywords):
+            raise KeyError(feature)
+        
+        values = []
+        for conv in convs:
+            turns = conv['conversation']
+            if kind == 'first':
+                hits = [t for t, turn in enumerate(turns) if self._matched_words(turn['text'], name)]
+                if hits:
+                    values.append(hits[0])
+                continue
+            if name:
+                turns = [turn for turn in turns if turn['speaker'].lower() == name]
+            values.append(len(turns) if kind == 'turns' else sum(len(turn['text']) for turn in turns))
+        
+        return {
+            'outcome': outcome_name,
+            'feature': feature,
+            'conversations': len(convs),
+            'measured': len(values),
+            **distribution(sorted(values), bins, percentiles)
+        }
+    
+    def analyze_outcome(self, outcome_name, shuffle=None):
+        """SimpleConversationAnalyzer's analysis: keyword hits in the first SIMPLE_ANALYSIS_SIZE conversations"""
+        convs = self._outcome(outcome_name)
+        if not convs:
+            return None
+        
+        scanned = convs[:SIMPLE_ANALYSIS_SIZE]
+        signals = defaultdict(int)
+        for _, conv in scanned:
+            for turn in conv['conversation']:
+                for category in self.keywords:
+                    matched = self._matched_words(turn['text'], category)
+                    if matched:
+                        signals[category] += len(matched)
+        
+        examples = {}
+        for category in signals:
+            examples[category] = []
+            for ordinal, t in self._pick(self._sample(outcome_name, category), 3, shuffle):
+                turn = self.conversations[ordinal]['conversation'][t]
+                examples[category].append({
+                    'speaker': turn['speaker'],
+                    'text': turn['text'],
+                    'word': self._matched_words(turn['text'], category)[0]
+                })
+        
+        return {
+            'outcome': outcome_name,
+            'total_cases': len(convs),
+            'signals': {
+                cat: {
+                    'count': count,
+                    'percent': round(count / len(scanned) * 100, 1)
+                }
+                for cat, count in signals.items()
+            },
+            'examples': examples
+        }
+
+
+def random_lexicon(rng, base):
+    """A lexicon grown from `base` with the keyword shapes that are easy to get wrong"""
+    categories = {name: list(words) for name, words in base['categories'].items()}
+    names = list(categories)
+    
+    for name in rng.sample(names, min(3, len(names))):
+        words = categories[name]
+        extra = rng.choice([
+            rng.choice(words).upper(), f'{rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)}',
+            "don't", 'e-mail', 'already-told', '!!!', rng.choice(words), rng.choice(UNICODE_WORDS),
+            '‘again’', 'STILL   waiting'
+        ])
+        words.insert(rng.randint(0, len(words)), extra)
+    
+    # A category of common words, so most conversations match something
+    categories[f'Common {rng.randint(0, 99)}'] = rng.sample(FILLER_WORDS, 3)
+    return {'version': rng.randint(1, 1000), 'categories': categories}
+
+
+def edited_lexicon(rng, lexicon):
+    """`lexicon` with one category edited, one removed and one added, for incremental reloads"""
+    categories = {name: list(words) for name, words in lexicon['categories'].items()}
+    names = list(categories)
+    edited, removed = rng.sample(names, 2)
+    categories[edited] = categories[edited][1:] + [rng.choice(NEAR_MISS_WORDS + FILLER_WORDS)]
+    del categories[removed]
+    categories['Added'] = [rng.choice(UNICODE_WORDS), f'{rng.choice(FILLER_WORDS)} time']
+    return {'version': lexicon['version'] + 1, 'categories': categories}
+
+
+def random_text(rng, keywords):
+    """Turn text mixing keywords, near misses, filler and odd punctuation"""
+    words = []
+    for _ in range(rng.randint(0, 10)):
+        pool = rng.choice([keywords, keywords, NEAR_MISS_WORDS, FILLER_WORDS, FILLER_WORDS,
+                           UNICODE_WORDS])
+        word = rng.choice(pool)
+        # Phrase keywords with their words split by punctuation or line breaks
+        word = rng.choice(SEPARATORS).join(word.split()) if rng.random() < 0.3 else word
+        words.append(rng.choice(DECORATIONS)(word))
+    
+    text = ''
+    for word in words:
+        text += word + rng.choice(SEPARATORS)
+    return text.strip() if rng.random() < 0.8 else text
+
+
+def random_corpus(rng, size, lexicon):
+    """`size` random transcripts over a skewed handful of outcomes"""
+    keywords = [word for words in lexicon['categories'].values() for word in words]
+    intents = rng.sample(INTENTS, rng.randint(1, len(INTENTS)))
+    weights = [1 / (rank + 1) for rank in range(len(intents))]
+    
+    transcripts = []
+    for i in range(size):
+        conversation = []
+        for _ in range(rng.choice([0, 1, 2, 4, 6, 8, 12])):
+            conversation.append({'speaker': rng.choice(SPEAKERS), 'text': random_text(rng, keywords)})
+        transcripts.append({
+            'transcript_id': f'DIFF-{rng.getrandbits(32):08x}-{i}',
+            'intent': rng.choices(intents, weights)[0],
+            'domain': 'Synthetic',
+            'reason_for_call': None,
+            'conversation': conversation
+        })
+    return transcripts
+
+
+def make_checks(rng, transcripts, lexicon):
+    """{operation: [(name, fn(analyzer))]}, the same calls for the reference and the engines"""
+    outcomes = list(dict.fromkeys(c['intent'] for c in transcripts))
+    outcomes += ['No such outcome', outcomes[0].swapcase() if outcomes else 'Billing Dispute']
+    categories = list(lexicon['categories']) + ['No such category']
+    speakers = [None, 'customer', 'agent', 'supervisor']
+    
+    queries = ['', 'zzz', 'ESCALATION', 'ß']
+    for outcome in rng.sample(outcomes, min(3, len(outcomes))):
+        start = rng.randint(0, len(outcome) - 1)
+        queries.append(outcome[start:start + rng.randint(1, 8)].swapcase())
+    
+    checks = defaultdict(list)
+    checks['outcomes'].append(('outcomes', lambda analyzer: analyzer.get_all_outcomes()))
+    for query in queries:
+        checks['search'].append((f'search {query!r}',
+                                 lambda analyzer, q=query: analyzer.search_outcomes(q)))
+    
+    for outcome in outcomes:
+        for speaker in speakers:
+            for shuffle in [None, rng.randint(1, 1000)]:
+                options = {'speaker': speaker, 'shuffle': shuffle}
+                checks['analyze'].append((
+                    f'analyze {outcome!r} {options}',
+                    lambda analyzer, o=outcome, kw=options: analyzer.analyze(o, **kw)
+                ))
+                checks['analyze_full'].append((
+                    f'analyze {outcome!r} full {options}',
+                    lambda analyzer, o=outcome, kw=options: analyzer.analyze(o, full=True, **kw)
+                ))
+            # Uncached (reshuffled) in small chunks, so every chunk boundary is crossed
+            options = {'speaker': speaker, 'shuffle': rng.randint(1, 1000),
+                       'chunk_size': rng.randint(1, 7)}
+            checks['analyze_stream'].append((
+                f'analyze_stream {outcome!r} {options}',
+                lambda analyzer, o=outcome, kw=options: list(analyzer.analyze_stream(o, **kw))[-1]
+            ))
+        
+        for category in categories:
+            for k, seed, speaker in [(3, None, None), (1, rng.randint(1, 1000), None),
+                                     (EXAMPLE_RESERVOIR_SIZE + 5, None, 'customer'),
+                                     (5, rng.randint(1, 1000), 'agent')]:
+                options = {'k': k, 'seed': seed, 'speaker': speaker}
+                checks['examples'].append((
+                    f'examples {outcome!r} {category!r} {options}',
+                    lambda analyzer, o=outcome, c=category, kw=options: analyzer.examples(o, c, **kw)
+                ))
+        
+        for shuffle in [None, rng.randint(1, 1000)]:
+            checks['analyze_outcome'].append((
+                f'analyze_outcome {outcome!r} shuffle={shuffle}',
+                lambda analyzer, o=outcome, s=shuffle: analyzer.analyze_outcome(o, shuffle=s)
+            ))
+    
+    features = ['turns', 'chars', 'turns:customer', 'chars:agent', 'chars:supervisor', 'turns:nobody',
+                'first:No such category'] + [f'first:{category}' for category in lexicon['categories']]
+    for outcome in [None] + outcomes:
+        for feature in features:
+            options = {'feature': feature, 'bins': rng.choice([1, 3, HISTOGRAM_BINS]),
+                       'percentiles': rng.choice([DEFAULT_PERCENTILES, (0, 33.3, 100)])}
+            checks['structure'].append((
+                f'structure {outcome!r} {options}',
+                lambda analyzer, o=outcome, kw=options: analyzer.structure_stats(o, **kw)
+            ))
+    
+    # The same full analyses again, now answered from the cache
+    checks['analyze_cached'] = [(f'{name} (cached)', check) for name, check in checks['analyze_full']]
+    return checks
+
+
+def build_core(transcripts, lexicon, previous, workdir):
+    """The in-memory analyzer, indexed with the lexicon"""
+    return ConversationAnalyzer.from_transcripts(transcripts, lexicon=lexicon)
+
+
+def build_core_reloaded(transcripts, lexicon, previous, workdir):
+    """The in-memory analyzer, indexed with `previous` and incrementally reloaded"""
+    analyzer = ConversationAnalyzer.from_transcripts(transcripts, lexicon=previous)
+    analyzer.reload_lexicon(lexicon)
+    return analyzer
+
+
+def build_sqlite(transcripts, lexicon, previous, workdir):
+    """A SQLite store ingested into `workdir`"""
+    path = os.path.join(workdir, 'store.db')
+    if os.path.exists(path):
+        os.remove(path)
+    # Small batches, so vocabularies and aggregates cross batch boundaries
+    ingest(enumerate(transcripts), path, lexicon=lexicon, batch_size=7)
+    return SQLiteAnalyzer(path)
+
+
+def build_simple(transcripts, lexicon, previous, workdir):
+    """The simple analyzer, indexed with the lexicon"""
+    return SimpleConversationAnalyzer.from_transcripts(transcripts, lexicon)
+
+
+def build_simple_reloaded(transcripts, lexicon, previous, workdir):
+    """The simple analyzer, indexed with `previous` and incrementally reloaded"""
+    analyzer = SimpleConversationAnalyzer.from_transcripts(transcripts, previous)
+    analyzer.reload_lexicon(lexicon)
+    return analyzer
+
+
+CORE_OPERATIONS = ['outcomes', 'search', 'analyze', 'analyze_stream', 'analyze_full',
+                   'analyze_cached', 'examples', 'structure']
+
+# Optimized engines: (builder, operations checked). The SQLite store has no
+# streaming, analysis cache or structure index
+ENGINES = {
+    'core': (build_core, CORE_OPERATIONS),
+    'core_reloaded': (build_core_reloaded, CORE_OPERATIONS),
+    'sqlite': (build_sqlite, ['outcomes', 'search', 'analyze', 'analyze_full', 'examples']),
+    'simple': (build_simple, ['analyze_outcome']),
+    'simple_reloaded': (build_simple_reloaded, ['analyze_outcome']),
+}
+
+
+def first_difference(expected, actual, path='result'):
+    """Where `actual` first differs from `expected` (a readable string), or None
+    
+    Dict key order counts: it is the order results are shown in.
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in list(expected) + [key for key in actual if key not in expected]:
+            if key not in actual:
+                return f'{path}[{key!r}] missing'
+            if key not in expected:
+                return f'{path}[{key!r}] unexpected: {actual[key]!r:.200}'
+            difference = first_difference(expected[key], actual[key], f'{path}[{key!r}]')
+            if difference:
+                return difference
+        if list(expected) != list(actual):
+            return f'{path}: keys in order {list(actual)!r:.200}, expected {list(expected)!r:.200}'
+        return None
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        if len(expected) != len(actual):
+            return f'{path}: {len(actual)} items, expected {len(expected)}'
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            difference = first_difference(a, b, f'{path}[{i}]')
+            if difference:
+                return difference
+    if expected == actual:
+        return None
+    return f'{path}: expected {expected!r:.200}, got {actual!r:.200}'
+
+
+def timed(fn, *args):
+    """(result or raised exception, elapsed ms)"""
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+    except Exception as e:
+        result = e
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_differential(corpora=20, size=200, seed=0, data_file=None, lexicon=None, engines=None):
+    """Check every engine against ReferenceAnalyzer on random corpora, timing both
+    
+    Each corpus gets its own random lexicon grown from `lexicon` (default:
+    the lexicon file) and an edited copy of it for the reload engines. With
+    `data_file`, that dataset is checked once with `lexicon` as given.
+    Returns {'checks', 'divergent', 'divergences': the first few, 'timings':
+    one row per engine and operation}.
+    """
+    base = lexicon or load_lexicon()
+    engines = engines or list(ENGINES)
+    timings = {}
+    divergences = []
+    checked = divergent = 0
+    
+    def row(engine, operation):
+        key = (engine, operation)
+        if key not in timings:
+            timings[key] = {'engine': engine, 'operation': operation, 'checks': 0,
+                            'divergences': 0, 'reference_ms': 0.0, 'optimized_ms': 0.0}
+        return timings[key]
+    
+    if data_file:
+        from conversation_analyzer import load_transcripts
+        rounds = [('data', load_transcripts(data_file), base, edited_lexicon(random.Random(seed), base))]
+    else:
+        rounds = []
+        for i in range(corpora):
+            rng = random.Random(f'{seed}-{i}')
+            lexicon = random_lexicon(rng, base)
+            rounds.append((i, random_corpus(rng, rng.randint(1, size), lexicon), lexicon,
+                           edited_lexicon(rng, lexicon)))
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for corpus, transcripts, lexicon, previous in rounds:
+            checks = make_checks(random.Random(f'{seed}-{corpus}-checks'), transcripts, lexicon)
+            reference = ReferenceAnalyzer(transcripts, lexicon)
+            expected = {}
+            for operation, operation_checks in checks.items():
+                for name, check in operation_checks:
+                    expected[name] = timed(check, reference)
+            
+            for engine in engines:
+                build, operations = ENGINES[engine]
+                analyzer, elapsed = timed(build, transcripts, lexicon, previous, workdir)
+                row(engine, 'build')['optimized_ms'] += elapsed
+                if isinstance(analyzer, Exception):
+                    raise analyzer
+                
+                for operation in operations:
+                    stats = row(engine, operation)
+                    for name, check in checks[operation]:
+                        wanted, reference_ms = expected[name]
+                        got, optimized_ms = timed(check, analyzer)
+                        stats['checks'] += 1
+                        stats['reference_ms'] += reference_ms
+                        stats['optimized_ms'] += optimized_ms
+                        checked += 1
+                        
+                        if isinstance(wanted, Exception) or isinstance(got, Exception):
+                            same = type(wanted) is type(got) and str(wanted) == str(got)
+                            difference = None if same else f'expected {wanted!r}, got {got!r}'
+                        else:
+                            difference = first_difference(wanted, got)
+                        if difference is None:
+                            continue
+                        
+                        stats['divergences'] += 1
+                        divergent += 1
+                        if len(divergences) < MAX_REPORTED_DIVERGENCES:
+                            divergences.append({'corpus': corpus, 'engine': engine, 'check': name,
+                                                'difference': difference})
+    
+    rows = list(timings.values())
+    for stats in rows:
+        stats['reference_ms'] = round(stats['reference_ms'], 3) if stats['checks'] else None
+        stats['optimized_ms'] = round(stats['optimized_ms'], 3)
+        stats['speedup'] = (round(stats['reference_ms'] / stats['optimized_ms'], 1)
+                            if stats['reference_ms'] and stats['optimized_ms'] else None)
+    
+    return {
+        'corpora': len(rounds),
+        'checks': checked,
+        'divergent': divergent,
+        'divergences': divergences,
+        'timings': rows
+    }
@@ -0,0 +1,93 @@
+
+import os
+import sys
+import time
+import types
+
+
+# Never followed when measuring: code and classes are shared by everything
+OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                types.MethodType, types.CodeType)
+
+# Objects measured between deadline checks
+DEADLINE_CHECK_OBJECTS = 10000
+
+
+def _slots(cls):
+    """Every __slots__ name declared along a class's MRO"""
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return names
+
+
+def deep_size(root, seen, deadline=None):
+    """(bytes, objects) reachable from `root` that are not already in `seen`
+    
+    Follows containers, instance dicts and slots. Every object counted is
+    added to `seen`, so measuring several roots with one set counts shared
+    objects once, under the first root that reaches them. Once `deadline`
+    (a time.monotonic() value) passes, stops with what was counted so far.
+    """
+    size = 0
+    objects = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or obj is None or isinstance(obj, OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        objects += 1
+        if deadline is not None and objects % DEADLINE_CHECK_OBJECTS == 0 \
+                and time.monotonic() >= deadline:
+            break
+        
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, bytearray, int, float, bool, range, memoryview)):
+            pass
+        else:
+            # Arrays count their buffer in getsizeof; plain objects hold their
+            # fields in a __dict__ or in slots
+            instance_dict = getattr(obj, '__dict__', None)
+            if isinstance(instance_dict, dict):
+                stack.append(instance_dict)
+            for name in _slots(type(obj)):
+                value = getattr(obj, name, None)
+                if value is not None:
+                    stack.append(value)
+    return size, objects
+
+
+def structure_sizes(structures, deadline=None):
+    """[(name, bytes, objects)] for (name, object) pairs, shared objects counted once
+    
+    Order matters: list the data first and derived structures after, so each
+    derived structure is charged only for what it adds. Past `deadline`, the
+    structure being measured is cut short and the rest are left out.
+    """
+    seen = set()
+    sizes = []
+    for name, obj in structures:
+        size, objects = deep_size(obj, seen, deadline)
+        sizes.append((name, size, objects))
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    return sizes
+
+
+def process_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is missing)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
@@ -1,149 +1,580 @@
 
+import gc
 import json
-from collections import Counter, defaultdict
+import os
+import queue
+import select
+import signal
+import socket
+import sqlite3
+import sys
+import time
+import traceback
+from collections import Counter
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
 from urllib.parse import parse_qs, urlparse
 import threading
-import webbrowser
 
+from conversation_analyzer import (
+    DEFAULT_DATA_FILE, ConversationAnalyzer, load_transcripts, search_counts, top_outcomes,
+    transcript_page
+)
+from corpus_index import EXAMPLE_RESERVOIR_SIZE
+from lexicon import LEXICON_FILE, load_lexicon, watch_lexicon
+from sharding import ShardError, ShardedAnalyzer, load_shard
+from sqlite_store import SQLiteAnalyzer, is_sqlite_store
+from snapshot import find_transcript, is_snapshot
+from structure_index import DEFAULT_PERCENTILES, HISTOGRAM_BINS
 
-class ConversationAnalyzer:
-    """Simple analyzer with all the smarts"""
+
+# Global analyzer instance, set once loading finishes
+ANALYZER = None
+
+# Outcomes whose analyses are computed before the server reports ready
+WARM_OUTCOMES = 5
+
+# Seconds a client is told to wait before retrying while data loads
+LOADING_RETRY_AFTER = 2
+
+# Seconds before a pre-forked worker that died is replaced
+WORKER_RESPAWN_DELAY = 1.0
+
+# Keep-alive: an idle connection is closed after this many seconds, and at
+# most this many connections (each holding a thread) are served at once
+KEEPALIVE_TIMEOUT = 10
+MAX_CONNECTIONS = 100
+
+# Admission control for the expensive endpoints: at most MAX_ACTIVE_REQUESTS
+# run at once (threads share one interpreter, so more only adds latency) and
+# MAX_QUEUED_REQUESTS wait, each for up to QUEUE_WAIT seconds; the rest are
+# shed with a 503 and Retry-After
+MAX_ACTIVE_REQUESTS = 4
+MAX_QUEUED_REQUESTS = 16
+QUEUE_WAIT = 1.0
+BUSY_RETRY_AFTER = 1
+
+# Seconds each expensive endpoint may take, queueing included; scans past
+# their deadline stop and return what they have, flagged 'partial'
+DEADLINES = {
+    '/api/analyze': 5.0,
+    '/api/analyze/stream': 30.0,
+    '/api/phrases': 30.0,
+    '/api/similar': 10.0,
+    '/api/shard/analyze': 30.0,
+    '/api/memory': 30.0,
+}
+
+# What a sharding coordinator answers; other API paths get a 501 there
+SHARDED_PATHS = {
+    '/api/outcomes', '/api/analyze', '/api/analyze/stream', '/api/examples', '/api/transcript',
+    '/api/lexicon', '/api/search'
+}
+
+# What a server backed by a SQLite store answers; other API paths get a 501 there
+STORE_PATHS = {
+    '/api/outcomes', '/api/analyze', '/api/analyze/stream', '/api/examples', '/api/transcript',
+    '/api/lexicon', '/api/search'
+}
+
+# Sent as-is when every connection slot is taken
+SERVER_BUSY_RESPONSE = (
+    b'HTTP/1.1 503 Service Unavailable\r\n'
+    b'Retry-After: 1\r\n'
+    b'Content-Length: 0\r\n'
+    b'Connection: close\r\n'
+    b'\r\n'
+)
+
+
+class LoadStatus:
+    """Progress of the background load, for /healthz, /readyz and early requests"""
     
-    def __init__(self, data_file):
-        with open(data_file, 'r') as f:
-            data = json.load(f)
-        
-        self.conversations = data['transcripts']
-        self.by_outcome = defaultdict(list)
-        
-        for conv in self.conversations:
-            self.by_outcome[conv['intent']].append(conv)
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stage = 'starting'
+        self.error = None
+        self.ready = threading.Event()
+        self.data_file = None
+        self.lexicon = None
+        # {outcome: conversations} as soon as the file is read, None if not exact
+        self.outcome_counts = None
+        self.conversations = None
+        self.warmed = []
     
-    def get_all_outcomes(self):
-        """Get list of all outcomes"""
-        outcome_counts = Counter([c['intent'] for c in self.conversations])
-        return [
-            {
-                'name': outcome,
-                'count': count,
-                'percent': round(count / len(self.conversations) * 100, 1)
-            }
-            for outcome, count in outcome_counts.most_common(15)
-        ]
-    
-    def analyze(self, outcome_name):
-        """Analyze a specific outcome"""
-        convs = self.by_outcome.get(outcome_name, [])
-        if not convs:
-            return None
-        
-        # Keywords to look for
-        keywords = {
-            'Frustrated': ['frustrated', 'angry', 'upset', 'mad', 'furious'],
-            'Legal Threat': ['lawyer', 'legal', 'sue', 'lawsuit', 'attorney'],
-            'Repeated Issue': ['again', 'third time', 'already told', 'mentioned before'],
-            'Long Wait': ['weeks', 'months', 'waiting', 'long time', 'still waiting'],
-            'Want Supervisor': ['manager', 'supervisor', 'escalate', 'higher up']
-        }
-        
-        signals = defaultdict(int)
-        examples = defaultdict(list)
-        
-        for conv in convs[:30]:  # Analyze first 30
-            for turn in conv['conversation']:
-                text = turn['text'].lower()
-                
-                for category, words in keywords.items():
-                    for word in words:
-                        if word in text:
-                            signals[category] += 1
-                            if len(examples[category]) < 3:
-                                examples[category].append({
-                                    'speaker': turn['speaker'],
-                                    'text': turn['text']
-                                })
-                            break
-        
-        return {
-            'outcome': outcome_name,
-            'total_cases': len(convs),
-            'signals': {
-                cat: {
-                    'count': count,
-                    'percent': round(count / min(30, len(convs)) * 100, 1)
-                }
-                for cat, count in signals.items()
-            },
-            'examples': {
-                cat: exs[:3] for cat, exs in examples.items()
-            }
+    def update(self, stage):
+        self.stage = stage
+    
+    def fail(self, error):
+        self.stage = 'failed'
+        self.error = str(error)
+    
+    def summary(self):
+        summary = {
+            'stage': self.stage,
+            'ready': self.ready.is_set(),
+            'elapsed_seconds': round(time.monotonic() - self.started, 2),
+            'conversations': self.conversations,
+            'warmed': self.warmed,
+            'pid': os.getpid(),
+            'requests': ADMISSION.summary()
         }
+        if self.error:
+            summary['error'] = self.error
+        return summary
+
+
+STATUS = LoadStatus()
+
+
+class AdmissionControl:
+    """Bounded work queue: `active` slots plus at most `queued` waiters"""
     
-    def search_outcomes(self, query):
-        """Search for outcomes matching query"""
-        query = query.lower()
-        matches = []
-        
-        for outcome, convs in self.by_outcome.items():
-            if query in outcome.lower():
-                matches.append({
-                    'name': outcome,
-                    'count': len(convs)
-                })
-        
-        return sorted(matches, key=lambda x: -x['count'])[:10]
+    def __init__(self, active=MAX_ACTIVE_REQUESTS, queued=MAX_QUEUED_REQUESTS):
+        self.active = active
+        self.queued = queued
+        self._slots = threading.BoundedSemaphore(active)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.shed = 0
+    
+    def acquire(self, timeout):
+        """Take a slot, waiting up to `timeout`; False if shed"""
+        with self._lock:
+            if self.waiting >= self.queued:
+                self.shed += 1
+                return False
+            self.waiting += 1
+        admitted = self._slots.acquire(timeout=timeout)
+        with self._lock:
+            self.waiting -= 1
+            if admitted:
+                self.running += 1
+            else:
+                self.shed += 1
+        return admitted
+    
+    def release(self):
+        with self._lock:
+            self.running -= 1
+        self._slots.release()
+    
+    def summary(self):
+        return {'running': self.running, 'waiting': self.waiting, 'shed': self.shed}
 
 
-# Global analyzer instance
-ANALYZER = None
+ADMISSION = AdmissionControl()
+
+
+class ClientDisconnect:
+    """Event-like check that the client closed its connection
+    
+    `is_set()` peeks at the socket without consuming anything, so a
+    pipelined next request still reads as connected.
+    """
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def is_set(self):
+        readable, _, _ = select.select([self.connection], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return self.connection.recv(1, socket.MSG_PEEK) == b''
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            return True
+
+
+def split_list(value):
+    """Split a comma-separated query parameter"""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def optional_int(value):
+    """Parse an optional integer query parameter (ValueError if malformed)"""
+    return int(value) if value else None
+
+
+def page_params(params):
+    """(offset, limit) of a transcript page; ValueError if malformed or negative"""
+    offset = int(params.get('offset', ['0'])[0])
+    limit = optional_int(params.get('limit', [''])[0])
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError('offset and limit must not be negative')
+    return offset, limit
+
+
+def speaker_param(params):
+    """Optional speaker role filter, lowercased (None for all speakers)"""
+    return params.get('speaker', [''])[0].strip().lower() or None
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    """HTTP server that handles each connection in its own thread
+    
+    Connections beyond `max_connections` get an immediate 503 instead of a
+    thread, so idle keep-alive clients cannot exhaust the process.
+    """
+    daemon_threads = True
+    
+    def __init__(self, server_address, handler_class, max_connections=MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._slots = threading.BoundedSemaphore(max_connections)
+        super().__init__(server_address, handler_class)
+    
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(SERVER_BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
 
 
 class DashboardHandler(BaseHTTPRequestHandler):
-    """Handle web requests"""
+    """Handle web requests
+    
+    Speaks HTTP/1.1, so browsers and scripts reuse one connection for many
+    requests (pipelined ones are answered in order). Every response carries
+    a Content-Length except the event stream, which closes its connection.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections time out; small responses go out at once
+    timeout = KEEPALIVE_TIMEOUT
+    disable_nagle_algorithm = True
     
     def log_message(self, format, *args):
         """Suppress request logging"""
         pass
     
+    def send_json(self, payload, status=200, retry_after=None):
+        """Send a JSON response"""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    # time.monotonic() by which the current request should be answered
+    deadline = None
+    
     def do_GET(self):
-        """Handle GET requests"""
+        """Handle GET requests, admitting expensive ones through ADMISSION"""
         parsed = urlparse(self.path)
+        budget = DEADLINES.get(parsed.path)
+        if budget is None or ANALYZER is None:
+            self.deadline = None
+            self.respond(parsed)
+            return
         
+        self.deadline = time.monotonic() + budget
+        if not ADMISSION.acquire(timeout=min(QUEUE_WAIT, budget)):
+            self.send_json({'error': 'server busy, retry shortly'}, status=503,
+                           retry_after=BUSY_RETRY_AFTER)
+            return
+        try:
+            self.respond(parsed)
+        finally:
+            ADMISSION.release()
+    
+    def respond(self, parsed):
+        """Route one request; a shard failing to answer becomes a 502"""
+        try:
+            self.route(parsed)
+        except ShardError as e:
+            self.send_json({'error': str(e)}, status=502)
+    
+    def route(self, parsed):
+        """Dispatch one request by path"""
         if parsed.path == '/':
+            body = get_html_dashboard().encode()
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write(get_html_dashboard().encode())
+            self.wfile.write(body)
+        
+        elif parsed.path == '/healthz':
+            # Alive unless loading failed; loading itself is not a failure
+            self.send_json(STATUS.summary(), status=503 if STATUS.error else 200)
+        
+        elif parsed.path == '/readyz':
+            self.send_json(STATUS.summary(), status=200 if STATUS.ready.is_set() else 503)
+        
+        elif ANALYZER is None:
+            self.send_loading(parsed)
+        
+        elif isinstance(ANALYZER, ShardedAnalyzer) and parsed.path not in SHARDED_PATHS:
+            status = 501 if parsed.path.startswith('/api/') else 404
+            self.send_json({'error': 'not available on a sharded server'}, status=status)
+        
+        elif isinstance(ANALYZER, SQLiteAnalyzer) and parsed.path not in STORE_PATHS:
+            status = 501 if parsed.path.startswith('/api/') else 404
+            self.send_json({'error': 'not available when serving a SQLite store'}, status=status)
         
         elif parsed.path == '/api/outcomes':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            outcomes = ANALYZER.get_all_outcomes()
-            self.wfile.write(json.dumps(outcomes).encode())
+            self.send_json(ANALYZER.get_all_outcomes())
         
         elif parsed.path == '/api/analyze':
             params = parse_qs(parsed.query)
             outcome = params.get('outcome', [''])[0]
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            result = ANALYZER.analyze(outcome)
-            self.wfile.write(json.dumps(result).encode())
+            full = params.get('full', [''])[0] in ('1', 'true')
+            try:
+                shuffle = optional_int(params.get('shuffle', [''])[0])
+            except ValueError:
+                self.send_json({'error': 'shuffle must be an integer'}, status=400)
+                return
+            cancel = ClientDisconnect(self.connection)
+            result = ANALYZER.analyze(outcome, shuffle=shuffle, speaker=speaker_param(params),
+                                      full=full, deadline=self.deadline, cancel=cancel)
+            if cancel.is_set():
+                # Nobody is listening any more
+                self.close_connection = True
+                return
+            self.send_json(result)
+        
+        elif parsed.path == '/api/analyze/stream':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [''])[0]
+            try:
+                shuffle = optional_int(params.get('shuffle', [''])[0])
+            except ValueError:
+                self.send_json({'error': 'shuffle must be an integer'}, status=400)
+                return
+            self.stream_analysis(outcome, shuffle, speaker_param(params))
+        
+        elif parsed.path == '/api/examples':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [''])[0]
+            category = params.get('category', [''])[0]
+            try:
+                k = min(int(params.get('k', ['3'])[0]), EXAMPLE_RESERVOIR_SIZE)
+                seed = optional_int(params.get('seed', [''])[0])
+            except ValueError:
+                self.send_json({'error': 'k and seed must be integers'}, status=400)
+                return
+            if k < 0:
+                self.send_json({'error': 'k must not be negative'}, status=400)
+                return
+            speaker = speaker_param(params)
+            self.send_json({
+                'outcome': outcome,
+                'category': category,
+                'seed': seed,
+                'speaker': speaker,
+                'examples': ANALYZER.examples(outcome, category, k, seed, speaker)
+            })
+        
+        elif parsed.path == '/api/signals':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [None])[0]
+            require = split_list(params.get('all', [''])[0])
+            exclude = split_list(params.get('none', [''])[0])
+            try:
+                self.send_json(ANALYZER.signal_breakdown(outcome, require, exclude,
+                                                         speaker_param(params)))
+            except KeyError as e:
+                self.send_json({'error': f'unknown category {e}'}, status=400)
+        
+        elif parsed.path == '/api/structure':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [None])[0]
+            feature = params.get('feature', ['turns'])[0]
+            try:
+                bins = min(max(int(params.get('bins', [str(HISTOGRAM_BINS)])[0]), 1), 200)
+                percentiles = [float(p) for p in split_list(params.get('percentiles', [''])[0])]
+            except ValueError:
+                self.send_json({'error': 'bins and percentiles must be numbers'}, status=400)
+                return
+            if not all(0 <= p <= 100 for p in percentiles):
+                self.send_json({'error': 'percentiles must be between 0 and 100'}, status=400)
+                return
+            try:
+                self.send_json(ANALYZER.structure_stats(outcome, feature, bins,
+                                                        percentiles or DEFAULT_PERCENTILES))
+            except KeyError:
+                self.send_json({'error': f'unknown feature {feature!r}',
+                                'features': ANALYZER.structure_features()}, status=400)
+        
+        elif parsed.path == '/api/lift':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [None])[0]
+            self.send_json(ANALYZER.signal_lift(outcome, speaker=speaker_param(params)))
+        
+        elif parsed.path == '/api/phrases':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [''])[0]
+            try:
+                limit = min(int(params.get('limit', ['20'])[0]), 200)
+            except ValueError:
+                self.send_json({'error': 'limit must be an integer'}, status=400)
+                return
+            try:
+                result = ANALYZER.discriminative_phrases(outcome, limit, deadline=self.deadline)
+            except TimeoutError:
+                self.send_json({'error': 'phrases are still being counted, retry shortly'},
+                               status=503, retry_after=LOADING_RETRY_AFTER)
+                return
+            self.send_json(result)
+        
+        elif parsed.path == '/api/similar':
+            params = parse_qs(parsed.query)
+            transcript_id = params.get('id', [''])[0]
+            try:
+                limit = min(int(params.get('limit', ['10'])[0]), 100)
+                threshold = float(params.get('threshold', ['0.5'])[0])
+            except ValueError:
+                self.send_json({'error': 'limit and threshold must be numbers'}, status=400)
+                return
+            self.send_json(ANALYZER.similar_conversations(transcript_id, limit, threshold))
+        
+        elif parsed.path == '/api/transcript':
+            params = parse_qs(parsed.query)
+            transcript_id = params.get('id', [''])[0]
+            try:
+                offset, limit = page_params(params)
+            except ValueError:
+                self.send_json({'error': 'offset and limit must be non-negative integers'},
+                               status=400)
+                return
+            self.send_json(ANALYZER.get_transcript(transcript_id, offset, limit))
+        
+        elif parsed.path == '/api/query':
+            params = parse_qs(parsed.query)
+            expression = params.get('q', [''])[0]
+            try:
+                offset = int(params.get('offset', ['0'])[0])
+                limit = min(int(params.get('limit', ['50'])[0]), 1000)
+                if offset < 0 or limit < 0:
+                    raise ValueError('offset and limit must not be negative')
+                self.send_json(ANALYZER.query(expression, offset, limit))
+            except ValueError as e:
+                # QuerySyntaxError is a ValueError too
+                self.send_json({'error': str(e)}, status=400)
+        
+        elif parsed.path == '/api/lexicon':
+            self.send_json(ANALYZER.lexicon)
+        
+        elif parsed.path == '/api/memory':
+            self.send_json(ANALYZER.memory_usage(self.deadline))
         
         elif parsed.path == '/api/search':
             params = parse_qs(parsed.query)
             query = params.get('q', [''])[0]
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            results = ANALYZER.search_outcomes(query)
-            self.wfile.write(json.dumps(results).encode())
+            self.send_json(ANALYZER.search_outcomes(query))
+        
+        elif parsed.path == '/api/shard/counts':
+            # For a sharding coordinator: every outcome count, in first-seen order
+            self.send_json(list(ANALYZER.outcome_counts.items()))
+        
+        elif parsed.path == '/api/shard/analyze':
+            params = parse_qs(parsed.query)
+            outcome = params.get('outcome', [''])[0]
+            try:
+                limit = optional_int(params.get('limit', [''])[0])
+                shuffle = optional_int(params.get('shuffle', [''])[0])
+                budget = params.get('budget', [''])[0]
+                deadline = min(self.deadline, time.monotonic() + float(budget)) if budget \
+                    else self.deadline
+            except ValueError:
+                self.send_json({'error': 'limit, shuffle and budget must be numbers'}, status=400)
+                return
+            self.send_json(ANALYZER.partial_analysis(outcome, limit, speaker_param(params), deadline,
+                                                     ClientDisconnect(self.connection), shuffle))
+        
+        else:
+            self.send_json({'error': 'not found'}, status=404)
+    
+    def send_loading(self, parsed):
+        """Answer what the data read so far allows; 503 with Retry-After otherwise"""
+        params = parse_qs(parsed.query)
+        
+        if parsed.path == '/api/outcomes' and STATUS.outcome_counts is not None:
+            self.send_json(top_outcomes(STATUS.outcome_counts))
+        
+        elif parsed.path == '/api/search' and STATUS.outcome_counts is not None:
+            self.send_json(search_counts(STATUS.outcome_counts, params.get('q', [''])[0]))
+        
+        elif parsed.path == '/api/lexicon' and STATUS.lexicon is not None:
+            self.send_json(STATUS.lexicon)
+        
+        elif parsed.path == '/api/transcript' and STATUS.outcome_counts is not None \
+                and is_snapshot(STATUS.data_file):
+            # Snapshots are indexed by id, so one transcript needs no full load
+            try:
+                offset, limit = page_params(params)
+            except ValueError:
+                self.send_json({'error': 'offset and limit must be non-negative integers'},
+                               status=400)
+                return
+            conv = find_transcript(STATUS.data_file, params.get('id', [''])[0])
+            self.send_json(transcript_page(conv, offset, limit) if conv else None)
+        
+        else:
+            self.send_json({'error': 'data is still loading', **STATUS.summary()}, status=503,
+                           retry_after=LOADING_RETRY_AFTER)
+    
+    def stream_analysis(self, outcome, shuffle=None, speaker=None):
+        """Stream a full-population analysis as Server-Sent Events
+        
+        The scan runs in a background thread; if the browser goes away the
+        write fails and the scan is cancelled at the next chunk boundary. Past
+        the request deadline the scan stops with a partial result.
+        """
+        # The stream has no length, so it ends with the connection
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        
+        events = queue.Queue(maxsize=4)
+        cancel = threading.Event()
+        
+        def worker():
+            try:
+                for event in ANALYZER.analyze_stream(outcome, cancel=cancel, shuffle=shuffle,
+                                                       speaker=speaker, deadline=self.deadline):
+                    while not cancel.is_set():
+                        try:
+                            events.put(event, timeout=0.5)
+                            break
+                        except queue.Full:
+                            pass
+            finally:
+                events.put(None)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                name, data = event
+                self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            cancel.set()
+            # Let the worker finish its final put without blocking
+            while events.get() is not None:
+                pass
 
 
 def get_html_dashboard():
@@ -221,6 +652,14 @@ def get_html_dashboard():
             transition: border 0.3s;
         }
         
+        .search-box select {
+            padding: 18px 15px;
+            border: 2px solid #e0e0e0;
+            border-radius: 12px;
+            font-size: 16px;
+            background: white;
+        }
+        
         .search-box input:focus {
             outline: none;
             border-color: #667eea;
@@ -427,6 +866,54 @@ def get_html_dashboard():
             font-size: 18px;
         }
         
+        .lift-table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-bottom: 30px;
+        }
+        
+        .lift-table th, .lift-table td {
+            text-align: left;
+            padding: 10px;
+            border-bottom: 1px solid #eee;
+        }
+        
+        .lift-table tr.significant td {
+            font-weight: bold;
+        }
+        
+        .lift-table .ci {
+            color: #999;
+            font-weight: normal;
+            font-size: 13px;
+        }
+        
+        .shuffle-btn {
+            margin-left: 10px;
+            padding: 4px 12px;
+            background: white;
+            color: #667eea;
+            border: 2px solid #667eea;
+            border-radius: 8px;
+            font-size: 13px;
+            cursor: pointer;
+        }
+        
+        .shuffle-btn:hover {
+            background: #f0f2ff;
+        }
+        
+        .similar-btn {
+            margin: 10px 8px 0 0;
+        }
+        
+        .similar-list {
+            margin-top: 8px;
+            color: #666;
+            font-size: 13px;
+            line-height: 1.6;
+        }
+        
         .example-box {
             background: #f8f9fa;
             padding: 20px;
@@ -461,6 +948,11 @@ def get_html_dashboard():
             <div class="search-box">
                 <input type="text" id="searchInput" placeholder="Search for an outcome (e.g., 'escalation', 'fraud', 'refund')">
                 <button onclick="search()">Search</button>
+                <select id="speakerSelect" onchange="if (currentOutcome) analyzeOutcome(currentOutcome)">
+                    <option value="">All speakers</option>
+                    <option value="customer">Customer turns</option>
+                    <option value="agent">Agent turns</option>
+                </select>
             </div>
             <div id="searchResults"></div>
         </div>
@@ -490,15 +982,29 @@ def get_html_dashboard():
             loadOutcomes();
         };
         
+        // Names, ids and turn text come from the data: they must never become
+        // markup. Quotes are escaped too, so the result is safe in attributes
+        function escapeHtml(value) {
+            const entities = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+            return String(value).replace(/[&<>"']/g, c => entities[c]);
+        }
+        
         function loadOutcomes() {
             fetch('/api/outcomes')
                 .then(r => r.json())
                 .then(outcomes => {
+                    // The server answers 503 until the data file has been read
+                    if (!Array.isArray(outcomes)) {
+                        document.getElementById('outcomesList').innerHTML =
+                            `<div class="loading"><div class="spinner"></div><p>Loading data (${escapeHtml(outcomes.stage)})...</p></div>`;
+                        setTimeout(loadOutcomes, 1000);
+                        return;
+                    }
                     let html = '';
                     outcomes.forEach(outcome => {
                         html += `
-                            <div class="outcome-item" onclick="analyzeOutcome('${outcome.name.replace(/'/g, "\\'")}')">
-                                <div class="outcome-name">${outcome.name}</div>
+                            <div class="outcome-item" data-name="${escapeHtml(outcome.name)}" onclick="analyzeOutcome(this.dataset.name)">
+                                <div class="outcome-name">${escapeHtml(outcome.name)}</div>
                                 <div class="outcome-stats">
                                     <span class="badge">${outcome.count} cases</span>
                                     <span style="margin-left: 10px;">${outcome.percent}% of all</span>
@@ -523,8 +1029,8 @@ def get_html_dashboard():
                     } else {
                         results.forEach(result => {
                             html += `
-                                <div class="search-result" onclick="analyzeOutcome('${result.name.replace(/'/g, "\\'")}')">
-                                    <strong>${result.name}</strong> (${result.count} cases)
+                                <div class="search-result" data-name="${escapeHtml(result.name)}" onclick="analyzeOutcome(this.dataset.name)">
+                                    <strong>${escapeHtml(result.name)}</strong> (${result.count} cases)
                                 </div>
                             `;
                         });
@@ -533,7 +1039,22 @@ def get_html_dashboard():
                 });
         }
         
+        let currentStream = null;
+        let currentOutcome = null;
+        let currentLift = null;
+        
+        function speakerQuery() {
+            // Counts, lift and examples can be limited to one speaker's turns
+            const speaker = document.getElementById('speakerSelect').value;
+            return speaker ? '&speaker=' + encodeURIComponent(speaker) : '';
+        }
+        
         function analyzeOutcome(outcomeName) {
+            // Closing the previous stream cancels its scan on the server
+            if (currentStream) {
+                currentStream.close();
+            }
+            
             // Show loading
             document.getElementById('resultsPanel').innerHTML = `
                 <div class="loading">
@@ -542,65 +1063,190 @@ def get_html_dashboard():
                 </div>
             `;
             
-            // Fetch analysis
-            fetch('/api/analyze?outcome=' + encodeURIComponent(outcomeName))
+            // Lift against the whole dataset comes from precomputed counts
+            currentOutcome = outcomeName;
+            currentLift = null;
+            fetch('/api/lift?outcome=' + encodeURIComponent(outcomeName) + speakerQuery())
                 .then(r => r.json())
-                .then(result => {
-                    if (!result) {
-                        document.getElementById('resultsPanel').innerHTML = '<div class="empty-state"><h3>No data found</h3></div>';
+                .then(rows => {
+                    if (currentOutcome !== outcomeName) {
                         return;
                     }
-                    
-                    let html = `
-                        <div class="result-header">
-                            <h2>${result.outcome}</h2>
-                            <div class="result-stat">Total Cases: <strong>${result.total_cases}</strong></div>
+                    currentLift = rows;
+                    const panel = document.getElementById('liftTable');
+                    if (panel) {
+                        panel.innerHTML = renderLift(rows);
+                    }
+                });
+            
+            // Stream analysis: partial counts arrive as chunks finish
+            const stream = new EventSource('/api/analyze/stream?outcome=' + encodeURIComponent(outcomeName) + speakerQuery());
+            currentStream = stream;
+            let received = false;
+            
+            stream.addEventListener('progress', e => {
+                received = true;
+                renderResult(JSON.parse(e.data));
+            });
+            
+            stream.addEventListener('result', e => {
+                received = true;
+                stream.close();
+                const result = JSON.parse(e.data);
+                if (!result) {
+                    document.getElementById('resultsPanel').innerHTML = '<div class="empty-state"><h3>No data found</h3></div>';
+                    return;
+                }
+                renderResult(result);
+            });
+            
+            stream.onerror = () => {
+                stream.close();
+                // Nothing arrived: the server is most likely still loading, so retry
+                if (!received && currentStream === stream) {
+                    document.getElementById('resultsPanel').innerHTML = `
+                        <div class="loading">
+                            <div class="spinner"></div>
+                            <p style="margin-top: 20px; color: #666;">Server is loading data or busy, retrying...</p>
                         </div>
                     `;
-                    
-                    // Signals
-                    if (Object.keys(result.signals).length > 0) {
-                        html += '<h3 style="color: #333; margin-bottom: 20px;">🎯 Why This Happens</h3>';
-                        html += '<div class="signals-grid">';
-                        
-                        for (const [category, data] of Object.entries(result.signals)) {
-                            html += `
-                                <div class="signal-card">
-                                    <h4>${category}</h4>
-                                    <div class="number">${data.count}</div>
-                                    <div class="percent">${data.percent}% of cases</div>
-                                </div>
-                            `;
+                    setTimeout(() => {
+                        if (currentStream === stream) {
+                            analyzeOutcome(outcomeName);
                         }
+                    }, 2000);
+                }
+            };
+        }
+        
+        function renderResult(result) {
+            let html = `
+                <div class="result-header">
+                    <h2>${escapeHtml(result.outcome)}</h2>
+                    ${result.speaker ? `<div class="result-stat">Only ${escapeHtml(result.speaker)} turns</div>` : ''}
+                    <div class="result-stat">Total Cases: <strong>${result.total_cases}</strong></div>
+                    ${result.partial ? `<div class="result-stat">⏱️ Time limit reached: based on ${result.scanned} of ${result.total_cases} conversations</div>` :
+                      result.scanned < result.total_cases ? `<div class="result-stat">Scanned ${result.scanned} of ${result.total_cases} conversations...</div>` : ''}
+                </div>
+            `;
+            
+            html += `<div id="liftTable">${currentLift ? renderLift(currentLift) : ''}</div>`;
+            
+            // Signals
+            if (Object.keys(result.signals).length > 0) {
+                html += '<h3 style="color: #333; margin-bottom: 20px;">🎯 Why This Happens</h3>';
+                html += '<div class="signals-grid">';
+                
+                for (const [category, data] of Object.entries(result.signals)) {
+                    html += `
+                        <div class="signal-card">
+                            <h4>${escapeHtml(category)}</h4>
+                            <div class="number">${data.count}</div>
+                            <div class="percent">${data.percent}% of cases</div>
+                        </div>
+                    `;
+                }
+                html += '</div>';
+            }
+            
+            // Examples
+            if (Object.keys(result.examples).length > 0) {
+                html += '<div class="examples-section">';
+                html += '<h3>💬 Evidence from Real Conversations</h3>';
+                
+                for (const [category, examples] of Object.entries(result.examples)) {
+                    if (examples && examples.length > 0) {
+                        html += `<div class="category-examples" data-outcome="${escapeHtml(result.outcome)}" data-category="${escapeHtml(category)}">`;
+                        html += `<h4>${escapeHtml(category)} <button class="shuffle-btn" onclick="shuffleExamples(this)">🔀 Shuffle</button></h4>`;
+                        html += `<div class="example-list">${renderExamples(examples)}</div>`;
                         html += '</div>';
                     }
-                    
-                    // Examples
-                    if (Object.keys(result.examples).length > 0) {
-                        html += '<div class="examples-section">';
-                        html += '<h3>💬 Evidence from Real Conversations</h3>';
-                        
-                        for (const [category, examples] of Object.entries(result.examples)) {
-                            if (examples && examples.length > 0) {
-                                html += `<div class="category-examples">`;
-                                html += `<h4>${category}</h4>`;
-                                
-                                examples.forEach(ex => {
-                                    html += `
-                                        <div class="example-box">
-                                            <div class="example-speaker">${ex.speaker}</div>
-                                            <div class="example-text">${ex.text}</div>
-                                        </div>
-                                    `;
-                                });
-                                
-                                html += '</div>';
-                            }
-                        }
-                        html += '</div>';
+                }
+                html += '</div>';
+            }
+            
+            document.getElementById('resultsPanel').innerHTML = html;
+        }
+        
+        function renderLift(rows) {
+            // Sharded servers and stores answer 501 here, with an error object
+            if (!Array.isArray(rows) || rows.length === 0) {
+                return '';
+            }
+            let html = '<h3 style="color: #333; margin-bottom: 20px;">📈 Compared With All Conversations</h3>';
+            html += '<table class="lift-table"><tr><th>Signal</th><th>This outcome</th><th>All conversations</th><th>Lift</th><th></th></tr>';
+            rows.forEach(row => {
+                const marker = row.significant ? (row.lift > 1 ? '⬆️ more common' : '⬇️ less common') : 'not significant';
+                html += `
+                    <tr class="${row.significant ? 'significant' : ''}">
+                        <td>${escapeHtml(row.category)}</td>
+                        <td>${row.percent}% <span class="ci">(${row.ci_low}–${row.ci_high}%)</span></td>
+                        <td>${row.baseline_percent}%</td>
+                        <td>${row.lift === null ? '-' : row.lift + '×'}</td>
+                        <td>${marker}</td>
+                    </tr>
+                `;
+            });
+            return html + '</table>';
+        }
+        
+        function renderExamples(examples) {
+            return examples.map(ex => `
+                <div class="example-box">
+                    <div class="example-speaker">${escapeHtml(ex.speaker)}</div>
+                    <div class="example-text">${escapeHtml(ex.text)}</div>
+                    <button class="shuffle-btn similar-btn" data-id="${escapeHtml(ex.transcript_id)}" onclick="showTranscript(this, this.dataset.id)">📄 Full conversation</button>
+                    <button class="shuffle-btn similar-btn" data-id="${escapeHtml(ex.transcript_id)}" onclick="showSimilar(this, this.dataset.id)">🔗 Similar conversations</button>
+                    <div class="similar-list"></div>
+                </div>
+            `).join('');
+        }
+        
+        function showSimilar(button, transcriptId) {
+            const list = button.parentElement.querySelector('.similar-list');
+            list.innerHTML = 'Looking for similar conversations...';
+            fetch('/api/similar?id=' + encodeURIComponent(transcriptId))
+                .then(r => r.json())
+                .then(data => {
+                    if (!data || !data.similar || data.similar.length === 0) {
+                        list.innerHTML = 'No similar conversations found.';
+                        return;
+                    }
+                    list.innerHTML = data.similar.map(s =>
+                        `<div><a href="#" data-id="${escapeHtml(s.transcript_id)}" onclick="showTranscript(this, this.dataset.id); return false;">${escapeHtml(s.transcript_id)}</a> · ${escapeHtml(s.intent)} · ${Math.round(s.similarity * 100)}% similar</div>`
+                    ).join('');
+                });
+        }
+        
+        function showTranscript(element, transcriptId, offset = 0) {
+            // Pages of 50 turns; the lookup by id is instant on the server
+            const list = element.closest('.example-box').querySelector('.similar-list');
+            fetch('/api/transcript?id=' + encodeURIComponent(transcriptId) + '&offset=' + offset + '&limit=50')
+                .then(r => r.json())
+                .then(data => {
+                    if (!data) {
+                        list.innerHTML = 'Conversation not found.';
+                        return;
+                    }
+                    let html = `<div><strong>${escapeHtml(data.transcript_id)}</strong> · ${escapeHtml(data.intent)} · ${escapeHtml(data.domain)}</div>`;
+                    html += data.turns.map(turn => `<div><strong>${escapeHtml(turn.speaker)}:</strong> ${escapeHtml(turn.text)}</div>`).join('');
+                    const next = data.offset + data.turns.length;
+                    if (next < data.turn_count) {
+                        html += `<a href="#" data-id="${escapeHtml(data.transcript_id)}" onclick="showTranscript(this, this.dataset.id, ${next}); return false;">Show more (${data.turn_count - next} turns left)</a>`;
                     }
-                    
-                    document.getElementById('resultsPanel').innerHTML = html;
+                    list.innerHTML = html;
+                });
+        }
+        
+        function shuffleExamples(button) {
+            // Draws another sample from the server's reservoir; nothing is rescanned
+            const box = button.closest('.category-examples');
+            const seed = Math.floor(Math.random() * 1e9);
+            fetch('/api/examples?outcome=' + encodeURIComponent(box.dataset.outcome) +
+                  '&category=' + encodeURIComponent(box.dataset.category) + '&seed=' + seed + speakerQuery())
+                .then(r => r.json())
+                .then(data => {
+                    box.querySelector('.example-list').innerHTML = renderExamples(data.examples);
                 });
         }
         
@@ -618,16 +1264,21 @@ def get_html_dashboard():
 """
 
 
-def start_server(port=8000):
-    """Start the web server"""
-    server = HTTPServer(('localhost', port), DashboardHandler)
-    print(f"🌐 Server running at http://localhost:{port}")
-    print(f"📊 Dashboard will open in your browser...")
+def start_server(port=8000, host='localhost', open_browser=True, on_bind=None):
+    """Start the web server (`on_bind` runs once the port is open)"""
+    server = ThreadingServer((host, port), DashboardHandler)
+    if on_bind is not None:
+        on_bind()
+    print(f"🌐 Server running at http://{host}:{port}")
+    if open_browser:
+        print(f"📊 Dashboard will open in your browser...")
     print(f"⚠️  Press Ctrl+C to stop the server")
     print()
     
     # Open browser
-    threading.Timer(1.5, lambda: webbrowser.open(f'http://localhost:{port}')).start()
+    if open_browser:
+        import webbrowser
+        threading.Timer(1.5, lambda: webbrowser.open(f'http://localhost:{port}')).start()
     
     try:
         server.serve_forever()
@@ -635,25 +1286,222 @@ def start_server(port=8000):
         print("\n\n✓ Server stopped")
 
 
-def main():
-    """Run the analyzer"""
+def serve_prefork(server, workers, load, lexicon_file=LEXICON_FILE, open_browser=False):
+    """Load once, then fork `workers` processes that all serve `server`'s socket
+    
+    `load` runs in this process before any worker exists, so the workers
+    share its data copy-on-write. The cyclic GC is off while loading (no
+    freed holes in the pages being shared) and the loaded heap is frozen
+    before forking, so collections never write to it, in the workers or
+    here; the GC is back on for both once the heap is frozen. This
+    process only supervises: a worker that dies is replaced, and all of them
+    are stopped on Ctrl+C or SIGTERM.
+    """
+    gc.disable()
+    load()
+    gc.collect()
+    gc.freeze()
+    gc.enable()
+    
+    # Every worker waits on the same socket; those that lose the race for a
+    # connection get EAGAIN from accept() and go back to waiting
+    server.socket.setblocking(False)
+    children = set()
+    
+    def spawn():
+        pid = os.fork()
+        if pid:
+            children.add(pid)
+            return
+        # The worker never returns into the caller's code
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            if ANALYZER is not None:
+                watch_lexicon(lexicon_file, reload_analyzer)
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except BaseException:
+            traceback.print_exc()
+            os._exit(1)
+        os._exit(0)
+    
+    for _ in range(workers):
+        spawn()
+    print(f"✓ {workers} workers serving (pids {', '.join(map(str, sorted(children)))})")
+    if open_browser:
+        import webbrowser
+        webbrowser.open(f'http://localhost:{server.server_address[1]}')
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            pid, _ = os.wait()
+            children.discard(pid)
+            print(f"⚠️  Worker {pid} exited; starting a new one")
+            time.sleep(WORKER_RESPAWN_DELAY)
+            spawn()
+    except (KeyboardInterrupt, SystemExit):
+        print("\n\n✓ Server stopped")
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ChildProcessError, ProcessLookupError):
+                pass
+
+
+def reload_analyzer(lexicon):
+    """Switch the analyzer to an edited lexicon and report what changed"""
+    summary = ANALYZER.reload_lexicon(lexicon)
+    print(f"🔄 Lexicon v{summary['version']} loaded "
+          f"(changed: {', '.join(summary['changed']) or 'none'}; "
+          f"removed: {', '.join(summary['removed']) or 'none'})")
+
+
+def load_analyzer(data_file, dedup=None, lexicon_file=LEXICON_FILE, warm=WARM_OUTCOMES,
+                  shard=None, watch=True):
+    """Load, index and warm the analyzer, reporting progress on STATUS
+    
+    With `shard` (index, count), only that contiguous slice of the dataset
+    is loaded, to serve it to a sharding coordinator. `watch` starts the
+    lexicon watcher here (pre-forked workers start their own). A SQLite
+    store from `ingest` is queried on disk instead.
+    """
+    global ANALYZER
+    
+    if os.path.isfile(data_file) and is_sqlite_store(data_file):
+        load_store(data_file)
+        return
+    
+    try:
+        STATUS.lexicon = load_lexicon(lexicon_file)
+        STATUS.update('reading')
+        transcripts = load_shard(data_file, *shard) if shard else load_transcripts(data_file)
+        STATUS.conversations = len(transcripts)
+        # Outcome counts are exact before indexing unless duplicates get dropped
+        if dedup is None:
+            STATUS.outcome_counts = Counter(conv['intent'] for conv in transcripts)
+        
+        analyzer = ConversationAnalyzer.from_transcripts(transcripts, dedup=dedup,
+                                                         lexicon=STATUS.lexicon,
+                                                         progress=STATUS.update)
+    except Exception as e:
+        STATUS.fail(e)
+        print(f"❌ Could not load {data_file}: {e}")
+        return
+    
+    STATUS.conversations = len(analyzer.conversations)
+    ANALYZER = analyzer
+    print(f"✓ Loaded {len(analyzer.conversations)} conversations")
+    if analyzer.duplicates:
+        print(f"✓ Skipped {len(analyzer.duplicates)} near-duplicate transcripts")
+    
+    # Pick up keyword edits without a restart
+    if watch:
+        watch_lexicon(lexicon_file, reload_analyzer)
+    
+    # The dashboard opens on the top outcomes, so have those ready first
+    STATUS.update('warming')
+    STATUS.warmed = analyzer.warm(warm)
+    STATUS.update('ready')
+    STATUS.ready.set()
+    print(f"✓ Ready in {time.monotonic() - STATUS.started:.1f}s")
+    
+    # Phrase and similarity indexes are built on first use; do it now instead
+    analyzer.phrase_miner()
+    analyzer.similarity_index()
+
+
+def load_store(data_file):
+    """Serve a SQLite store: nothing to index or warm, every query reads the disk"""
+    global ANALYZER
+    
+    try:
+        analyzer = SQLiteAnalyzer(data_file)
+    except (sqlite3.Error, ValueError) as e:
+        STATUS.fail(e)
+        print(f"❌ Could not open {data_file}: {e}")
+        return
+    
+    STATUS.lexicon = analyzer.lexicon
+    STATUS.conversations = analyzer.total
+    STATUS.outcome_counts = analyzer.outcome_counts
+    ANALYZER = analyzer
+    STATUS.update('ready')
+    STATUS.ready.set()
+    print(f"✓ Store ready, {analyzer.total} conversations, "
+          f"in {time.monotonic() - STATUS.started:.1f}s")
+
+
+def load_sharded(shard_urls):
+    """Wait for the shard servers, then serve their merged data"""
     global ANALYZER
     
+    STATUS.update('waiting for shards')
+    try:
+        analyzer = ShardedAnalyzer.connect(shard_urls)
+        STATUS.lexicon = analyzer.lexicon
+    except ShardError as e:
+        STATUS.fail(e)
+        print(f"❌ Could not start: {e}")
+        return
+    
+    STATUS.conversations = analyzer.total
+    STATUS.outcome_counts = analyzer.outcome_counts
+    ANALYZER = analyzer
+    STATUS.update('ready')
+    STATUS.ready.set()
+    print(f"✓ {len(shard_urls)} shards ready, {analyzer.total} conversations, "
+          f"in {time.monotonic() - STATUS.started:.1f}s")
+
+
+def main(data_file=DEFAULT_DATA_FILE, port=8000, host='localhost', open_browser=True, dedup=None,
+         lexicon_file=LEXICON_FILE, shard=None, shard_urls=None, workers=None):
+    """Run the analyzer
+    
+    `shard` (index, count) serves one slice of the dataset to a coordinator;
+    `shard_urls` makes this server the coordinator of those shard servers,
+    listed in slice order, instead of loading data itself. `workers` serves
+    from that many pre-forked processes sharing one loaded copy of the data.
+    """
     print()
     print("=" * 60)
     print("  🔍 INTERACTIVE CONVERSATION ANALYZER")
     print("=" * 60)
     print()
     
-    # Load data
-    print("Loading conversation data...")
-    data_file = '/mnt/user-data/uploads/Conversational_Transcript_Dataset.json'
-    ANALYZER = ConversationAnalyzer(data_file)
-    print(f"✓ Loaded {len(ANALYZER.conversations)} conversations")
-    print()
+    # Load data in the background so the port is open right away;
+    # /readyz turns 200 once the top outcomes are analyzed
+    STATUS.data_file = data_file
+    
+    if workers:
+        # Connections made while loading wait in the listen backlog
+        server = ThreadingServer((host, port), DashboardHandler)
+        print(f"🌐 Server listening at http://{host}:{port}")
+        print(f"Loading conversation data, then starting {workers} workers...")
+        print(f"⚠️  Press Ctrl+C to stop the server")
+        print()
+        load = lambda: load_analyzer(data_file, dedup, lexicon_file, WARM_OUTCOMES, shard, watch=False)
+        serve_prefork(server, workers, load, lexicon_file, open_browser)
+        return
+    
+    def start_loading():
+        if shard_urls:
+            print(f"Coordinating {len(shard_urls)} shards: {', '.join(shard_urls)}")
+            threading.Thread(target=load_sharded, args=(shard_urls,), daemon=True).start()
+            return
+        if shard:
+            print(f"Loading slice {shard[0] + 1} of {shard[1]} in the background...")
+        else:
+            print("Loading conversation data in the background...")
+        threading.Thread(target=load_analyzer,
+                         args=(data_file, dedup, lexicon_file, WARM_OUTCOMES, shard),
+                         daemon=True).start()
     
     # Start server
-    start_server(port=8000)
+    start_server(port=port, host=host, open_browser=open_browser, on_bind=start_loading)
 
 
 if __name__ == '__main__':
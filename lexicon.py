@@ -0,0 +1,92 @@
+
+import json
+import os
+import threading
+import traceback
+
+
+# Signal categories and their keywords, shared by both analyzers
+LEXICON_FILE = os.environ.get(
+    'SIGNAL_LEXICON', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicon.json')
+)
+
+# Seconds between checks of the lexicon file while the dashboard runs
+LEXICON_POLL_INTERVAL = 2.0
+
+# Categories are bits of a 64-bit mask
+MAX_CATEGORIES = 64
+
+
+class LexiconError(ValueError):
+    """A lexicon file is missing fields or malformed"""
+
+
+def validate_lexicon(lexicon):
+    """Check {'version': int, 'categories': {name: [keyword, ...]}}; returns it"""
+    if not isinstance(lexicon, dict) or not isinstance(lexicon.get('categories'), dict):
+        raise LexiconError('lexicon needs a "categories" object')
+    if not isinstance(lexicon.get('version'), int):
+        raise LexiconError('lexicon needs an integer "version"')
+    
+    categories = lexicon['categories']
+    if len(categories) > MAX_CATEGORIES:
+        raise LexiconError(f'at most {MAX_CATEGORIES} categories are supported')
+    for name, keywords in categories.items():
+        if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+            raise LexiconError(f'keywords of {name!r} must be a list of strings')
+    return lexicon
+
+
+def load_lexicon(path=LEXICON_FILE):
+    """Read and validate a lexicon file"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lexicon = json.load(f)
+    except json.JSONDecodeError as e:
+        raise LexiconError(f'{path}: {e}') from e
+    return validate_lexicon(lexicon)
+
+
+def changed_categories(old, new):
+    """Categories of `new` that are added or have different keywords than in `old`"""
+    previous = old['categories']
+    return {
+        name for name, keywords in new['categories'].items()
+        if previous.get(name) != keywords
+    }
+
+
+def watch_lexicon(path, on_change, interval=LEXICON_POLL_INTERVAL):
+    """Call on_change(lexicon) whenever the file at `path` is modified
+
+    Polls the modification time from a daemon thread. An unreadable or
+    invalid edit is reported and skipped, keeping the current lexicon; so
+    is any error raised by on_change, and polling carries on. Returns an
+    Event that stops the watcher when set.
+    """
+    stop = threading.Event()
+    
+    def mtime():
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def poll():
+        seen = mtime()
+        while not stop.wait(interval):
+            current = mtime()
+            if current == seen or current is None:
+                continue
+            seen = current
+            try:
+                on_change(load_lexicon(path))
+            except (OSError, LexiconError) as e:
+                print(f"⚠️  Lexicon not reloaded: {e}")
+            except Exception as e:
+                # A bug in on_change must not stop the watcher for good
+                print(f"⚠️  Lexicon not reloaded: {type(e).__name__}: {e}")
+                traceback.print_exc()
+    
+    threading.Thread(target=poll, daemon=True).start()
+    return stop
@@ -0,0 +1,161 @@
+
+import math
+import time
+from collections import Counter
+
+from significance import Z_95
+from sketches import CountMinSketch, SpaceSaving
+
+
+# Memory budget: heavy-hitter counters kept per outcome, and the corpus-wide
+# Count-Min sketch's accuracy (overestimate <= epsilon * total, w.p. 1 - delta)
+PHRASE_COUNTERS = 2000
+PHRASE_EPSILON = 1e-4
+PHRASE_DELTA = 0.01
+
+# Longest phrase, in words
+MAX_PHRASE_WORDS = 3
+
+# Conversations counted exactly before folding into the sketches
+PHRASE_BATCH_SIZE = 1000
+
+# Weight of the prior, in conversations: how far small counts are pulled
+# toward the phrase's corpus-wide rate when scoring
+PHRASE_PRIOR_WEIGHT = 100
+
+# Rough bytes per Space-Saving counter (dict entry, heap entry, key, list)
+BYTES_PER_COUNTER = 200
+
+
+class PhraseMiner:
+    """Phrases that set one outcome apart, mined in bounded memory
+
+    Each conversation contributes every distinct 1..MAX_PHRASE_WORDS-word
+    phrase of its turns once. Per outcome, a Space-Saving summary keeps the
+    most frequent phrases; a corpus-wide Count-Min sketch estimates how often
+    each appears anywhere, so phrases can be ranked by how much more common
+    they are in the outcome than in the rest of the data.
+    """
+
+    def __init__(self, vocab, counters=PHRASE_COUNTERS, epsilon=PHRASE_EPSILON,
+                 delta=PHRASE_DELTA, max_words=MAX_PHRASE_WORDS, batch_size=PHRASE_BATCH_SIZE):
+        self.vocab = vocab
+        self.counters = counters
+        self.max_words = max_words
+        self.batch_size = batch_size
+        self.outcomes = {}
+        self.conversations = Counter()
+        self.corpus = CountMinSketch(epsilon, delta)
+        self._pending = {}
+        self._pending_size = 0
+    
+    @classmethod
+    def from_index(cls, corpus_index, transcripts, deadline=None, **options):
+        """Mine every conversation of an already tokenized corpus
+        
+        Raises TimeoutError once `deadline` (a time.monotonic() value) passes.
+        """
+        miner = cls(corpus_index.vocab, **options)
+        for ordinal, conv in enumerate(transcripts):
+            if deadline is not None and ordinal % miner.batch_size == 0 and time.monotonic() >= deadline:
+                raise TimeoutError('phrase mining ran past its deadline')
+            miner.add(conv['intent'], corpus_index.turns(ordinal))
+        miner.flush()
+        return miner
+    
+    def add(self, outcome, turns):
+        """Count one conversation's phrases (token-id sequences per turn)"""
+        phrases = set()
+        for tokens in turns:
+            for n in range(1, self.max_words + 1):
+                phrases.update([tokens[i:i + n] for i in range(len(tokens) - n + 1)])
+        
+        # Exact counts for a batch of conversations, folded into the sketches
+        # in one go: repeated phrases cost one sketch update per batch
+        pending = self._pending.get(outcome)
+        if pending is None:
+            pending = self._pending[outcome] = Counter()
+        pending.update(phrases)
+        self.conversations[outcome] += 1
+        
+        self._pending_size += 1
+        if self._pending_size >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        batch = Counter()
+        for outcome, counts in self._pending.items():
+            summary = self.outcomes.get(outcome)
+            if summary is None:
+                summary = self.outcomes[outcome] = SpaceSaving(self.counters)
+            summary.update_counts(counts)
+            batch.update(counts)
+        self.corpus.update_counts(batch)
+        self._pending = {}
+        self._pending_size = 0
+    
+    def memory_estimate(self):
+        """Approximate bytes held by the summaries and the sketch"""
+        counters = sum(len(summary) for summary in self.outcomes.values())
+        return counters * BYTES_PER_COUNTER + self.corpus.size_in_bytes()
+    
+    def discriminative(self, outcome, limit=20, min_count=5, min_score=Z_95):
+        """Phrases most over-represented in `outcome`, by z-scored log-odds ratio
+
+        The log-odds ratio of a phrase in the outcome against the rest is
+        smoothed with an informative prior (the phrase's corpus-wide rate,
+        as in Monroe et al.'s "Fightin' Words") and divided by its standard
+        error. Near-universal words then score low however common they are,
+        and phrases below `min_score` (not significant at 95% by default)
+        are left out. Uses the guaranteed lower bound of the outcome count
+        and the sketch's upper bound for the rest, so scores err on the
+        conservative side. `conversations` and `percent` are that lower
+        bound too; the true count is at most `conversations` + `error`.
+        """
+        summary = self.outcomes.get(outcome)
+        if summary is None:
+            return []
+        
+        size = self.conversations[outcome]
+        total = sum(self.conversations.values())
+        rest_size = total - size
+        
+        rows = []
+        for phrase, count, error in summary.items():
+            inside = count - error
+            if inside < min_count:
+                continue
+            outside = min(max(self.corpus.estimate(phrase) - inside, 0), rest_size)
+            # Prior pseudo-counts split by how many conversations have the phrase overall
+            with_prior = PHRASE_PRIOR_WEIGHT * (inside + outside) / total
+            without_prior = PHRASE_PRIOR_WEIGHT - with_prior
+            odds = [
+                (inside + with_prior, size - inside + without_prior),
+                (outside + with_prior, rest_size - outside + without_prior)
+            ]
+            if not all(odds[0]) or not all(odds[1]):
+                continue
+            log_odds = math.log(odds[0][0] / odds[0][1]) - math.log(odds[1][0] / odds[1][1])
+            score = log_odds / math.sqrt(sum(1 / n for pair in odds for n in pair))
+            if score < min_score:
+                continue
+            rows.append({
+                'phrase': ' '.join(self.vocab.decode(phrase)),
+                'conversations': inside,
+                'error': error,
+                'percent': round(inside / size * 100, 1),
+                'rest_percent': round(outside / rest_size * 100, 1) if rest_size else 0.0,
+                'score': round(score, 3)
+            })
+        
+        rows.sort(key=lambda row: -row['score'])
+        return rows[:limit]
+    
+    def error_bounds(self, outcome):
+        """Worst-case overcount of an outcome count and of a corpus estimate"""
+        summary = self.outcomes.get(outcome)
+        return {
+            'outcome': summary.error_bound() if summary else 0,
+            'corpus': self.corpus.error_bound(),
+            'corpus_confidence': 1 - self.corpus.delta
+        }
@@ -0,0 +1,338 @@
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.client import HTTPConnection, HTTPException
+from urllib.parse import urlencode, urlparse
+
+from columnar import is_columnar, read_row_count
+from conversation_analyzer import QUICK_ANALYSIS_SIZE, iter_transcripts, search_counts, top_outcomes
+from corpus_index import EXAMPLE_RESERVOIR_SIZE
+from sketches import Reservoir
+from snapshot import is_snapshot, read_snapshot_header
+
+
+# Seconds to wait for one shard answer; full analyses pass their own budget
+SHARD_TIMEOUT = 30.0
+
+# Seconds to wait for every shard to finish loading, and between checks
+SHARD_START_TIMEOUT = 600.0
+SHARD_POLL_INTERVAL = 0.5
+
+# Threads fanning requests out to the shards, shared by all requests
+FANOUT_WORKERS = 32
+
+# Seconds between checks that the caller still wants the shards' answers
+CANCEL_POLL_INTERVAL = 0.1
+
+
+class ShardError(Exception):
+    """A shard could not be reached or did not answer with 200"""
+
+
+def shard_range(total, shard, shards):
+    """[start, end) ordinals of contiguous slice `shard` out of `shards`"""
+    return total * shard // shards, total * (shard + 1) // shards
+
+
+def count_transcripts(data_file):
+    """Transcripts in a dataset, from the header or metadata when there is one"""
+    if is_snapshot(data_file):
+        return read_snapshot_header(data_file)['total']
+    if is_columnar(data_file):
+        return read_row_count(data_file)
+    return sum(1 for _ in iter_transcripts(data_file))
+
+
+def load_shard(data_file, shard, shards):
+    """Transcripts of one contiguous slice, in file order, without loading the rest
+    
+    Slices are contiguous so that, merged in slice order, outcome counts and
+    examples break ties exactly as a single analyzer over the whole file does.
+    A JSON dataset is streamed twice: once to count, once to keep the slice.
+    """
+    start, end = shard_range(count_transcripts(data_file), shard, shards)
+    # Snapshots come back grouped by outcome, everything else in file order
+    ordered = not is_snapshot(data_file)
+    
+    pairs = []
+    for ordinal, conv in iter_transcripts(data_file):
+        if start <= ordinal < end:
+            pairs.append((ordinal, conv))
+        elif ordered and ordinal >= end:
+            break
+    pairs.sort(key=lambda pair: pair[0])
+    return [conv for _, conv in pairs]
+
+
+def merge_examples(partials, category, k=3, seed=None):
+    """Examples of `category` as one reservoir over every shard's data would give them
+    
+    Reservoir priorities hash the transcript id, not positions, so the lowest
+    priorities across the shards' reservoirs are the global reservoir.
+    """
+    reservoir = Reservoir(EXAMPLE_RESERVOIR_SIZE)
+    examples = []
+    for partial in partials:
+        for priority, example in partial['reservoirs'].get(category, []):
+            # Ties fall back to position, i.e. slice order, as ordinals do
+            reservoir.offer(priority, len(examples))
+            examples.append(example)
+    return [examples[i] for i in reservoir.sample(k, seed)]
+
+
+def merge_analyses(partials, shuffle=None, full=False):
+    """One analysis result from the shards' partial_analysis answers, in slice order"""
+    partials = [partial for partial in partials if partial is not None]
+    if not partials:
+        return None
+    
+    # Counter keeps first-insertion order: first hit in slice order, as a single scan
+    signals = Counter()
+    for partial in partials:
+        for category, count in partial['signals']:
+            signals[category] += count
+    scanned = sum(partial['scanned'] for partial in partials)
+    
+    result = {
+        'outcome': partials[0]['outcome'],
+        'speaker': partials[0]['speaker'],
+        'total_cases': sum(partial['total_cases'] for partial in partials),
+        'signals': {
+            cat: {
+                'count': count,
+                'percent': round(count / scanned * 100, 1)
+            }
+            for cat, count in signals.items()
+        },
+        'examples': {cat: merge_examples(partials, cat, seed=shuffle) for cat in signals}
+    }
+    if full:
+        result['scanned'] = scanned
+        result['partial'] = any(partial['partial'] for partial in partials)
+    return result
+
+
+class ShardClient:
+    """JSON over HTTP/1.1 to one shard server, one keep-alive connection per thread"""
+    
+    def __init__(self, url, timeout=SHARD_TIMEOUT):
+        parsed = urlparse(url if '://' in url else f'http://{url}')
+        self.url = url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+    
+    def request(self, path, params=None, timeout=None):
+        """(status, decoded JSON body); ShardError if the shard can't be reached"""
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        timeout = timeout or self.timeout
+        
+        connection = getattr(self._local, 'connection', None)
+        # A kept-alive connection may have been closed by the shard meanwhile
+        retry = connection is not None
+        while True:
+            if connection is None:
+                connection = self._local.connection = HTTPConnection(self.host, self.port,
+                                                                     timeout=timeout)
+            try:
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                connection.request('GET', path)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (OSError, HTTPException) as e:
+                connection.close()
+                connection = self._local.connection = None
+                if not retry or isinstance(e, TimeoutError):
+                    raise ShardError(f'shard {self.url}: {e or type(e).__name__}') from e
+                retry = False
+        
+        try:
+            return response.status, json.loads(body)
+        except ValueError:
+            raise ShardError(f'shard {self.url} answered {response.status} without JSON') from None
+    
+    def get(self, path, params=None, timeout=None):
+        """Decoded JSON answer; ShardError unless the status is 200"""
+        status, payload = self.request(path, params, timeout)
+        if status != 200:
+            error = payload.get('error') if isinstance(payload, dict) else None
+            raise ShardError(f'shard {self.url} answered {status}: {error or payload}')
+        return payload
+
+
+class ShardedAnalyzer:
+    """Scatter-gather front for shard servers that each hold one slice of the data
+    
+    `urls` lists the shard servers in slice order, slice 0 first. Outcome
+    counts are gathered once, so outcomes and search are answered locally;
+    analyses and examples fan out to the shards holding the outcome and
+    merge their partial counts and reservoirs. Results equal those of one
+    ConversationAnalyzer over the whole dataset.
+    """
+    
+    def __init__(self, urls, timeout=SHARD_TIMEOUT):
+        self.shards = [ShardClient(url, timeout) for url in urls]
+        self._pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS)
+        self.shard_counts = [Counter(dict(counts)) for counts in self._gather('/api/shard/counts')]
+        self.outcome_counts = Counter()
+        for counts in self.shard_counts:
+            self.outcome_counts.update(counts)
+        self.total = sum(self.outcome_counts.values())
+    
+    @classmethod
+    def connect(cls, urls, timeout=SHARD_TIMEOUT, start_timeout=SHARD_START_TIMEOUT):
+        """Wait for every shard to be ready, then build the analyzer"""
+        shards = [ShardClient(url, timeout) for url in urls]
+        waiting = list(shards)
+        give_up = time.monotonic() + start_timeout
+        while waiting:
+            for shard in list(waiting):
+                try:
+                    status, summary = shard.request('/readyz')
+                except ShardError:
+                    # Not listening yet
+                    continue
+                if status == 200:
+                    waiting.remove(shard)
+                elif summary.get('error'):
+                    raise ShardError(f"shard {shard.url} failed to load: {summary['error']}")
+            if waiting and time.monotonic() > give_up:
+                raise ShardError(f"shards not ready after {start_timeout:.0f}s: "
+                                 f"{', '.join(shard.url for shard in waiting)}")
+            if waiting:
+                time.sleep(SHARD_POLL_INTERVAL)
+        return cls(urls, timeout)
+    
+    def _gather(self, path, params=None, shards=None, timeout=None):
+        """Every listed shard's answer, in slice order"""
+        shards = self.shards if shards is None else shards
+        futures = [self._pool.submit(shard.get, path, params, timeout) for shard in shards]
+        return [future.result() for future in futures]
+    
+    @property
+    def lexicon(self):
+        """The first shard's lexicon (every shard should be started with the same one)"""
+        return self.shards[0].get('/api/lexicon')
+    
+    def get_all_outcomes(self):
+        """Get list of all outcomes"""
+        return top_outcomes(self.outcome_counts)
+    
+    def search_outcomes(self, query):
+        """Find outcomes by name"""
+        return search_counts(self.outcome_counts, query)
+    
+    def _partials(self, outcome_name, speaker=None, limits=None, deadline=None, shuffle=None,
+                  cancel=None):
+        """partial_analysis of every shard holding the outcome, in slice order
+        
+        Returns None, without waiting for the rest, once `cancel` (anything
+        with `is_set()`) is set between shard answers.
+        """
+        holding = [i for i, counts in enumerate(self.shard_counts) if counts[outcome_name]]
+        params = {'outcome': outcome_name}
+        if speaker is not None:
+            params['speaker'] = speaker
+        if shuffle is not None:
+            # Shards skip their cache for a reshuffle, as a single analyzer does
+            params['shuffle'] = shuffle
+        timeout = None
+        if deadline is not None:
+            # Shards stop at the budget and return what they have; allow for the trip back
+            budget = max(deadline - time.monotonic(), 0.0)
+            params['budget'] = f'{budget:.3f}'
+            timeout = budget + SHARD_TIMEOUT
+        
+        futures = []
+        for i in holding:
+            shard_params = dict(params)
+            if limits is not None:
+                shard_params['limit'] = limits[i]
+            futures.append(self._pool.submit(self.shards[i].get, '/api/shard/analyze',
+                                             shard_params, timeout))
+        
+        pending = set(futures)
+        while pending:
+            if cancel is not None and cancel.is_set():
+                # Shards still scanning stop at their budget; nobody reads their answers
+                for future in pending:
+                    future.cancel()
+                return None
+            done, pending = wait(pending, CANCEL_POLL_INTERVAL, FIRST_COMPLETED)
+            for future in done:
+                # A failed shard fails the whole request straight away
+                future.result()
+        return [future.result() for future in futures]
+    
+    def analyze(self, outcome_name, shuffle=None, speaker=None, full=False, deadline=None,
+                cancel=None):
+        """Analyze a specific outcome across the shards (see ConversationAnalyzer.analyze)"""
+        if not self.outcome_counts[outcome_name]:
+            return None
+        
+        limits = None
+        if not full:
+            # The first QUICK_ANALYSIS_SIZE conversations, taken from the slices in order
+            limits = []
+            remaining = QUICK_ANALYSIS_SIZE
+            for counts in self.shard_counts:
+                limit = min(counts[outcome_name], remaining)
+                limits.append(limit)
+                remaining -= limit
+        
+        partials = self._partials(outcome_name, speaker, limits, deadline, shuffle, cancel)
+        if partials is None:
+            return None
+        return merge_analyses(partials, shuffle, full)
+    
+    def analyze_stream(self, outcome_name, chunk_size=None, cancel=None, shuffle=None,
+                       speaker=None, deadline=None):
+        """The full analysis as a single 'result' event (shards don't report progress)"""
+        yield 'result', self.analyze(outcome_name, shuffle=shuffle, speaker=speaker, full=True,
+                                     deadline=deadline, cancel=cancel)
+    
+    def examples(self, outcome_name, category, k=3, seed=None, speaker=None):
+        """Up to k matching turns sampled uniformly from the whole outcome"""
+        if not self.outcome_counts[outcome_name]:
+            return []
+        limits = [0] * len(self.shards)
+        partials = self._partials(outcome_name, speaker, limits)
+        return merge_examples(partials, category, k, seed)
+    
+    def get_transcript(self, transcript_id, offset=0, limit=None):
+        """One transcript from whichever shard holds it"""
+        params = {'id': transcript_id, 'offset': offset}
+        if limit is not None:
+            params['limit'] = limit
+        for page in self._gather('/api/transcript', params):
+            if page is not None:
+                return page
+        return None
+
+
+def spawn_shards(data_file, shards, port, lexicon_file, host='127.0.0.1'):
+    """Start `shards` local shard servers on the ports after `port`; returns (processes, urls)"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'START_HERE.py')
+    processes = []
+    urls = []
+    for shard in range(shards):
+        shard_port = port + 1 + shard
+        command = [
+            sys.executable, script, '--data', data_file, '--lexicon', lexicon_file,
+            'serve', '--shard', f'{shard}/{shards}', '--host', host, '--port', str(shard_port),
+            '--no-browser'
+        ]
+        processes.append(subprocess.Popen(command, stdout=subprocess.DEVNULL))
+        urls.append(f'http://{host}:{shard_port}')
+    return processes, urls
@@ -0,0 +1,97 @@
+
+import math
+
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959963984540054
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Wilson score interval for a proportion (stays inside [0, 1] for small n)"""
+    if not trials:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def chi_square_2x2(a, b, c, d):
+    """Pearson chi-square (1 dof) and its p-value for [[a, b], [c, d]]"""
+    n = a + b + c + d
+    rows = (a + b) * (c + d)
+    cols = (a + c) * (b + d)
+    if not rows or not cols:
+        return 0.0, 1.0
+    chi2 = n * (a * d - b * c) ** 2 / (rows * cols)
+    # Survival function of chi-square with one degree of freedom
+    return chi2, math.erfc(math.sqrt(chi2 / 2))
+
+
+def benjamini_hochberg(p_values):
+    """False-discovery-rate adjusted p-values (q-values), in input order"""
+    order = sorted(range(len(p_values)), key=p_values.__getitem__, reverse=True)
+    q_values = [0.0] * len(p_values)
+    running = 1.0
+    for rank, i in zip(range(len(p_values), 0, -1), order):
+        running = min(running, p_values[i] * len(p_values) / rank)
+        q_values[i] = running
+    return q_values
+
+
+def category_counts(histogram, size):
+    """Conversations per category from a {mask: conversations} histogram"""
+    counts = [0] * size
+    for mask, n in histogram.items():
+        while mask:
+            low = mask & -mask
+            counts[low.bit_length() - 1] += n
+            mask ^= low
+    return counts
+
+
+def lift_table(signal_index, speaker=None):
+    """Every outcome × category against the corpus baseline
+
+    Works on the per-outcome mask histograms only, so the whole table costs
+    O(outcomes × distinct masks) regardless of corpus size. Each row has the
+    outcome's rate with a 95% Wilson interval, the corpus-wide rate, lift
+    (rate / baseline), a chi-square test of outcome vs the rest of the corpus,
+    and a Benjamini-Hochberg q-value across all rows. With `speaker`, a
+    conversation counts when that role's turns match.
+    """
+    categories = signal_index.categories
+    histograms, corpus = signal_index.tallies(speaker)
+    total = sum(corpus.values())
+    corpus_counts = category_counts(corpus, len(categories))
+    
+    rows = []
+    for outcome, histogram in histograms.items():
+        size = sum(histogram.values())
+        counts = category_counts(histogram, len(categories))
+        for i, category in enumerate(categories):
+            hits = counts[i]
+            rest_hits = corpus_counts[i] - hits
+            rest_size = total - size
+            baseline = corpus_counts[i] / total if total else 0.0
+            rate = hits / size if size else 0.0
+            low, high = wilson_interval(hits, size)
+            chi2, p_value = chi_square_2x2(hits, size - hits, rest_hits, rest_size - rest_hits)
+            rows.append({
+                'outcome': outcome,
+                'category': category,
+                'conversations': size,
+                'hits': hits,
+                'rate': rate,
+                'rate_low': low,
+                'rate_high': high,
+                'baseline': baseline,
+                'lift': rate / baseline if baseline else None,
+                'chi2': chi2,
+                'p_value': p_value
+            })
+    
+    for row, q_value in zip(rows, benjamini_hochberg([row['p_value'] for row in rows])):
+        row['q_value'] = q_value
+    return rows
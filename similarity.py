@@ -0,0 +1,154 @@
+
+import bisect
+import operator
+from array import array
+
+
+# Signature size and LSH banding: 16 bands of 4 hashes make pairs with
+# Jaccard similarity above ~0.5 likely to share a bucket
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# Near-duplicate detection bands more strictly: 8 bands of 8 hashes keep
+# candidates to pairs above ~0.77, so buckets stay small
+DEDUP_BANDS = 8
+
+# Shingle length, in words
+SHINGLE_WORDS = 3
+
+
+class MinHashIndex:
+    """MinHash signatures of conversations plus an LSH bucket index
+
+    Signatures use one-permutation hashing: every word shingle is hashed
+    once and the smallest hash in each of `permutations` bins is kept, so
+    building one costs a few C-level passes instead of one per permutation.
+    Conversations sharing any band of their signature are candidates; the
+    fraction of equal bins estimates their Jaccard similarity. Shingles are
+    hashed as tuples of token ids: Python hashes ints and tuples of them
+    without a per-process seed, so signatures and buckets are the same in
+    every run, whatever PYTHONHASHSEED is.
+    """
+
+    def __init__(self, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS):
+        if permutations % bands:
+            raise ValueError('permutations must be a multiple of bands')
+        self.permutations = permutations
+        self.bands = bands
+        self.rows = permutations // bands
+        self.signatures = []
+        self.buckets = [{} for _ in range(bands)]
+    
+    @classmethod
+    def from_index(cls, corpus_index, **options):
+        """Index every conversation of a tokenized corpus"""
+        index = cls(**options)
+        for turns in corpus_index.turn_tokens:
+            index.add(turns)
+        return index
+    
+    @classmethod
+    def from_signatures(cls, signatures, **options):
+        """Index already computed signatures (same permutation count)"""
+        index = cls(**options)
+        for signature in signatures:
+            index.add(None, signature)
+        return index
+    
+    def signature(self, turns):
+        """MinHash signature of one conversation's token-id sequences"""
+        # Token ids, with 0 between turns
+        codes = list(map(ord, '\x00'.join(turns)))
+        shingles = set(zip(*(codes[i:] for i in range(SHINGLE_WORDS)))) or {tuple(codes)}
+        hashes = sorted(set(map(hash, shingles)), reverse=True)
+        
+        # Descending order, so for each bin the last write (the minimum) wins
+        k = self.permutations
+        bins = dict(zip(map(k.__rmod__, hashes), hashes))
+        
+        # Empty bins borrow from the next filled bin (rotation densification)
+        filled = sorted(bins)
+        if len(filled) < k:
+            for i in range(k):
+                if i not in bins:
+                    j = bisect.bisect_left(filled, i)
+                    bins[i] = bins[filled[j] if j < len(filled) else filled[0]]
+        return array('q', map(bins.__getitem__, range(k)))
+    
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[b * rows:(b + 1) * rows])) for b in range(self.bands)]
+    
+    def add(self, turns, signature=None):
+        """Index one conversation; returns its position"""
+        if signature is None:
+            signature = self.signature(turns)
+        position = len(self.signatures)
+        self.signatures.append(signature)
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            members = bucket.get(key)
+            if members is None:
+                bucket[key] = [position]
+            else:
+                members.append(position)
+        return position
+    
+    def estimate(self, a, b):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(map(operator.eq, a, b)) / self.permutations
+    
+    def candidates(self, signature):
+        """Positions sharing at least one band with `signature`"""
+        found = set()
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            members = bucket.get(key)
+            if members:
+                found.update(members)
+        return found
+    
+    def similar(self, position, limit=10, threshold=0.5):
+        """[(position, similarity)] of the most similar other conversations"""
+        signature = self.signatures[position]
+        matches = []
+        for candidate in self.candidates(signature):
+            if candidate == position:
+                continue
+            score = self.estimate(signature, self.signatures[candidate])
+            if score >= threshold:
+                matches.append((candidate, score))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+    
+    def find_duplicate(self, signature, threshold):
+        """Position of an indexed near-duplicate of `signature`, or None"""
+        best = None
+        for candidate in sorted(self.candidates(signature)):
+            score = self.estimate(signature, self.signatures[candidate])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best[0] if best else None
+
+
+def deduplicate(corpus_index, threshold, bands=DEDUP_BANDS, **options):
+    """Drop conversations that nearly duplicate an earlier one
+
+    Conversations shorter than one shingle (SHINGLE_WORDS words) are always
+    kept: they have no shingles to compare, so they would all look alike.
+    Returns (kept ordinals, {dropped ordinal: kept ordinal it duplicates},
+    MinHashIndex over the kept conversations in order).
+    """
+    index = MinHashIndex(bands=bands, **options)
+    kept = []
+    dropped = {}
+    for ordinal, turns in enumerate(corpus_index.turn_tokens):
+        signature = index.signature(turns)
+        if sum(map(len, turns)) < SHINGLE_WORDS:
+            match = None
+        else:
+            match = index.find_duplicate(signature, threshold)
+        if match is None:
+            index.add(turns, signature)
+            kept.append(ordinal)
+        else:
+            dropped[ordinal] = kept[match]
+    return kept, dropped, index
@@ -1,70 +1,114 @@
 
+import base64
+import hashlib
+import html as html_lib
 import json
+import os
+import re
+import zlib
 from collections import Counter, defaultdict
 
+from corpus_index import CorpusIndex, SignalIndex
+from defaults import DEFAULT_DATA_FILE
+from lexicon import LEXICON_FILE, changed_categories, load_lexicon, validate_lexicon
+
+
+# Bump when the report layout changes so every report is regenerated
+REPORT_VERSION = 3
+
+
+def outcome_stats(outcome_counts):
+    """Basic statistics from a Counter of conversations per outcome"""
+    stats = {
+        'total': sum(outcome_counts.values()),
+        'outcomes': len(outcome_counts),
+        'top_outcomes': []
+    }
+    
+    for outcome, count in outcome_counts.most_common(10):
+        stats['top_outcomes'].append({
+            'name': outcome,
+            'count': count,
+            'percent': round(count / stats['total'] * 100, 1)
+        })
+    
+    return stats
+
 
 class SimpleConversationAnalyzer:
     """Easy-to-use conversation analyzer"""
     
-    def __init__(self, data_file):
+    def __init__(self, data_file, lexicon=None):
         """Load the conversation data"""
-        print("Loading conversations...")
-        with open(data_file, 'r') as f:
-            data = json.load(f)
+        # Imported here: `stats` uses this module without loading any transcripts
+        from conversation_analyzer import load_transcripts
         
-        self.conversations = data['transcripts']
+        print("Loading conversations...")
+        self._organize(load_transcripts(data_file), lexicon)
         print(f"✓ Loaded {len(self.conversations)} conversations")
-        
-        # Organize by outcome
+    
+    @classmethod
+    def from_transcripts(cls, transcripts, lexicon=None):
+        """Build an analyzer from already-loaded transcripts"""
+        analyzer = cls.__new__(cls)
+        analyzer._organize(transcripts, lexicon)
+        return analyzer
+    
+    def _organize(self, transcripts, lexicon=None):
+        """Organize conversations by outcome and tokenize every turn once"""
+        self.lexicon = validate_lexicon(lexicon) if lexicon is not None else load_lexicon()
+        self.conversations = transcripts
         self.by_outcome = defaultdict(list)
-        for conv in self.conversations:
+        self.ordinals_by_outcome = defaultdict(list)
+        self.ordinal_by_id = {}
+        for ordinal, conv in enumerate(self.conversations):
             self.by_outcome[conv['intent']].append(conv)
+            self.ordinals_by_outcome[conv['intent']].append(ordinal)
+            self.ordinal_by_id[conv['transcript_id']] = ordinal
+        
+        self.index = CorpusIndex(self.conversations)
+        self.matcher = self.index.compile(self.lexicon['categories'])
+        self.signal_index = SignalIndex(self.index, self.matcher, self.ordinals_by_outcome,
+                                        self.conversations)
+    
+    def reload_lexicon(self, lexicon=None):
+        """Switch to an edited lexicon, re-indexing only the categories that changed"""
+        lexicon = validate_lexicon(lexicon) if lexicon is not None else load_lexicon()
+        changed = changed_categories(self.lexicon, lexicon)
+        
+        matcher = self.index.compile(lexicon['categories'])
+        self.signal_index = self.signal_index.updated(matcher, changed)
+        self.matcher = matcher
+        self.lexicon = lexicon
+        return sorted(changed)
     
     def get_stats(self):
         """Get basic statistics"""
-        stats = {
-            'total': len(self.conversations),
-            'outcomes': len(self.by_outcome),
-            'top_outcomes': []
-        }
-        
-        # Count outcomes
-        outcome_counts = Counter([c['intent'] for c in self.conversations])
-        for outcome, count in outcome_counts.most_common(10):
-            stats['top_outcomes'].append({
-                'name': outcome,
-                'count': count,
-                'percent': round(count / stats['total'] * 100, 1)
-            })
-        
-        return stats
+        # by_outcome is in first-seen order, which is how Counter breaks ties
+        outcome_counts = Counter({outcome: len(convs) for outcome, convs in self.by_outcome.items()})
+        return outcome_stats(outcome_counts)
     
     def find_bad_words(self, conversation):
         """Find negative words in conversation"""
-        bad_words = {
-            'angry': ['angry', 'furious', 'mad', 'upset', 'frustrated'],
-            'threat': ['lawyer', 'legal', 'sue', 'lawsuit', 'cancel'],
-            'repeat': ['again', 'third time', 'already told', 'mentioned'],
-            'wait': ['waiting', 'weeks', 'months', 'long time', 'still waiting']
-        }
-        
+        vocab = self.index.vocab
+        return self._match_turns(conversation, [vocab.encode(turn['text'], add=False) for turn in conversation])
+    
+    def _match_turns(self, conversation, turn_tokens):
+        """Whole-word keyword matches for already tokenized turns"""
         found = defaultdict(list)
         
-        for turn in conversation:
-            text = turn['text'].lower()
-            
-            for category, words in bad_words.items():
-                for word in words:
-                    if word in text:
-                        found[category].append({
-                            'speaker': turn['speaker'],
-                            'text': turn['text'],
-                            'word': word
-                        })
+        for turn, tokens in zip(conversation, turn_tokens):
+            for category in self.matcher.categories:
+                for word in self.matcher.matched_words(category, tokens):
+                    found[category].append({
+                        'speaker': turn['speaker'],
+                        'text': turn['text'],
+                        'word': word
+                    })
         
         return found
     
-    def analyze_outcome(self, outcome_name):
+    def analyze_outcome(self, outcome_name, shuffle=None):
         """Analyze why a specific outcome happens"""
         if outcome_name not in self.by_outcome:
             return None
@@ -73,15 +117,13 @@ class SimpleConversationAnalyzer:
         
         # Collect all negative signals
         all_signals = defaultdict(int)
-        examples = defaultdict(list)
         
-        for conv in convs[:20]:  # Sample first 20
-            bad_words = self.find_bad_words(conv['conversation'])
+        for ordinal in self.ordinals_by_outcome[outcome_name][:20]:  # Sample first 20
+            conversation = self.conversations[ordinal]['conversation']
+            bad_words = self._match_turns(conversation, self.index.turns(ordinal))
             
             for category, items in bad_words.items():
                 all_signals[category] += len(items)
-                if len(examples[category]) < 3:
-                    examples[category].extend(items[:3])
         
         # Build result
         result = {
@@ -96,10 +138,23 @@ class SimpleConversationAnalyzer:
                 'count': count,
                 'percent': round(count / len(convs[:20]) * 100, 1)
             }
-            result['examples'][category] = examples[category][:3]
+            result['examples'][category] = self.get_evidence(outcome_name, category, seed=shuffle)
         
         return result
     
+    def get_evidence(self, outcome_name, category, k=3, seed=None):
+        """Matching turns sampled uniformly from the whole outcome (not just the first 20)"""
+        examples = []
+        for ordinal, t in self.signal_index.examples(outcome_name, category, k, seed):
+            conv = self.conversations[ordinal]
+            tokens = self.index.turns(ordinal)[t]
+            examples.append({
+                'speaker': conv['conversation'][t]['speaker'],
+                'text': conv['conversation'][t]['text'],
+                'word': self.matcher.matched_words(category, tokens)[0]
+            })
+        return examples
+    
     def search(self, query):
         """Simple search for outcomes"""
         query = query.lower()
@@ -114,13 +169,18 @@ class SimpleConversationAnalyzer:
         
         return matches
     
-    def get_example(self, outcome_name):
-        """Get an example conversation"""
-        if outcome_name not in self.by_outcome:
+    def get_example(self, outcome_name=None, transcript_id=None):
+        """Get an example conversation, or a specific one by transcript_id"""
+        if transcript_id is not None:
+            ordinal = self.ordinal_by_id.get(transcript_id)
+            if ordinal is None:
+                return None
+            conv = self.conversations[ordinal]
+        elif outcome_name in self.by_outcome:
+            conv = self.by_outcome[outcome_name][0]
+        else:
             return None
         
-        conv = self.by_outcome[outcome_name][0]
-        
         return {
             'id': conv['transcript_id'],
             'outcome': conv['intent'],
@@ -130,10 +190,55 @@ class SimpleConversationAnalyzer:
         }
 
 
+def build_dashboard_payload(analyzer, max_examples=2, text_limit=160):
+    """Precompute a compact analysis of every outcome for the static dashboard
+    
+    Category names, speakers and example texts go into shared string tables and
+    are referenced by index, so repeated quotes are stored once. Examples are
+    capped per category and truncated to keep the page small for many outcomes.
+    """
+    strings = []
+    string_ids = {}
+    
+    def ref(value):
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+    
+    outcomes = []
+    for outcome_name, convs in sorted(analyzer.by_outcome.items(), key=lambda x: -len(x[1])):
+        result = analyzer.analyze_outcome(outcome_name)
+        sampled = min(20, len(convs))
+        
+        signals = [
+            [ref(category), data['count']]
+            for category, data in result['signals'].items()
+        ]
+        examples = [
+            [ref(category), [
+                [ref(ex['speaker']), ref(ex['text'][:text_limit])]
+                for ex in items[:max_examples]
+            ]]
+            for category, items in result['examples'].items()
+            if items
+        ]
+        outcomes.append([outcome_name, len(convs), sampled, signals, examples])
+    
+    return {'strings': strings, 'outcomes': outcomes}
+
+
+def encode_payload(payload):
+    """zlib-compress and base64-encode a payload for embedding in HTML"""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.b64encode(zlib.compress(raw, 9)).decode('ascii')
+
+
 def create_html_dashboard(analyzer):
     """Create an interactive HTML dashboard"""
     
     stats = analyzer.get_stats()
+    esc = html_lib.escape
     
     html = f"""
 <!DOCTYPE html>
@@ -377,7 +482,7 @@ def create_html_dashboard(analyzer):
             </div>
             <div class="stat-card">
                 <h3>Most Common</h3>
-                <div class="number">{stats['top_outcomes'][0]['name'][:20]}...</div>
+                <div class="number">{esc(stats['top_outcomes'][0]['name'][:20])}...</div>
             </div>
         </div>
         
@@ -396,9 +501,9 @@ def create_html_dashboard(analyzer):
     
     for outcome in stats['top_outcomes']:
         html += f"""
-            <div class="outcome-item" onclick="analyzeSpecific('{outcome['name']}')">
+            <div class="outcome-item" data-name="{esc(outcome['name'])}" onclick="analyzeSpecific(this.dataset.name)">
                 <div class="outcome-name">
-                    {outcome['name']}
+                    {esc(outcome['name'])}
                     <span class="badge">{outcome['count']} cases</span>
                 </div>
                 <div class="outcome-count">{outcome['percent']}% of all conversations</div>
@@ -414,17 +519,66 @@ def create_html_dashboard(analyzer):
         </div>
     </div>
     
+    <!-- Precomputed analysis of every outcome: zlib + base64, decoded on first use -->
+    <script id="analysisData" type="application/octet-stream">"""
+    
+    html += encode_payload(build_dashboard_payload(analyzer))
+    
+    html += """</script>
+    
     <script>
+        let analysisPromise = null;
+        
+        function loadAnalysis() {
+            // Decode the embedded payload once, the first time it is needed
+            if (!analysisPromise) {
+                const encoded = document.getElementById('analysisData').textContent.trim();
+                const bytes = Uint8Array.from(atob(encoded), c => c.charCodeAt(0));
+                const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+                analysisPromise = new Response(stream).json().then(payload => {
+                    const byName = new Map();
+                    payload.outcomes.forEach(o => byName.set(o[0], o));
+                    return { strings: payload.strings, outcomes: payload.outcomes, byName: byName };
+                });
+            }
+            return analysisPromise;
+        }
+        
+        // Quotes are escaped too: names also go into data-name attributes
+        function escapeHtml(text) {
+            const entities = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+            return String(text).replace(/[&<>"']/g, c => entities[c]);
+        }
+        
         function analyzeOutcome() {
-            const query = document.getElementById('searchInput').value;
+            const query = document.getElementById('searchInput').value.trim().toLowerCase();
             if (!query) return;
             
             // Show loading
             document.getElementById('searchResults').innerHTML = '<div class="loading">Searching...</div>';
             
-            // In a real app, this would call the Python backend
-            // For now, we'll simulate with the first matching outcome
-            analyzeSpecific(query);
+            loadAnalysis().then(data => {
+                const matches = data.outcomes.filter(o => o[0].toLowerCase().includes(query)).slice(0, 10);
+                
+                if (matches.length === 0) {
+                    document.getElementById('searchResults').innerHTML = '<div class="loading">No matching outcomes found</div>';
+                    return;
+                }
+                
+                let html = '';
+                matches.forEach(o => {
+                    html += `
+                        <div class="outcome-item" data-name="${escapeHtml(o[0])}" onclick="analyzeSpecific(this.dataset.name)">
+                            <div class="outcome-name">${escapeHtml(o[0])}<span class="badge">${o[1]} cases</span></div>
+                        </div>
+                    `;
+                });
+                document.getElementById('searchResults').innerHTML = html;
+                
+                if (matches.length === 1) {
+                    analyzeSpecific(matches[0][0]);
+                }
+            });
         }
         
         function analyzeSpecific(outcomeName) {
@@ -435,54 +589,37 @@ def create_html_dashboard(analyzer):
             // Scroll to results
             resultSection.scrollIntoView({ behavior: 'smooth' });
             
-            // Show loading
-            document.getElementById('resultContent').innerHTML = '<div class="loading">Analyzing conversations...</div>';
-            
-            // Simulate analysis (in real app, this would call Python)
-            setTimeout(() => {
-                showResults(outcomeName);
-            }, 500);
+            loadAnalysis().then(data => showResults(outcomeName, data));
         }
         
-        function showResults(outcomeName) {
-            // This would normally come from the Python analyzer
-            const mockResults = {
-                signals: {
-                    angry: { count: 15, percent: 45 },
-                    threat: { count: 8, percent: 24 },
-                    repeat: { count: 12, percent: 36 },
-                    wait: { count: 6, percent: 18 }
-                },
-                examples: {
-                    angry: [
-                        { speaker: 'Customer', text: "I'm extremely frustrated with this service!" }
-                    ],
-                    threat: [
-                        { speaker: 'Customer', text: "I'm going to contact my lawyer about this." }
-                    ],
-                    repeat: [
-                        { speaker: 'Customer', text: "This is the third time I've called about this issue!" }
-                    ]
-                }
-            };
+        function showResults(outcomeName, data) {
+            const outcome = data.byName.get(outcomeName);
+            if (!outcome) {
+                document.getElementById('resultContent').innerHTML = '<div class="loading">No data found</div>';
+                return;
+            }
+            
+            const [name, total, sampled, signals, examples] = outcome;
+            const str = i => data.strings[i];
             
             let html = `
-                <h3 style="color: #333; margin-bottom: 20px;">Outcome: ${outcomeName}</h3>
+                <h3 style="color: #333; margin-bottom: 20px;">Outcome: ${escapeHtml(name)}</h3>
+                <div style="color: #666;">Total Cases: <strong>${total}</strong> (signals from ${sampled} sampled conversations)</div>
                 
                 <h4 style="color: #666; margin: 20px 0 10px 0;">🎯 Negative Signals Found:</h4>
                 <div class="signal-grid">
             `;
             
-            for (const [category, data] of Object.entries(mockResults.signals)) {
-                const categoryName = category.charAt(0).toUpperCase() + category.slice(1) + ' Words';
+            signals.forEach(([category, count]) => {
+                const categoryName = str(category).charAt(0).toUpperCase() + str(category).slice(1) + ' Words';
                 html += `
                     <div class="signal-card">
-                        <h4>${categoryName}</h4>
-                        <div class="count">${data.count}</div>
-                        <div style="color: #666; font-size: 14px;">${data.percent}% of conversations</div>
+                        <h4>${escapeHtml(categoryName)}</h4>
+                        <div class="count">${count}</div>
+                        <div style="color: #666; font-size: 14px;">${Math.round(count / sampled * 1000) / 10}% of conversations</div>
                     </div>
                 `;
-            }
+            });
             
             html += `
                 </div>
@@ -490,19 +627,17 @@ def create_html_dashboard(analyzer):
                 <h4 style="color: #666; margin: 30px 0 10px 0;">💬 Example Evidence:</h4>
             `;
             
-            for (const [category, examples] of Object.entries(mockResults.examples)) {
-                if (examples && examples.length > 0) {
-                    html += `<h5 style="color: #333; margin: 15px 0 10px 0; text-transform: capitalize;">${category} Examples:</h5>`;
-                    examples.forEach(ex => {
-                        html += `
-                            <div class="example-box">
-                                <div class="speaker">${ex.speaker}:</div>
-                                <div class="text">${ex.text}</div>
-                            </div>
-                        `;
-                    });
-                }
-            }
+            examples.forEach(([category, items]) => {
+                html += `<h5 style="color: #333; margin: 15px 0 10px 0; text-transform: capitalize;">${escapeHtml(str(category))} Examples:</h5>`;
+                items.forEach(([speaker, text]) => {
+                    html += `
+                        <div class="example-box">
+                            <div class="speaker">${escapeHtml(str(speaker))}:</div>
+                            <div class="text">${escapeHtml(str(text))}</div>
+                        </div>
+                    `;
+                });
+            });
             
             document.getElementById('resultContent').innerHTML = html;
         }
@@ -514,17 +649,219 @@ def create_html_dashboard(analyzer):
     return html
 
 
-def main():
+def report_filename(outcome_name, fmt):
+    """Stable, filesystem-safe file name for an outcome report"""
+    slug = re.sub(r'[^a-z0-9]+', '-', outcome_name.lower()).strip('-')[:60]
+    digest = hashlib.sha1(outcome_name.encode('utf-8')).hexdigest()[:8]
+    return f"{slug}-{digest}.{fmt}"
+
+
+def outcome_fingerprint(convs, fmt, lexicon=None):
+    """Hash of everything a report depends on"""
+    digest = hashlib.sha1(f"{REPORT_VERSION}:{fmt}:".encode('utf-8'))
+    if lexicon is not None:
+        digest.update(json.dumps(lexicon['categories'], sort_keys=True).encode('utf-8'))
+    digest.update(json.dumps(convs, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_report(outcome_name, convs, lexicon=None):
+    """Full analysis report for one outcome"""
+    analyzer = SimpleConversationAnalyzer.from_transcripts(convs, lexicon)
+    report = analyzer.analyze_outcome(outcome_name)
+    report['example'] = analyzer.get_example(outcome_name)
+    return report
+
+
+def render_report_html(report):
+    """Render one outcome report as a standalone HTML page"""
+    esc = html_lib.escape
+    
+    signals = ''.join(
+        f"""
+            <div class="signal-card">
+                <h4>{esc(category)}</h4>
+                <div class="count">{data['count']}</div>
+                <div>{data['percent']}% of conversations</div>
+            </div>"""
+        for category, data in report['signals'].items()
+    )
+    
+    examples = ''
+    for category, items in report['examples'].items():
+        examples += f"<h4>{esc(category)}</h4>"
+        for ex in items:
+            examples += f"""
+            <div class="example-box"><b>{esc(ex['speaker'])}:</b> {esc(ex['text'])}</div>"""
+    
+    example = report['example']
+    turns = ''.join(
+        f"""
+            <div class="turn"><b>{esc(turn['speaker'])}:</b> {esc(turn['text'])}</div>"""
+        for turn in example['turns']
+    )
+    
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{esc(report['outcome'])}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px; color: #333; }}
+        .signal-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin: 20px 0; }}
+        .signal-card {{ padding: 20px; background: #f8f9fa; border-radius: 10px; border-left: 4px solid #667eea; }}
+        .signal-card .count {{ color: #667eea; font-size: 24px; font-weight: bold; }}
+        .example-box, .turn {{ background: #f8f9fa; padding: 12px; border-radius: 10px; margin: 8px 0; }}
+        .example-box {{ border-left: 4px solid #ffd700; }}
+    </style>
+</head>
+<body>
+    <h1>{esc(report['outcome'])}</h1>
+    <p>Total Cases: <strong>{report['total_cases']}</strong></p>
+    <h2>🎯 Negative Signals Found</h2>
+    <div class="signal-grid">{signals}
+    </div>
+    <h2>💬 Example Evidence</h2>{examples}
+    <h2>📄 Example Conversation ({esc(example['id'])})</h2>{turns}
+</body>
+</html>
+"""
+
+
+def write_report(outcome_name, convs, path, fmt, lexicon=None):
+    """Analyze one outcome and write its report (runs in a worker process)"""
+    report = build_report(outcome_name, convs, lexicon)
+    
+    if fmt == 'html':
+        content = render_report_html(report)
+    else:
+        content = json.dumps(report, indent=2)
+    
+    # Write to a temp file first so a crash never leaves a half-written report
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return outcome_name
+
+
+def group_by_outcome(transcripts):
+    """Transcripts per outcome, outcomes in first-seen order"""
+    by_outcome = defaultdict(list)
+    for conv in transcripts:
+        by_outcome[conv['intent']].append(conv)
+    return by_outcome
+
+
+def export_reports(by_outcome, lexicon, output_dir, fmt='json', workers=None):
+    """Write a report for every outcome in parallel, skipping unchanged ones
+    
+    `by_outcome` maps each outcome to its transcripts (see group_by_outcome);
+    the workers analyze them, so nothing needs indexing up front. A manifest in `output_dir` remembers each outcome's input fingerprint, so
+    re-running only re-analyzes outcomes whose conversations (or the lexicon) changed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('reports', {})
+    
+    reports = {}
+    pending = []
+    for outcome_name, convs in by_outcome.items():
+        entry = {
+            'file': report_filename(outcome_name, fmt),
+            'fingerprint': outcome_fingerprint(convs, fmt, lexicon),
+            'count': len(convs)
+        }
+        reports[outcome_name] = entry
+        
+        old = previous.get(outcome_name)
+        unchanged = (
+            old is not None
+            and old['fingerprint'] == entry['fingerprint']
+            and os.path.exists(os.path.join(output_dir, entry['file']))
+        )
+        if not unchanged:
+            pending.append((outcome_name, convs))
+    
+    if pending:
+        # Imported here: multiprocessing is slow to import and only export needs it
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(write_report, outcome_name, convs,
+                            os.path.join(output_dir, reports[outcome_name]['file']), fmt,
+                            lexicon)
+                for outcome_name, convs in pending
+            ]
+            for future in as_completed(futures):
+                future.result()
+    
+    # Drop reports for outcomes that no longer exist
+    removed = 0
+    for outcome_name, old in previous.items():
+        if outcome_name not in reports or reports[outcome_name]['file'] != old['file']:
+            old_path = os.path.join(output_dir, old['file'])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+                removed += 1
+    
+    if pending or removed or not os.path.exists(manifest_path):
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': REPORT_VERSION, 'format': fmt, 'reports': reports}, f, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+    
+    return {
+        'written': len(pending),
+        'skipped': len(reports) - len(pending),
+        'removed': removed
+    }
+
+
+def main(argv=None):
     """Main function - easy to run!"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Simple conversation analyzer')
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE,
+                        help='transcript dataset (default: %(default)s)')
+    parser.add_argument('--output', default='/mnt/user-data/outputs/dashboard.html',
+                        help='where to write the dashboard (default: %(default)s)')
+    parser.add_argument('--reports', metavar='DIR',
+                        help='write a report for every outcome into DIR instead of the dashboard')
+    parser.add_argument('--format', choices=['json', 'html'], default='json',
+                        help='report format (default: json)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes for report export (default: CPU count)')
+    parser.add_argument('--lexicon', default=LEXICON_FILE,
+                        help='signal keyword file (default: %(default)s)')
+    args = parser.parse_args(argv)
     
     print("=" * 60)
     print("  SIMPLE CONVERSATION ANALYZER")
     print("=" * 60)
     print()
     
+    lexicon = load_lexicon(args.lexicon)
+    
+    if args.reports:
+        # The workers analyze each outcome; only the grouping happens here
+        from conversation_analyzer import load_transcripts
+        
+        print(f"Exporting reports to {args.reports}...")
+        by_outcome = group_by_outcome(load_transcripts(args.data))
+        summary = export_reports(by_outcome, lexicon, args.reports, fmt=args.format,
+                                 workers=args.workers)
+        print(f"✓ {summary['written']} written, {summary['skipped']} unchanged, "
+              f"{summary['removed']} removed")
+        return
+    
     # Load data
-    data_file = '/mnt/user-data/uploads/Conversational_Transcript_Dataset.json'
-    analyzer = SimpleConversationAnalyzer(data_file)
+    analyzer = SimpleConversationAnalyzer(args.data, lexicon)
     
     print()
     print("Creating interactive dashboard...")
@@ -533,7 +870,7 @@ def main():
     html = create_html_dashboard(analyzer)
     
     # Save HTML file
-    output_file = '/mnt/user-data/outputs/dashboard.html'
+    output_file = args.output
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html)
     
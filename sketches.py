@@ -0,0 +1,173 @@
+
+import heapq
+import math
+import random
+from array import array
+
+
+MASK64 = (1 << 64) - 1
+
+
+def mix64(value):
+    """splitmix64 finalizer: spreads any integer over 64 well-mixed bits
+
+    Python's hash of small-int tuples is deterministic across processes but
+    too regular to rank items by, which visibly biases bottom-k samples.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class Reservoir:
+    """Fixed-size uniform sample of a stream (bottom-k sampling)
+
+    Every offered item carries a pseudo-random priority; the `capacity` items
+    with the lowest priorities are kept, which is a uniform sample without
+    replacement. Priorities derived from stable item keys make the sample
+    reproducible and let reservoirs from different shards be merged.
+    """
+
+    __slots__ = ('capacity', '_heap')
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # Max-heap on priority (stored negated) of the kept items
+        self._heap = []
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def offer(self, priority, item):
+        heap = self._heap
+        if len(heap) < self.capacity:
+            heapq.heappush(heap, (-priority, item))
+        elif priority < -heap[0][0]:
+            heapq.heapreplace(heap, (-priority, item))
+    
+    def entries(self):
+        """(priority, item) pairs, lowest priority first"""
+        return sorted((-negated, item) for negated, item in self._heap)
+    
+    def sample(self, k, seed=None):
+        """k items: the k lowest priorities, or a seeded reshuffle of the reservoir"""
+        k = max(k, 0)
+        items = [item for _, item in self.entries()]
+        if seed is None:
+            return items[:k]
+        return random.Random(seed).sample(items, min(k, len(items)))
+
+
+class SpaceSaving:
+    """Top-k heavy hitters of a weighted stream in `capacity` counters
+
+    Every kept item's count overestimates its true count by at most its
+    recorded error, and any item whose true count exceeds total / capacity
+    is guaranteed to be kept (Metwally et al.'s Space-Saving).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        # {item: [count, error]}
+        self.counters = {}
+        # Min-heap of (count, item); each kept item has exactly one entry,
+        # possibly stale (lower than its count) after increments
+        self._heap = []
+    
+    def __len__(self):
+        return len(self.counters)
+    
+    def update(self, item, weight=1):
+        self.total += weight
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            return
+        
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+            heapq.heappush(self._heap, (weight, item))
+            return
+        
+        # Evict the item with the smallest count; a stale heap entry is
+        # refreshed and pushed back until the top is current
+        heap, counters = self._heap, self.counters
+        while True:
+            count, victim = heap[0]
+            current = counters[victim][0]
+            if current == count:
+                break
+            heapq.heapreplace(heap, (current, victim))
+        
+        del counters[victim]
+        counters[item] = [count + weight, count]
+        heapq.heapreplace(heap, (count + weight, item))
+    
+    def update_counts(self, counts):
+        """Apply a {item: weight} batch"""
+        for item, weight in counts.items():
+            self.update(item, weight)
+    
+    def items(self):
+        """(item, count, error) by descending count"""
+        return sorted(
+            ((item, count, error) for item, (count, error) in self.counters.items()),
+            key=lambda entry: -entry[1]
+        )
+    
+    def error_bound(self):
+        """No kept count is more than this above the truth"""
+        return self.total // self.capacity if self.capacity else self.total
+
+
+class CountMinSketch:
+    """Approximate counts in fixed memory; never underestimates
+
+    Estimates exceed the true count by at most epsilon * total with
+    probability 1 - delta. Item hashes come from Python's `hash`, so a sketch
+    is only meaningful within one process.
+    """
+
+    def __init__(self, epsilon=1e-4, delta=0.01):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = max(1, math.ceil(math.log(1 / delta)))
+        self.epsilon = epsilon
+        self.delta = delta
+        self.total = 0
+        self.rows = [array('I', bytes(4 * self.width)) for _ in range(self.depth)]
+    
+    def _cells(self, item):
+        # Double hashing: depth indices from the two 32-bit halves of one
+        # hash (str hashes are SipHash, already well mixed)
+        value = hash(item)
+        first, second = value & 0xFFFFFFFF, (value >> 32 & 0xFFFFFFFF) | 1
+        width = self.width
+        return [(first + i * second) % width for i in range(self.depth)]
+    
+    def update(self, item, weight=1):
+        self.total += weight
+        for row, cell in zip(self.rows, self._cells(item)):
+            row[cell] += weight
+    
+    def update_counts(self, counts):
+        """Apply a {item: weight} batch"""
+        rows = list(enumerate(self.rows))
+        width = self.width
+        for item, weight in counts.items():
+            value = hash(item)
+            first, second = value & 0xFFFFFFFF, (value >> 32 & 0xFFFFFFFF) | 1
+            for i, row in rows:
+                row[(first + i * second) % width] += weight
+        self.total += sum(counts.values())
+    
+    def estimate(self, item):
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(item)))
+    
+    def error_bound(self):
+        """Overestimate bound that holds with probability 1 - delta"""
+        return math.ceil(self.epsilon * self.total)
+    
+    def size_in_bytes(self):
+        return self.width * self.depth * 4
@@ -0,0 +1,148 @@
+
+import json
+import os
+import struct
+from array import array
+
+
+# Snapshot layout:
+#   MAGIC | header length (8 bytes) | JSON header | one frame per outcome | JSON id index
+# An outcome frame is its original ordinals as uint32s followed by its transcripts
+# as JSON. The header holds per-outcome counts and frame offsets, so stats can be
+# answered from the header alone and a single outcome can be loaded without the
+# rest. The id index maps transcript_id -> [outcome, position in its frame].
+# Nothing in a snapshot is executed when it is read, like a JSON dataset.
+MAGIC = b'CONVSNAP2\n'
+SNAPSHOT_VERSION = 3
+
+# Every snapshot starts with this, whatever its format version
+SNAPSHOT_PREFIX = b'CONVSNAP'
+
+
+def is_snapshot(path):
+    """True if `path` is a snapshot file rather than a JSON dataset"""
+    with open(path, 'rb') as f:
+        return f.read(len(SNAPSHOT_PREFIX)) == SNAPSHOT_PREFIX
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_snapshot(transcripts, path):
+    """Write transcripts grouped by outcome, keeping their original order"""
+    ordinals = {}
+    groups = {}
+    ids = {}
+    for ordinal, conv in enumerate(transcripts):
+        intent = conv['intent']
+        if intent not in groups:
+            groups[intent] = []
+            ordinals[intent] = array('I')
+        ids[conv['transcript_id']] = (intent, len(groups[intent]))
+        groups[intent].append(conv)
+        ordinals[intent].append(ordinal)
+    
+    frames = []
+    outcomes = {}
+    offset = 0
+    for intent, convs in groups.items():
+        frame = ordinals[intent].tobytes() + _encode(convs)
+        outcomes[intent] = (offset, len(frame), len(convs))
+        frames.append(frame)
+        offset += len(frame)
+    
+    # Kept out of the header so reading stats stays cheap
+    id_frame = _encode(ids)
+    frames.append(id_frame)
+    
+    header = _encode({
+        'version': SNAPSHOT_VERSION,
+        'total': len(transcripts),
+        'outcomes': outcomes,
+        'ids': (offset, len(id_frame))
+    })
+    
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for frame in frames:
+            f.write(frame)
+    
+    os.replace(tmp_path, path)
+
+
+def _open_snapshot(f):
+    """Read the header; return (header, offset of the first frame)"""
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        if magic.startswith(SNAPSHOT_PREFIX):
+            raise ValueError('snapshot from an older version; write it again with `load --snapshot`')
+        raise ValueError('not a conversation snapshot')
+    (header_length,) = struct.unpack('<Q', f.read(8))
+    header = json.loads(f.read(header_length))
+    if header['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {header['version']}")
+    return header, len(MAGIC) + 8 + header_length
+
+
+def read_snapshot_header(path):
+    """Per-outcome counts without loading any transcript"""
+    with open(path, 'rb') as f:
+        header, _ = _open_snapshot(f)
+    return header
+
+
+def _read_frame(f, base, entry):
+    offset, length, count = entry
+    f.seek(base + offset)
+    frame = f.read(length)
+    ordinals = array('I')
+    ordinals.frombytes(frame[:ordinals.itemsize * count])
+    return ordinals, json.loads(frame[ordinals.itemsize * count:])
+
+
+def load_outcome_transcripts(path, outcome_name):
+    """Load only the transcripts of one outcome, in original order"""
+    with open(path, 'rb') as f:
+        header, base = _open_snapshot(f)
+        entry = header['outcomes'].get(outcome_name)
+        if entry is None:
+            return []
+        return _read_frame(f, base, entry)[1]
+
+
+def find_transcript(path, transcript_id):
+    """One transcript by id, reading only the id index and its outcome's frame"""
+    with open(path, 'rb') as f:
+        header, base = _open_snapshot(f)
+        offset, length = header['ids']
+        f.seek(base + offset)
+        location = json.loads(f.read(length)).get(transcript_id)
+        if location is None:
+            return None
+        intent, position = location
+        return _read_frame(f, base, header['outcomes'][intent])[1][position]
+
+
+def iter_snapshot(path):
+    """(original ordinal, transcript) pairs, one outcome frame in memory at a time"""
+    with open(path, 'rb') as f:
+        header, base = _open_snapshot(f)
+        for entry in header['outcomes'].values():
+            ordinals, convs = _read_frame(f, base, entry)
+            yield from zip(ordinals, convs)
+
+
+def load_snapshot(path):
+    """Load every transcript back into its original order"""
+    with open(path, 'rb') as f:
+        header, base = _open_snapshot(f)
+        transcripts = [None] * header['total']
+        for entry in header['outcomes'].values():
+            ordinals, convs = _read_frame(f, base, entry)
+            for ordinal, conv in zip(ordinals, convs):
+                transcripts[ordinal] = conv
+    return transcripts
@@ -0,0 +1,429 @@
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from urllib.request import pathname2url
+
+from conversation_analyzer import QUICK_ANALYSIS_SIZE
+from corpus_index import EXAMPLE_RESERVOIR_SIZE, KeywordMatcher, Vocabulary
+from lexicon import load_lexicon, validate_lexicon
+from sketches import mix64
+
+
+# Every SQLite database file starts with this
+SQLITE_MAGIC = b'SQLite format 3\x00'
+STORE_VERSION = 3
+
+# Transcripts inserted per transaction while ingesting
+STORE_BATCH_SIZE = 1000
+
+# SQLite integers are signed; sampling priorities are unsigned 64-bit
+PRIORITY_OFFSET = 1 << 63
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE conversations (
+    ordinal INTEGER PRIMARY KEY,
+    transcript_id TEXT NOT NULL UNIQUE,
+    intent TEXT NOT NULL,
+    domain TEXT,
+    reason_for_call TEXT,
+    turn_count INTEGER NOT NULL,
+    signals BLOB NOT NULL
+);
+CREATE TABLE turns (
+    id INTEGER PRIMARY KEY,
+    ordinal INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE turns_fts USING fts5(text, content='turns', content_rowid='id');
+CREATE TABLE signal_turns (
+    intent TEXT NOT NULL,
+    category TEXT NOT NULL,
+    speaker TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    turn INTEGER NOT NULL
+);
+CREATE TABLE outcomes (intent TEXT PRIMARY KEY, conversations INTEGER NOT NULL);
+CREATE TABLE signal_counts (
+    intent TEXT NOT NULL,
+    category TEXT NOT NULL,
+    speaker TEXT NOT NULL,
+    turns INTEGER NOT NULL,
+    conversations INTEGER NOT NULL,
+    first_turn INTEGER NOT NULL,
+    PRIMARY KEY (intent, category, speaker)
+);
+"""
+
+# Built once after the bulk load, which is much faster than maintaining them
+INDEXES = """
+CREATE INDEX conversations_intent ON conversations (intent, ordinal);
+CREATE INDEX conversations_domain ON conversations (domain, ordinal);
+CREATE INDEX turns_ordinal ON turns (ordinal, position);
+CREATE INDEX signal_turns_sample ON signal_turns (intent, category, priority, turn);
+CREATE INDEX signal_turns_speaker ON signal_turns (intent, category, speaker, priority, turn);
+CREATE INDEX signal_turns_turn ON signal_turns (turn, category, speaker);
+"""
+
+
+def is_sqlite_store(path):
+    """True if `path` is a SQLite database rather than a dataset or snapshot"""
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def ingest(transcripts, path, lexicon=None, batch_size=STORE_BATCH_SIZE, seed=0):
+    """Write (ordinal, transcript) pairs into a new SQLite store at `path`
+
+    Memory stays bounded by one batch: each batch gets a fresh vocabulary,
+    rows go in with executemany inside one transaction, and only per
+    (outcome, category, speaker) aggregates are kept across batches. Matching
+    turns are stored with the same sampling priorities as SignalIndex, so
+    the store's examples are the in-memory analyzer's examples. Returns a
+    summary of what was written.
+    """
+    lexicon = validate_lexicon(lexicon) if lexicon is not None else load_lexicon()
+    categories = list(lexicon['categories'])
+    bits = {category: 1 << i for i, category in enumerate(categories)}
+    # Little-endian bytes, bit i for category i: SQLite integers stop at 63 bits
+    mask_bytes = (len(categories) + 7) // 8
+    salts = {category: zlib.crc32(category.encode('utf-8')) for category in categories}
+    
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    try:
+        # The file is only renamed into place once complete, so durability
+        # during the load buys nothing
+        db.execute('PRAGMA journal_mode = OFF')
+        db.execute('PRAGMA synchronous = OFF')
+        db.executescript(SCHEMA)
+    
+        started = time.perf_counter()
+        outcomes = Counter()
+        turn_hits = Counter()
+        # Id of the first matching turn, so analyses list signals in first-hit order
+        first_turns = {}
+        conversation_hits = Counter()
+        totals = Counter()
+        turn_id = 0
+    
+        batch = []
+    
+        def duplicate_id(rows):
+            """The id in `rows` that repeats, within the batch or an earlier one"""
+            seen = set()
+            for row in rows:
+                if row[1] in seen:
+                    return row[1]
+                seen.add(row[1])
+            placeholders = ', '.join('?' * len(seen))
+            return db.execute(
+                f'SELECT transcript_id FROM conversations WHERE transcript_id IN ({placeholders})',
+                list(seen)
+            ).fetchone()[0]
+        
+        def flush():
+            nonlocal turn_id
+            vocab = Vocabulary()
+            matcher = KeywordMatcher(vocab, lexicon['categories'])
+            conversation_rows, turn_rows, signal_rows = [], [], []
+            
+            for ordinal, conv in batch:
+                intent = conv['intent']
+                turns = conv['conversation']
+                key = zlib.crc32(conv['transcript_id'].encode('utf-8'))
+                tokenized = vocab.encode_turns([turn['text'] for turn in turns])
+                mask = 0
+                found = set()
+                for t, (turn, tokens) in enumerate(zip(turns, tokenized)):
+                    turn_id += 1
+                    turn_rows.append((turn_id, ordinal, t, turn['speaker'], turn['text']))
+                    role = None
+                    for category in categories:
+                        if matcher.matches(category, tokens):
+                            if role is None:
+                                role = turn['speaker'].lower()
+                            mask |= bits[category]
+                            found.add((category, ''))
+                            found.add((category, role))
+                            turn_hits[(intent, category, '')] += 1
+                            turn_hits[(intent, category, role)] += 1
+                            first_turns.setdefault((intent, category, ''), turn_id)
+                            first_turns.setdefault((intent, category, role), turn_id)
+                            priority = mix64(hash((seed, key, t, salts[category]))) - PRIORITY_OFFSET
+                            signal_rows.append((intent, category, role, priority, turn_id))
+                for category, role in found:
+                    conversation_hits[(intent, category, role)] += 1
+        
+                outcomes[intent] += 1
+                totals['turns'] += len(turns)
+                conversation_rows.append((ordinal, conv['transcript_id'], intent, conv.get('domain'),
+                                          conv.get('reason_for_call'), len(turns),
+                                          mask.to_bytes(mask_bytes, 'little')))
+            
+            with db:
+                try:
+                    db.executemany('INSERT INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                   conversation_rows)
+                except sqlite3.IntegrityError:
+                    raise ValueError(
+                        f'duplicate transcript_id {duplicate_id(conversation_rows)!r}: '
+                        'transcript ids must be unique'
+                    ) from None
+                db.executemany('INSERT INTO turns VALUES (?, ?, ?, ?, ?)', turn_rows)
+                db.executemany('INSERT INTO signal_turns VALUES (?, ?, ?, ?, ?)', signal_rows)
+            batch.clear()
+        
+        # Load data
+        for item in transcripts:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        
+        # Aggregates, indexes and the full-text index, each built in one go
+        with db:
+            db.executemany('INSERT INTO outcomes VALUES (?, ?)', outcomes.items())
+            db.executemany(
+                'INSERT INTO signal_counts VALUES (?, ?, ?, ?, ?, ?)',
+                [key + (turns, conversation_hits[key], first_turns[key])
+                 for key, turns in turn_hits.items()]
+            )
+            db.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('version', str(STORE_VERSION)),
+                ('lexicon', json.dumps(lexicon)),
+                ('seed', str(seed)),
+                ('conversations', str(sum(outcomes.values())))
+            ])
+        db.executescript(INDEXES)
+        with db:
+            db.execute("INSERT INTO turns_fts (turns_fts) VALUES ('rebuild')")
+        db.execute('ANALYZE')
+    except BaseException:
+        # Leave nothing half-written behind
+        db.close()
+        os.remove(tmp_path)
+        raise
+    db.close()
+    os.replace(tmp_path, path)
+    
+    return {
+        'database': path,
+        'transcripts': sum(outcomes.values()),
+        'turns': totals['turns'],
+        'outcomes': len(outcomes),
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+class SQLiteAnalyzer:
+    """Answers outcome lists, analyses, search and full-text queries from a store
+
+    Nothing is loaded up front beyond the outcome counts: every call is a few
+    indexed queries, so the corpus can be far larger than memory. Full
+    analyses read aggregates written at ingest; quick ones count the matching
+    turns of the first QUICK_ANALYSIS_SIZE conversations. Each thread gets
+    its own read-only connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._uri = 'file:' + pathname2url(os.path.abspath(path)) + '?mode=ro'
+        self._local = threading.local()
+        
+        meta = dict(self._db().execute('SELECT key, value FROM meta'))
+        if int(meta['version']) != STORE_VERSION:
+            raise ValueError(f"unsupported store version {meta['version']}")
+        self.lexicon = json.loads(meta['lexicon'])
+        self.categories = list(self.lexicon['categories'])
+        self.total = int(meta['conversations'])
+        self.outcome_counts = Counter(dict(
+            self._db().execute('SELECT intent, conversations FROM outcomes ORDER BY rowid')
+        ))
+    
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            db.create_function('py_lower', 1, str.lower, deterministic=True)
+        return db
+    
+    def get_all_outcomes(self):
+        """Get list of all outcomes"""
+        rows = self._db().execute(
+            'SELECT intent, conversations FROM outcomes ORDER BY conversations DESC, rowid LIMIT 15'
+        )
+        return [
+            {
+                'name': outcome,
+                'count': count,
+                'percent': round(count / self.total * 100, 1)
+            }
+            for outcome, count in rows
+        ]
+    
+    def search_outcomes(self, query):
+        """Search for outcomes matching query"""
+        rows = self._db().execute(
+            'SELECT intent, conversations FROM outcomes WHERE instr(py_lower(intent), ?) > 0 '
+            'ORDER BY conversations DESC, rowid LIMIT 10',
+            (query.lower(),)
+        )
+        return [{'name': outcome, 'count': count} for outcome, count in rows]
+    
+    def analyze(self, outcome_name, shuffle=None, speaker=None, full=False, deadline=None,
+                cancel=None):
+        """Analyze a specific outcome, as ConversationAnalyzer.analyze does
+
+        Without `full`, only the first QUICK_ANALYSIS_SIZE conversations
+        count; with it, every conversation, read from the ingest-time
+        aggregates. `deadline` and `cancel` are accepted for compatibility
+        and have nothing to cut short.
+        """
+        total = self.outcome_counts.get(outcome_name)
+        if not total:
+            return None
+        
+        if full:
+            scanned = total
+            rows = self._db().execute(
+                'SELECT category, turns, first_turn FROM signal_counts '
+                'WHERE intent = ? AND speaker = ?',
+                (outcome_name, speaker or '')
+            ).fetchall()
+        else:
+            scanned = min(total, QUICK_ANALYSIS_SIZE)
+            rows = self._quick_counts(outcome_name, speaker)
+        # First-hit order, as the in-memory scan finds them: by the first
+        # matching turn, then lexicon order within that turn
+        rank = {cat: i for i, cat in enumerate(self.categories)}
+        rows.sort(key=lambda row: (row[2], rank[row[0]]))
+        signals = [(cat, count) for cat, count, _ in rows]
+        result = {
+            'outcome': outcome_name,
+            'speaker': speaker,
+            'total_cases': total,
+            'signals': {
+                cat: {
+                    'count': count,
+                    'percent': round(count / scanned * 100, 1)
+                }
+                for cat, count in signals
+            },
+            'examples': {
+                cat: self.examples(outcome_name, cat, seed=shuffle, speaker=speaker)
+                for cat, _ in signals
+            }
+        }
+        if full:
+            result['scanned'] = scanned
+            result['partial'] = False
+        return result
+    
+    def analyze_stream(self, outcome_name, chunk_size=None, cancel=None, shuffle=None,
+                       speaker=None, deadline=None):
+        """The full analysis as a single 'result' event: the totals are already on disk"""
+        yield 'result', self.analyze(outcome_name, shuffle=shuffle, speaker=speaker, full=True)
+    
+    def _quick_counts(self, outcome_name, speaker=None):
+        """(category, matching turns, first of them) over the outcome's first QUICK_ANALYSIS_SIZE"""
+        sql = (
+            'SELECT s.category, count(*), min(s.turn) FROM (SELECT ordinal FROM conversations '
+            'WHERE intent = ? ORDER BY ordinal LIMIT ?) c '
+            'JOIN turns t ON t.ordinal = c.ordinal JOIN signal_turns s ON s.turn = t.id '
+        )
+        params = [outcome_name, QUICK_ANALYSIS_SIZE]
+        if speaker is not None:
+            sql += 'WHERE s.speaker = ? '
+            params.append(speaker)
+        sql += 'GROUP BY s.category'
+        return self._db().execute(sql, params).fetchall()
+    
+    def examples(self, outcome_name, category, k=3, seed=None, speaker=None):
+        """Up to k matching turns: the lowest sampling priorities, or a seeded reshuffle"""
+        k = max(k, 0)
+        sql = (
+            'SELECT c.transcript_id, t.speaker, t.text FROM signal_turns s '
+            'JOIN turns t ON t.id = s.turn JOIN conversations c ON c.ordinal = t.ordinal '
+            'WHERE s.intent = ? AND s.category = ? '
+        )
+        params = [outcome_name, category]
+        if speaker is not None:
+            sql += 'AND s.speaker = ? '
+            params.append(speaker)
+        sql += 'ORDER BY s.priority, s.turn LIMIT ?'
+        params.append(EXAMPLE_RESERVOIR_SIZE)
+        
+        rows = self._db().execute(sql, params).fetchall()
+        if seed is not None:
+            rows = random.Random(seed).sample(rows, min(k, len(rows)))
+        return [
+            {'transcript_id': transcript_id, 'speaker': turn_speaker, 'text': text}
+            for transcript_id, turn_speaker, text in rows[:k]
+        ]
+    
+    def get_transcript(self, transcript_id, offset=0, limit=None):
+        """One transcript by id, optionally a page of its turns (ValueError if negative)"""
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError('offset and limit must not be negative')
+        db = self._db()
+        row = db.execute(
+            'SELECT ordinal, transcript_id, intent, domain, reason_for_call, turn_count '
+            'FROM conversations WHERE transcript_id = ?',
+            (transcript_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        ordinal, transcript_id, intent, domain, reason_for_call, turn_count = row
+        turns = db.execute(
+            'SELECT speaker, text FROM turns WHERE ordinal = ? ORDER BY position LIMIT ? OFFSET ?',
+            (ordinal, -1 if limit is None else limit, offset)
+        )
+        return {
+            'transcript_id': transcript_id,
+            'intent': intent,
+            'domain': domain,
+            'reason_for_call': reason_for_call,
+            'turn_count': turn_count,
+            'offset': offset,
+            'turns': [{'speaker': speaker, 'text': text} for speaker, text in turns]
+        }
+    
+    def search_text(self, match, limit=20, outcome_name=None):
+        """Turns matching an FTS5 query (words, "phrases", AND/OR/NOT, NEAR), best first
+
+        Raises ValueError for a malformed query.
+        """
+        sql = (
+            'SELECT c.transcript_id, c.intent, t.speaker, t.text, '
+            "snippet(turns_fts, 0, '[', ']', '…', 12) "
+            'FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid '
+            'JOIN conversations c ON c.ordinal = t.ordinal '
+            'WHERE turns_fts MATCH ? '
+        )
+        params = [match]
+        if outcome_name is not None:
+            sql += 'AND c.intent = ? '
+            params.append(outcome_name)
+        sql += 'ORDER BY bm25(turns_fts) LIMIT ?'
+        params.append(limit)
+        
+        try:
+            rows = self._db().execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f'bad text query: {e}') from None
+        return [
+            {'transcript_id': transcript_id, 'intent': intent, 'speaker': speaker,
+             'text': text, 'snippet': snippet}
+            for transcript_id, intent, speaker, text, snippet in rows
+        ]
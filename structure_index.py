@@ -0,0 +1,136 @@
+
+import math
+from array import array
+from bisect import bisect_right
+
+
+# Bars in a histogram, unless asked otherwise
+HISTOGRAM_BINS = 20
+
+# Percentiles reported by default
+DEFAULT_PERCENTILES = (50, 75, 90, 95, 99)
+
+# first_hits value of a conversation where the category never matches
+NO_HIT = -1
+
+
+class StructureIndex:
+    """Shape of every conversation, one compact array entry per conversation
+    
+    `turns[ordinal]` and `chars[ordinal]` are the conversation's turn count
+    and characters of text; `speaker_turns[role]` and `speaker_chars[role]`
+    the same for one speaker role (lowercased). Built in one pass at load.
+    The turn at which each signal category first matches is kept by the
+    SignalIndex, which is rebuilt when the lexicon changes.
+    
+    Sorted values are cached per (feature, key) as they are asked for: the
+    arrays never change after load, so each is sorted once. first:CATEGORY
+    entries are dropped when a new SignalIndex is passed in.
+    """
+    
+    def __init__(self, transcripts):
+        size = len(transcripts)
+        self.turns = array('I', bytes(4 * size))
+        self.chars = array('I', bytes(4 * size))
+        self.speaker_turns = {}
+        self.speaker_chars = {}
+        self._sorted = {}
+        self._sorted_signals = None
+        
+        for ordinal, conv in enumerate(transcripts):
+            turns = conv['conversation']
+            total = 0
+            for turn in turns:
+                role = turn['speaker'].lower()
+                length = len(turn['text'])
+                total += length
+                if role not in self.speaker_turns:
+                    self.speaker_turns[role] = array('I', bytes(4 * size))
+                    self.speaker_chars[role] = array('I', bytes(4 * size))
+                self.speaker_turns[role][ordinal] += 1
+                self.speaker_chars[role][ordinal] += length
+            self.turns[ordinal] = len(turns)
+            self.chars[ordinal] = total
+    
+    def features(self, signal_index):
+        """Names of every feature: turns, chars, turns:ROLE, chars:ROLE, first:CATEGORY"""
+        names = ['turns', 'chars']
+        for role in sorted(self.speaker_turns):
+            names += [f'turns:{role}', f'chars:{role}']
+        names += [f'first:{category}' for category in signal_index.categories]
+        return names
+    
+    def column(self, feature, signal_index):
+        """Per-conversation array of a feature; KeyError if there is no such feature"""
+        kind, _, name = feature.partition(':')
+        if kind == 'turns' and not name:
+            return self.turns
+        if kind == 'chars' and not name:
+            return self.chars
+        if kind == 'turns' and name in self.speaker_turns:
+            return self.speaker_turns[name]
+        if kind == 'chars' and name in self.speaker_chars:
+            return self.speaker_chars[name]
+        if kind == 'first' and name in signal_index.first_hits:
+            return signal_index.first_hits[name]
+        raise KeyError(feature)
+    
+    def values(self, feature, signal_index, ordinals=None, key=None):
+        """Sorted feature values of the conversations (all when None), skipping NO_HIT
+        
+        `key` names `ordinals` (an outcome, say) so their sorted values are
+        cached; without one, only the all-conversations values are.
+        """
+        if signal_index is not self._sorted_signals:
+            self._sorted = {k: v for k, v in self._sorted.items() if not k[0].startswith('first:')}
+            self._sorted_signals = signal_index
+        
+        cacheable = ordinals is None or key is not None
+        if cacheable and (feature, key) in self._sorted:
+            return self._sorted[(feature, key)]
+        
+        column = self.column(feature, signal_index)
+        values = column if ordinals is None else map(column.__getitem__, ordinals)
+        values = sorted(values)
+        if feature.startswith('first:'):
+            # NO_HIT sorts first
+            values = values[bisect_right(values, NO_HIT):]
+        # A compact array rather than a list of int objects
+        values = array(column.typecode, values)
+        if cacheable:
+            self._sorted[(feature, key)] = values
+        return values
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values: the smallest value with p% at or below it"""
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def distribution(values, bins=HISTOGRAM_BINS, percentiles=DEFAULT_PERCENTILES):
+    """Mean, range, percentiles and an equal-width histogram of sorted integers
+    
+    Bins cover whole numbers: each is [low, high] inclusive, and there are
+    never more bins than distinct possible values.
+    """
+    if not values:
+        return {'mean': None, 'min': None, 'max': None,
+                'percentiles': {f'p{p:g}': None for p in percentiles}, 'histogram': []}
+    
+    low, high = values[0], values[-1]
+    width = max(math.ceil((high - low + 1) / max(bins, 1)), 1)
+    histogram = []
+    start = 0
+    for edge in range(low, high + 1, width):
+        end = bisect_right(values, edge + width - 1, start)
+        histogram.append({'low': edge, 'high': min(edge + width - 1, high), 'count': end - start})
+        start = end
+    
+    return {
+        'mean': round(sum(values) / len(values), 1),
+        'min': low,
+        'max': high,
+        'percentiles': {f'p{p:g}': percentile(values, p) for p in percentiles},
+        'histogram': histogram
+    }
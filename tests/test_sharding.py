@@ -0,0 +1,66 @@
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import different_answers, free_port_block, write_synthetic_dataset
+from conversation_analyzer import ConversationAnalyzer, load_transcripts
+from lexicon import LEXICON_FILE
+from sharding import ShardedAnalyzer, load_shard, spawn_shards
+
+
+# Transcripts in the test dataset and shard processes started for it
+DATASET_SIZE = 2000
+SHARDS = 3
+
+
+class ShardingTest(unittest.TestCase):
+    """Merged answers of local shard processes against one analyzer over the same data"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.data_file = write_synthetic_dataset(os.path.join(cls.tmp.name, 'data.json'),
+                                                DATASET_SIZE, seed=3)
+        cls.single = ConversationAnalyzer(cls.data_file)
+        cls.processes, urls = spawn_shards(cls.data_file, SHARDS, free_port_block(SHARDS + 1),
+                                           LEXICON_FILE)
+        try:
+            cls.sharded = ShardedAnalyzer.connect(urls)
+        except Exception:
+            cls.tearDownClass()
+            raise
+    
+    @classmethod
+    def tearDownClass(cls):
+        for process in cls.processes:
+            process.terminate()
+            process.wait()
+        cls.tmp.cleanup()
+    
+    def test_slices_cover_the_file_in_order(self):
+        slices = [load_shard(self.data_file, shard, SHARDS) for shard in range(SHARDS)]
+        self.assertEqual([conv for part in slices for conv in part], load_transcripts(self.data_file))
+    
+    def test_merged_answers_equal_single_node(self):
+        self.assertEqual(different_answers(self.single, self.sharded), [])
+    
+    def test_reshuffled_full_analysis_equals_single_node(self):
+        top = self.single.get_all_outcomes()[0]['name']
+        for seed in [1, 2, 99]:
+            self.assertEqual(self.sharded.analyze(top, shuffle=seed, full=True),
+                             self.single.analyze(top, shuffle=seed, full=True))
+
+    def test_cancelled_analysis_returns_nothing(self):
+        top = self.single.get_all_outcomes()[0]['name']
+        cancel = threading.Event()
+        cancel.set()
+        self.assertIsNone(self.sharded.analyze(top, shuffle=7, full=True, cancel=cancel))
+
+
+if __name__ == '__main__':
+    unittest.main()